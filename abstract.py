@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Iterator
+from concurrent.futures import Executor
+from functools import partial
+from itertools import islice
+from typing import AsyncIterator, Callable, Iterator
 from record import Record, SequenceRecord
+from parallel_gzip import BgzfReader
+from region_index import RegionIndex
 from pathlib import Path
+import asyncio
 
 
 class Reader(ABC):
@@ -11,11 +17,20 @@ class Reader(ABC):
     Предоставляет общий интерфейс и базовую логику открытия/закрытия файлов,
     а также поддержку контекстного менеджера (with-блоков).
 
+    Для asyncio поддерживаются "async with" и "async for" (см. aread()):
+    открытие, чтение (включая распаковку gzip) и закрытие файла выполняются
+    в пуле потоков, поэтому цикл событий не блокируется и в нём можно
+    одновременно читать много файлов.
+
     Attributes:
         filepath (Path): Путь к файлу, из которого будут читаться данные.
         file (file object or None): Открытый файловый дескриптор или None, если файл закрыт.
     """
 
+    # Записей в одной порции, читаемой в пуле потоков, и число порций, читаемых заранее
+    ASYNC_CHUNK_SIZE = 1000
+    ASYNC_READ_AHEAD = 4
+
     def __init__(self, filepath: str | Path):
         """
         Инициализирует Reader с указанным путём к файлу.
@@ -25,6 +40,8 @@ class Reader(ABC):
         """
         self.filepath = Path(filepath)
         self.file = None
+        # Функции остановки активных асинхронных потоков -> читает ли поток общий дескриптор
+        self._async_streams = {}
 
     @abstractmethod
     def read(self) -> Iterator[Record]:
@@ -78,6 +95,181 @@ class Reader(ABC):
         """
         self.close()
 
+    async def __aenter__(self):
+        """
+        Асинхронный контекстный менеджер (async with-блок).
+
+        Вызывает __enter__() в пуле потоков: открытие файла и разбор заголовка
+        не блокируют цикл событий.
+
+        Returns:
+            Reader: Текущий экземпляр после открытия файла.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.__enter__)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        Завершение async with-блока: останавливает незавершённые aread()
+        и закрывает файл в пуле потоков.
+
+        Args:
+            exc_type (type or None): Тип исключения, если оно возникло.
+            exc_val (Exception or None): Экземпляр исключения.
+            exc_tb (traceback or None): Объект трассировки стека.
+        """
+        await self._stop_streams()
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __aiter__(self) -> AsyncIterator[Record]:
+        """
+        Поддержка "async for record in reader" (см. aread()).
+
+        Returns:
+            AsyncIterator[Record]: Асинхронный итератор по записям.
+        """
+        return self.aread()
+
+    def aread(
+        self,
+        chunk_size: int | None = None,
+        read_ahead: int | None = None,
+        executor: Executor | None = None,
+    ) -> AsyncIterator[Record]:
+        """
+        Асинхронно читает записи: асинхронная версия read().
+
+        Поток читает общий дескриптор self.file, поэтому при первом обращении
+        к новому потоку незавершённые потоки aread() того же объекта останавливаются,
+        а новый продолжает чтение с текущей позиции файла — как read() после
+        прерванного цикла for (записи, прочитанные заранее, при этом пропускаются).
+
+        Записи извлекаются из read() порциями по chunk_size в пуле потоков,
+        так что переключение в поток приходится на порцию, а не на запись.
+        Следующие порции читаются заранее, пока потребитель обрабатывает текущую,
+        но не больше read_ahead порций: медленный потребитель не приводит к росту памяти.
+
+        Args:
+            chunk_size (int | None, optional): Записей в порции (по умолчанию ASYNC_CHUNK_SIZE).
+            read_ahead (int | None, optional): Наибольшее число прочитанных заранее порций
+                (по умолчанию ASYNC_READ_AHEAD).
+            executor (Executor | None, optional): Пул потоков; None — пул цикла событий по умолчанию.
+
+        Returns:
+            AsyncIterator[Record]: Асинхронный итератор по записям.
+
+        Raises:
+            ValueError: Если chunk_size или read_ahead неположительны.
+        """
+        return self._stream(self.read, chunk_size, read_ahead, executor, exclusive=True)
+
+    def _stream(
+        self,
+        make_iterator: Callable[[], Iterator[Record]],
+        chunk_size: int | None,
+        read_ahead: int | None,
+        executor: Executor | None,
+        exclusive: bool = False,
+    ) -> AsyncIterator[Record]:
+        """
+        Превращает синхронный итератор записей в асинхронный с упреждающим чтением порций.
+
+        Args:
+            make_iterator (Callable[[], Iterator[Record]]): Функция, создающая итератор записей.
+            chunk_size (int | None): Записей в порции.
+            read_ahead (int | None): Наибольшее число прочитанных заранее порций.
+            executor (Executor | None): Пул потоков.
+            exclusive (bool, optional): Итератор читает общий дескриптор self.file:
+                перед началом чтения другие такие потоки останавливаются.
+
+        Returns:
+            AsyncIterator[Record]: Асинхронный итератор по записям.
+
+        Raises:
+            ValueError: Если chunk_size или read_ahead неположительны.
+        """
+        chunk_size = self.ASYNC_CHUNK_SIZE if chunk_size is None else chunk_size
+        read_ahead = self.ASYNC_READ_AHEAD if read_ahead is None else read_ahead
+        if chunk_size <= 0 or read_ahead <= 0:
+            raise ValueError(f"chunk_size and read_ahead must be positive, got {chunk_size}, {read_ahead}")
+        return self._iterate_chunks(make_iterator, chunk_size, read_ahead, executor, exclusive)
+
+    async def _stop_streams(self, exclusive_only: bool = False):
+        """
+        Останавливает активные асинхронные потоки объекта (см. _stream()).
+
+        Фоновое чтение прекращается после текущей порции; потребитель, ожидающий
+        следующую запись, получает конец потока. Сами генераторы не закрываются,
+        поэтому остановка безопасна, даже если другая задача находится внутри их __anext__.
+
+        Args:
+            exclusive_only (bool, optional): Останавливать только потоки, читающие
+                общий дескриптор self.file.
+        """
+        for stop, exclusive in list(self._async_streams.items()):
+            if exclusive or not exclusive_only:
+                await stop()
+
+    async def _iterate_chunks(self, make_iterator, chunk_size, read_ahead, executor, exclusive):
+        """Асинхронный генератор для _stream(): порции читает фоновая задача через пул потоков."""
+        if exclusive:
+            await self._stop_streams(exclusive_only=True)
+        loop = asyncio.get_running_loop()
+        # Очередь ограничена: фоновая задача ждёт, пока потребитель не освободит место
+        chunks = asyncio.Queue(maxsize=read_ahead)
+        stopped = False
+        iterator = None
+        iterator_closed = False
+
+        def next_chunk():
+            nonlocal iterator
+            if iterator is None:
+                iterator = iter(make_iterator())
+            return list(islice(iterator, chunk_size))
+
+        async def produce():
+            while not stopped:
+                try:
+                    chunk = await loop.run_in_executor(executor, next_chunk)
+                except Exception as e:
+                    await chunks.put(e)
+                    return
+                if stopped:
+                    return
+                await chunks.put(chunk)
+                if not chunk:
+                    return
+
+        async def stop():
+            nonlocal stopped, iterator_closed
+            self._async_streams.pop(stop, None)
+            # Освобождаем очередь, чтобы фоновая задача завершилась после текущей порции
+            stopped = True
+            while not chunks.empty():
+                chunks.get_nowait()
+            await asyncio.shield(producer)
+            while not chunks.empty():
+                chunks.get_nowait()
+            # Пустая порция завершает потребителя, если он ждёт следующую запись
+            chunks.put_nowait([])
+            if not iterator_closed and iterator is not None and hasattr(iterator, "close"):
+                iterator_closed = True
+                await loop.run_in_executor(executor, iterator.close)
+
+        producer = asyncio.ensure_future(produce())
+        self._async_streams[stop] = exclusive
+        try:
+            while True:
+                chunk = await chunks.get()
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if not chunk:
+                    return
+                for record in chunk:
+                    yield record
+        finally:
+            await stop()
+
 
 class SequenceReader(Reader):
     """
@@ -122,6 +314,10 @@ class GenomicDataReader(Reader):
 
     Поддерживает парсинг заголовка при открытии файла и чтение записей после заголовка.
 
+    Подклассы, которые реализуют _line_interval() и _parse_lines(), поддерживают
+    запросы по региону fetch(): по индексу .rgi (см. RegionIndex) читаются только
+    участки файла, которые могут содержать записи региона.
+
     Attributes:
         filepath (Path): Путь к геномному файлу.
         file (file object or None): Открытый файловый дескриптор.
@@ -137,6 +333,7 @@ class GenomicDataReader(Reader):
         """
         super().__init__(filepath)
         self._header_parsed = False
+        self._region_index = None
 
     def __enter__(self):
         """
@@ -152,7 +349,7 @@ class GenomicDataReader(Reader):
             RuntimeError: Если произошла ошибка при открытии файла или парсинге заголовка.
         """
         try:
-            self.file = open(self.filepath, "r")
+            self.file = self._open_file()
             self._parse_header()
             return self
         except Exception as e:
@@ -161,6 +358,15 @@ class GenomicDataReader(Reader):
                 self.file.close()
             raise RuntimeError(f"Ошибка при открытии или парсинге файла {self.filepath}: {e}")
 
+    def _open_file(self):
+        """
+        Открывает файл для чтения; подклассы могут выбрать другой режим (например, бинарный).
+
+        Returns:
+            file object: Открытый файловый дескриптор.
+        """
+        return open(self.filepath, "r")
+
     @abstractmethod
     def _parse_header(self):
         """
@@ -190,6 +396,155 @@ class GenomicDataReader(Reader):
         """
         pass
 
+    def _parse_lines(self, lines) -> Iterator[Record]:
+        """
+        Преобразует строки данных файла (без заголовка) в записи.
+
+        Используется read() и fetch(); реализуется в подклассах, поддерживающих fetch().
+
+        Args:
+            lines (Iterable): Строки данных в том виде, в каком их возвращает _fetch_lines().
+
+        Yields:
+            Record: Объект записи геномных данных.
+
+        Raises:
+            NotImplementedError: Если метод не реализован в подклассе.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support region queries")
+
+    def _line_interval(self, line: bytes) -> tuple[str, int, int] | None:
+        """
+        Извлекает из сырой строки файла интервал записи для индекса регионов.
+
+        Реализуется в подклассах, поддерживающих fetch().
+
+        Args:
+            line (bytes): Строка файла.
+
+        Returns:
+            tuple[str, int, int] | None: Хромосома, начало и конец (0-based, конец не включительно)
+                или None для строк заголовка и записей без позиции.
+
+        Raises:
+            NotImplementedError: Если метод не реализован в подклассе.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support region queries")
+
+    def index(self, build: bool = True) -> RegionIndex | None:
+        """
+        Возвращает актуальный индекс регионов файла.
+
+        Индекс загружается из файла .rgi; если его нет или он устарел
+        (изменились размер или время изменения файла), он строится и сохраняется.
+
+        Args:
+            build (bool, optional): Строить индекс, если актуального нет.
+                При False в этом случае возвращается None.
+
+        Returns:
+            RegionIndex | None: Индекс файла.
+        """
+        index = self._region_index
+        if index is not None:
+            stat = self.filepath.stat()
+            if index.file_size == stat.st_size and index.mtime_ns == stat.st_mtime_ns:
+                return index
+        if build:
+            self._region_index = RegionIndex.load_or_build(self.filepath, self._line_interval)
+        else:
+            self._region_index = RegionIndex.load(self.filepath)
+        return self._region_index
+
+    def fetch(self, chrom: str, start: int, end: int) -> Iterator[Record]:
+        """
+        Возвращает записи, пересекающие регион [start, end) хромосомы chrom.
+
+        Файл читается отдельным дескриптором только в участках, выбранных индексом,
+        поэтому fetch() не меняет позицию read() и может вызываться многократно.
+
+        Args:
+            chrom (str): Хромосома.
+            start (int): Начало региона (0-based).
+            end (int): Конец региона (не включительно).
+
+        Yields:
+            Record: Записи региона в порядке следования в файле.
+
+        Raises:
+            NotImplementedError: Если формат не поддерживает запросы по региону.
+            ValueError: Если файл .gz сжат не в формате BGZF (нужен bgzip).
+        """
+        if not self.file:
+            self.file = self._open_file()
+        if not self._header_parsed:
+            self._parse_header()
+        yield from self._parse_lines(self._fetch_lines(chrom, start, end))
+
+    def afetch(
+        self,
+        chrom: str,
+        start: int,
+        end: int,
+        chunk_size: int | None = None,
+        read_ahead: int | None = None,
+        executor: Executor | None = None,
+    ) -> AsyncIterator[Record]:
+        """
+        Асинхронная версия fetch(): чтение идёт в пуле потоков порциями (см. Reader.aread()).
+
+        Args:
+            chrom (str): Хромосома.
+            start (int): Начало региона (0-based).
+            end (int): Конец региона (не включительно).
+            chunk_size (int | None, optional): Записей в порции.
+            read_ahead (int | None, optional): Наибольшее число прочитанных заранее порций.
+            executor (Executor | None, optional): Пул потоков.
+
+        Returns:
+            AsyncIterator[Record]: Асинхронный итератор по записям региона.
+        """
+        return self._stream(lambda: self.fetch(chrom, start, end), chunk_size, read_ahead, executor)
+
+    def _fetch_lines(self, chrom: str, start: int, end: int) -> Iterator[bytes]:
+        """
+        Читает строки файла из участков индекса и оставляет те, что пересекают регион.
+
+        Args:
+            chrom (str): Хромосома.
+            start (int): Начало региона (0-based).
+            end (int): Конец региона (не включительно).
+
+        Yields:
+            bytes: Строки записей региона.
+
+        Raises:
+            ValueError: Если файл .gz сжат не в формате BGZF.
+        """
+        chunks = self.index().region_chunks(chrom, start, end)
+        if not chunks:
+            return
+        line_interval = self._line_interval
+        # Для .gz (BGZF) смещения индекса виртуальные: переход распаковывает только нужные блоки
+        opener = BgzfReader if str(self.filepath).endswith(".gz") else partial(open, mode="rb")
+        with opener(self.filepath) as f:
+            for begin, stop in chunks:
+                f.seek(begin)
+                position = begin
+                while position < stop:
+                    line = f.readline()
+                    if not line:
+                        break
+                    position = f.tell()
+                    interval = line_interval(line)
+                    if (
+                        interval is not None
+                        and interval[0] == chrom
+                        and interval[1] < end
+                        and max(interval[2], interval[1] + 1) > start
+                    ):
+                        yield line
+
     def close(self):
         """
         Закрывает файл и сбрасывает флаг парсинга заголовка.
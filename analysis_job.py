@@ -0,0 +1,239 @@
+from pathlib import Path
+from typing import Callable
+import threading
+
+from fastq_stats import AnalysisCancelled, FastqStats, analyze_file, analyze_sample
+from results_cache import ResultsCache
+
+
+class CancellationToken:
+    """
+    Флаг отмены задачи, который цикл разбора проверяет между пакетами.
+
+    Совместим с параметром cancel функции analyze_file() (метод is_set()).
+    """
+
+    def __init__(self):
+        """Создаёт неустановленный флаг."""
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Запрашивает отмену задачи."""
+        self._event.set()
+
+    def is_set(self) -> bool:
+        """
+        Проверяет, запрошена ли отмена.
+
+        Returns:
+            bool: True, если вызван cancel().
+        """
+        return self._event.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True, если отмена запрошена."""
+        return self._event.is_set()
+
+
+def _tiles_complete(stats: FastqStats) -> bool:
+    """
+    Проверяет, что статистика по тайлам (если она есть) учитывает все риды накопителя.
+
+    Риды с номером тайла и непустой последовательностью учтены в первой позиции
+    TileStats.base_counts, остальные — в TileStats.unparsed. Покрытие неполное,
+    если часть файла проанализирована без модуля тайлов.
+
+    Args:
+        stats (FastqStats): Накопитель.
+
+    Returns:
+        bool: True, если тайлов нет или они покрывают все непустые риды.
+    """
+    if stats.tiles is None:
+        return True
+    covered = int(stats.tiles.base_counts[:, :1].sum()) + stats.tiles.unparsed
+    return covered >= stats.total_seq - int(stats.length_counts[0])
+
+
+class AnalysisJob:
+    """
+    Фоновая задача анализа FASTQ-файла с отменой и возобновлением.
+
+    Задача выполняется в отдельном потоке. Готовые результаты берутся из кэша;
+    во время анализа в кэш периодически записывается контрольная точка
+    (частичная статистика и обработанные диапазоны байтов), а при отмене —
+    финальная. Следующая задача для того же неизменённого файла продолжает
+    анализ с контрольной точки, в том числе после аварийного завершения программы.
+    Для сжатых файлов контрольные точки не ведутся.
+
+    Если задана выборка (sampling), выполняется быстрая оценка analyze_sample();
+    такие результаты не кэшируются и контрольные точки для них не ведутся.
+
+    Обратные вызовы выполняются в потоке задачи.
+
+    Attributes:
+        file_path (Path): Путь к анализируемому файлу.
+        workers (int | None): Число процессов анализа.
+        cache (ResultsCache | None): Кэш результатов и контрольных точек.
+        token (CancellationToken): Флаг отмены задачи.
+        sampling (dict | None): Параметры analyze_sample() (mode, n, rate, seed, seek)
+            или None для полного анализа.
+        tiles (bool): Вести статистику по тайлам Illumina.
+        resumed (bool): True, если анализ продолжен с контрольной точки.
+    """
+
+    def __init__(
+        self,
+        file_path: str | Path,
+        workers: int | None = None,
+        cache: ResultsCache | None = None,
+        on_progress: Callable[[dict, int, int], None] | None = None,
+        on_done: Callable[[FastqStats], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+        on_cancel: Callable[[FastqStats], None] | None = None,
+        progress_interval: float = 1.0,
+        checkpoint_interval: float = 30.0,
+        sampling: dict | None = None,
+        tiles: bool = False,
+    ):
+        """
+        Создаёт задачу (без запуска).
+
+        Args:
+            file_path (str | Path): Путь к FASTQ-файлу.
+            workers (int | None, optional): Число процессов; по умолчанию — число ядер.
+            cache (ResultsCache | None, optional): Кэш; без него контрольные точки не ведутся.
+            on_progress (Callable[[dict, int, int], None] | None, optional): Промежуточные
+                результаты, как у параметра progress функции analyze_file().
+            on_done (Callable[[FastqStats], None] | None, optional): Вызывается с итоговой статистикой.
+            on_error (Callable[[Exception], None] | None, optional): Вызывается при ошибке анализа.
+            on_cancel (Callable[[FastqStats], None] | None, optional): Вызывается после отмены
+                с частичной статистикой.
+            progress_interval (float, optional): Минимальный интервал между вызовами on_progress.
+            checkpoint_interval (float, optional): Минимальный интервал между записями
+                контрольной точки в секундах.
+            sampling (dict | None, optional): Параметры выборки для analyze_sample().
+            tiles (bool, optional): Вести статистику по тайлам; результаты из кэша
+                и контрольные точки без неё не используются.
+        """
+        self.file_path = Path(file_path)
+        self.workers = workers
+        self.cache = cache
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.progress_interval = progress_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.sampling = sampling
+        self.tiles = tiles
+        self.token = CancellationToken()
+        self.resumed = False
+        self._thread = None
+
+    def start(self) -> "AnalysisJob":
+        """
+        Запускает задачу в фоновом потоке.
+
+        Returns:
+            AnalysisJob: Эта задача (для цепочек вызовов).
+        """
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Запрашивает отмену; задача остановится на ближайшей границе пакетов."""
+        self.token.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        """True, если отмена запрошена."""
+        return self.token.cancelled
+
+    def join(self, timeout: float | None = None):
+        """
+        Ожидает завершения фонового потока задачи.
+
+        Args:
+            timeout (float | None, optional): Максимальное время ожидания в секундах.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        """
+        Выполняет задачу в текущем потоке и вызывает соответствующий обратный вызов.
+        """
+        try:
+            stats = self._analyze()
+        except AnalysisCancelled as e:
+            if e.done_ranges and self.cache is not None:
+                self.cache.put_checkpoint(self.file_path, e.stats, e.done_ranges)
+            if self.on_cancel is not None:
+                self.on_cancel(e.stats)
+        except Exception as e:
+            if self.on_error is not None:
+                self.on_error(e)
+        else:
+            if self.on_done is not None:
+                self.on_done(stats)
+
+    def _analyze(self) -> FastqStats:
+        """
+        Возвращает статистику из кэша или выполняет (продолжает) анализ.
+
+        Returns:
+            FastqStats: Итоговая статистика.
+
+        Raises:
+            AnalysisCancelled: Если задача отменена.
+        """
+        if self.sampling is not None:
+            return analyze_sample(
+                self.file_path,
+                progress=self.on_progress,
+                progress_interval=self.progress_interval,
+                cancel=self.token,
+                tiles=self.tiles,
+                **self.sampling,
+            )
+        if self.cache is None:
+            return analyze_file(
+                self.file_path,
+                workers=self.workers,
+                progress=self.on_progress,
+                progress_interval=self.progress_interval,
+                cancel=self.token,
+                tiles=self.tiles,
+            )
+        stats = self.cache.get(self.file_path)
+        if stats is not None and (not self.tiles or stats.tiles is not None and _tiles_complete(stats)):
+            return stats
+        compressed = str(self.file_path).endswith(".gz")
+        resume = None if compressed else self.cache.get_checkpoint(self.file_path)
+        # Контрольная точка годится, только если она собрана с тем же набором модулей:
+        # иначе тайлы будут покрывать лишь часть файла
+        if resume is not None and (resume[0].tiles is None) != (not self.tiles):
+            resume = None
+        self.resumed = resume is not None
+
+        def save(partial, done_ranges):
+            self.cache.put_checkpoint(self.file_path, partial, done_ranges)
+
+        stats = analyze_file(
+            self.file_path,
+            workers=self.workers,
+            progress=self.on_progress,
+            progress_interval=self.progress_interval,
+            cancel=self.token,
+            resume=resume,
+            checkpoint=None if compressed else save,
+            checkpoint_interval=self.checkpoint_interval,
+            tiles=self.tiles,
+        )
+        if _tiles_complete(stats):
+            self.cache.put(self.file_path, stats)
+        self.cache.discard_checkpoint(self.file_path)
+        return stats
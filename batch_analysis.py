@@ -0,0 +1,273 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Iterable
+import csv
+import json
+import os
+import time
+
+from fastq_stats import CANCEL_POLL_INTERVAL, FastqStats, analyze_file, analyze_sample
+from results_cache import ResultsCache
+
+FASTQ_SUFFIXES = (".fastq", ".fq", ".fastq.gz", ".fq.gz")
+
+# Столбцы сводной таблицы (и отчёта TSV) в порядке вывода
+SUMMARY_COLUMNS = (
+    "file",
+    "status",
+    "total_seq",
+    "total_bases",
+    "avg_len",
+    "median_len",
+    "gc_content",
+    "mean_quality",
+    "estimated",
+    "seconds",
+    "error",
+)
+
+
+def is_fastq_file(path: str | Path) -> bool:
+    """
+    Проверяет, похоже ли имя файла на FASTQ (.fastq, .fq и их .gz-варианты).
+
+    Args:
+        path (str | Path): Путь к файлу.
+
+    Returns:
+        bool: True для FASTQ-файлов.
+
+    >>> is_fastq_file("run1/S1_R1.fastq.gz"), is_fastq_file("notes.txt")
+    (True, False)
+    """
+    return Path(path).name.lower().endswith(FASTQ_SUFFIXES)
+
+
+def collect_fastq_files(paths: Iterable[str | Path], recursive: bool = False) -> list[Path]:
+    """
+    Составляет список FASTQ-файлов из путей к файлам и каталогам.
+
+    Файлы, переданные явно, берутся как есть; в каталогах отбираются файлы
+    с расширениями FASTQ_SUFFIXES. Повторы удаляются, порядок сохраняется.
+
+    Args:
+        paths (Iterable[str | Path]): Пути к файлам и каталогам.
+        recursive (bool, optional): Искать файлы и во вложенных каталогах.
+
+    Returns:
+        list[Path]: Пути к FASTQ-файлам.
+
+    Raises:
+        FileNotFoundError: Если путь не существует.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            candidates = path.rglob("*") if recursive else path.iterdir()
+            files.extend(sorted(p for p in candidates if p.is_file() and is_fastq_file(p)))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {str(path)!r}")
+    return list(dict.fromkeys(files))
+
+
+def summarize(file_path: str | Path, stats: FastqStats, seconds: float = 0.0) -> dict:
+    """
+    Формирует строку сводной таблицы по результатам анализа файла.
+
+    Args:
+        file_path (str | Path): Путь к файлу.
+        stats (FastqStats): Результаты анализа.
+        seconds (float, optional): Время анализа в секундах.
+
+    Returns:
+        dict: Значения столбцов SUMMARY_COLUMNS.
+    """
+    result = stats.to_dict()
+    return {
+        "file": str(file_path),
+        "status": "ok",
+        "total_seq": result["total_seq"],
+        "total_bases": stats.total_bases,
+        "avg_len": result["avg_len"],
+        "median_len": result["median_len"],
+        "gc_content": result["gc_content"],
+        "mean_quality": result["mean_quality"],
+        "estimated": result["estimated"],
+        "seconds": seconds,
+        "error": "",
+    }
+
+
+def _analyze_one(file_path: str, sampling: dict | None, tiles: bool = False) -> tuple[FastqStats, float]:
+    """
+    Анализирует один файл в процессе-воркере пакетного анализа.
+
+    Args:
+        file_path (str): Путь к FASTQ-файлу.
+        sampling (dict | None): Параметры analyze_sample() или None для полного анализа.
+        tiles (bool, optional): Вести статистику по тайлам Illumina.
+
+    Returns:
+        tuple[FastqStats, float]: Результаты и время анализа в секундах.
+    """
+    started = time.monotonic()
+    if sampling is not None:
+        stats = analyze_sample(file_path, tiles=tiles, **sampling)
+    else:
+        stats = analyze_file(file_path, workers=1, tiles=tiles)
+    return stats, time.monotonic() - started
+
+
+def analyze_files(
+    files: Iterable[str | Path],
+    jobs: int | None = None,
+    cache: ResultsCache | None = None,
+    sampling: dict | None = None,
+    on_result: Callable[[dict, FastqStats | None], None] | None = None,
+    cancel=None,
+    tiles: bool = False,
+) -> list[dict]:
+    """
+    Анализирует много FASTQ-файлов в пуле процессов с ограниченным параллелизмом.
+
+    Каждый файл целиком обрабатывается одним процессом; одновременно в работе
+    не больше jobs файлов (и не больше 2 * jobs поставленных в очередь задач).
+    Результаты полного анализа берутся из кэша и сохраняются в него.
+    Ошибка в одном файле не прерывает обработку остальных: строка файла
+    получает статус "error" и текст ошибки.
+
+    Args:
+        files (Iterable[str | Path]): Пути к FASTQ-файлам.
+        jobs (int | None, optional): Число одновременно анализируемых файлов;
+            по умолчанию — число ядер.
+        cache (ResultsCache | None, optional): Кэш результатов.
+        sampling (dict | None, optional): Параметры analyze_sample() для быстрой оценки.
+        on_result (Callable[[dict, FastqStats | None], None] | None, optional): Вызывается
+            по готовности каждого файла со строкой сводки и результатами (None при ошибке).
+        cancel (threading.Event | None, optional): Флаг отмены: новые файлы
+            не запускаются, уже начатые дорабатываются.
+        tiles (bool, optional): Вести статистику по тайлам Illumina; результаты из кэша
+            без неё не используются.
+
+    Returns:
+        list[dict]: Строки сводки в порядке завершения (см. SUMMARY_COLUMNS).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    rows = []
+
+    def finish(row, stats):
+        rows.append(row)
+        if on_result is not None:
+            on_result(row, stats)
+
+    def fail(file_path, error):
+        row = dict.fromkeys(SUMMARY_COLUMNS)
+        row.update(file=str(file_path), status="error", error=str(error))
+        finish(row, None)
+
+    queued = []
+    for file_path in map(Path, files):
+        try:
+            stats = cache.get(file_path) if cache is not None and sampling is None else None
+            if stats is not None and (stats.tiles is not None or not tiles):
+                row = summarize(file_path, stats)
+            else:
+                queued.append(file_path)
+                continue
+        except Exception as e:
+            fail(file_path, e)
+            continue
+        finish(row, stats)
+    if not queued:
+        return rows
+
+    queued.reverse()
+    with ProcessPoolExecutor(max_workers=min(jobs, len(queued))) as pool:
+        pending = {}
+        while queued or pending:
+            cancelled = cancel is not None and cancel.is_set()
+            while queued and not cancelled and len(pending) < 2 * jobs:
+                file_path = queued.pop()
+                pending[pool.submit(_analyze_one, str(file_path), sampling, tiles)] = file_path
+            if cancelled:
+                queued.clear()
+                for future in list(pending):
+                    if future.cancel():
+                        del pending[future]
+            if not pending:
+                break
+            finished, _ = wait(pending, CANCEL_POLL_INTERVAL, FIRST_COMPLETED)
+            for future in finished:
+                file_path = pending.pop(future)
+                try:
+                    stats, seconds = future.result()
+                except Exception as e:
+                    fail(file_path, e)
+                    continue
+                if cache is not None and sampling is None:
+                    cache.put(file_path, stats)
+                finish(summarize(file_path, stats, seconds), stats)
+    return rows
+
+
+def write_json(rows: list[dict], f, details: dict[str, dict] | None = None):
+    """
+    Записывает отчёт пакетного анализа в формате JSON.
+
+    Значения NaN (например, доверительные интервалы по слишком малой выборке)
+    записываются как null.
+
+    Args:
+        rows (list[dict]): Строки сводки.
+        f (file object): Текстовый файл, открытый для записи.
+        details (dict[str, dict] | None, optional): Полные результаты (FastqStats.to_dict())
+            по пути файла; добавляются в строки под ключом "details".
+    """
+    report = []
+    for row in rows:
+        entry = dict(row)
+        if details is not None and row["file"] in details:
+            entry["details"] = details[row["file"]]
+        report.append(entry)
+    json.dump(_replace_nan({"files": report}), f, ensure_ascii=False, indent=2, allow_nan=False)
+    f.write("\n")
+
+
+def _replace_nan(value):
+    """
+    Рекурсивно заменяет NaN на None в словарях, списках и кортежах.
+
+    Args:
+        value: Значение для сериализации.
+
+    Returns:
+        Значение без NaN.
+
+    >>> _replace_nan({"a": [1.0, float("nan")], "b": (float("nan"), 2)})
+    {'a': [1.0, None], 'b': [None, 2]}
+    """
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, dict):
+        return {key: _replace_nan(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_nan(item) for item in value]
+    return value
+
+
+def write_tsv(rows: list[dict], f):
+    """
+    Записывает сводную таблицу пакетного анализа в формате TSV.
+
+    Args:
+        rows (list[dict]): Строки сводки.
+        f (file object): Текстовый файл, открытый для записи (с newline="").
+    """
+    writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, delimiter="\t", lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(
+            {key: f"{value:.4f}" if isinstance(value, float) else value for key, value in row.items()}
+        )
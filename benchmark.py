@@ -0,0 +1,207 @@
+import argparse
+import gzip
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from itertools import accumulate
+from pathlib import Path
+
+from record import SequenceRecord, SequenceRecordBatch
+from vcf_reader import VcfReader
+
+# Допустимые накладные расходы памяти на рид сверх самих данных (байт):
+# данные — идентификатор, последовательность и качество по байту на позицию
+RECORD_OVERHEAD_TARGETS = {
+    "batch": 80,
+    "records": 224,
+}
+
+
+def _synthetic_reads(count: int, length: int, seed: int = 0) -> list[tuple[bytes, bytes, bytearray]]:
+    """
+    Генерирует риды одинаковой длины со случайной последовательностью и качеством.
+
+    Поля хранятся в "сыром" виде, как после чтения файла: строки и bytes записей
+    создаются заново при замере и не разделяются с исходными данными.
+
+    Args:
+        count (int): Число ридов.
+        length (int): Длина рида.
+        seed (int, optional): Зерно генератора.
+
+    Returns:
+        list[tuple[bytes, bytes, bytearray]]: Идентификатор, последовательность и Phred-оценки.
+    """
+    rng = random.Random(seed)
+    return [
+        (
+            f"M00123:45:000000000-A1B2C:1:1101:{i % 30000}:{i // 30000}".encode("ascii"),
+            bytes(rng.choices(b"ACGT", k=length)),
+            bytearray(rng.choices(range(2, 41), k=length)),
+        )
+        for i in range(count)
+    ]
+
+
+def _measure(build) -> tuple[int, float]:
+    """
+    Замеряет память, занятую результатом build(), и время его построения.
+
+    Returns:
+        tuple[int, float]: Прирост выделенной памяти в байтах и время в секундах.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    elapsed = time.perf_counter() - started
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used, elapsed
+
+
+def bench_records(count: int, length: int) -> bool:
+    """
+    Сравнивает память на рид для отдельных записей SequenceRecord и для SequenceRecordBatch.
+
+    Args:
+        count (int): Число ридов.
+        length (int): Длина рида.
+
+    Returns:
+        bool: True, если накладные расходы укладываются в RECORD_OVERHEAD_TARGETS.
+    """
+    reads = _synthetic_reads(count, length)
+    payload = sum(len(seq_id) + 2 * length for seq_id, _, _ in reads) / count
+
+    def build_records(quality_as_list=False):
+        return [
+            SequenceRecord(
+                seq_id.decode("ascii"),
+                sequence.decode("ascii"),
+                list(quality) if quality_as_list else bytes(quality),
+            )
+            for seq_id, sequence, quality in reads
+        ]
+
+    def build_batch():
+        return SequenceRecordBatch(
+            [seq_id.decode("ascii") for seq_id, _, _ in reads],
+            b"".join(sequence for _, sequence, _ in reads),
+            b"".join(quality for _, _, quality in reads),
+            array("Q", accumulate((length for _ in reads), initial=0)),
+        )
+
+    print(f"{count:,} ридов по {length} bp, данные: {payload:.0f} байт на рид")
+    passed = True
+    for name, build in (
+        ("records", build_records),
+        ("records (quality: list[int])", lambda: build_records(quality_as_list=True)),
+        ("batch", build_batch),
+    ):
+        used, elapsed = _measure(build)
+        per_record = used / count
+        line = f"  {name:<30}{per_record:8.0f} байт/рид{per_record - payload:+8.0f}  {elapsed:6.2f} с"
+        target = RECORD_OVERHEAD_TARGETS.get(name)
+        if target is not None:
+            ok = per_record - payload <= target
+            passed &= ok
+            line += f"  (цель: +{target}, {'OK' if ok else 'ПРЕВЫШЕНО'})"
+        print(line)
+    return passed
+
+
+_VCF_HEADER = """##fileformat=VCFv4.2
+##INFO=<ID=DP,Number=1,Type=Integer,Description="Total Depth">
+##INFO=<ID=AF,Number=A,Type=Float,Description="Allele Frequency">
+##INFO=<ID=AC,Number=A,Type=Integer,Description="Allele Count">
+##INFO=<ID=DB,Number=0,Type=Flag,Description="dbSNP membership">
+##INFO=<ID=ANN,Number=.,Type=String,Description="Functional annotations">
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tS1\tS2
+"""
+
+
+def _write_vcf(path: Path, count: int, seed: int = 0):
+    """
+    Записывает синтетический VCF: каждый пятый вариант мультиаллельный, у всех — несколько ключей INFO.
+
+    Args:
+        path (Path): Путь к файлу (.gz — сжатый).
+        count (int): Число вариантов.
+        seed (int, optional): Зерно генератора.
+    """
+    rng = random.Random(seed)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt", encoding="utf-8") as file:
+        file.write(_VCF_HEADER)
+        position = 0
+        lines = []
+        for i in range(count):
+            position += rng.randint(1, 200)
+            alts = "T,G" if i % 5 == 0 else "T"
+            frequencies = ",".join(f"{rng.random():.3f}" for _ in alts.split(","))
+            lines.append(
+                f"chr1\t{position}\t.\tA\t{alts}\t{rng.randint(10, 99)}\tPASS\t"
+                f"DP={rng.randint(5, 200)};AF={frequencies};AC={alts.count(',') + 1}"
+                f"{';DB' if i % 3 == 0 else ''};ANN=T|missense_variant|MODERATE|GENE{i % 500}\t"
+                f"GT:DP\t0/1:{rng.randint(5, 99)}\t0/0:{rng.randint(5, 99)}\n"
+            )
+            if len(lines) == 10000:
+                file.writelines(lines)
+                lines.clear()
+        file.writelines(lines)
+
+
+def bench_vcf(count: int) -> bool:
+    """
+    Замеряет скорость чтения VCF: без обращения к INFO, с чтением одного ключа и с разбором всего INFO.
+
+    Args:
+        count (int): Число вариантов в синтетическом файле.
+
+    Returns:
+        bool: Всегда True (целевого значения нет, замер носит справочный характер).
+    """
+    modes = {
+        "без INFO": lambda record: None,
+        "INFO['DP']": lambda record: record.info["DP"],
+        "весь INFO": lambda record: dict(record.info),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("variants.vcf", "variants.vcf.gz"):
+            path = Path(directory) / name
+            _write_vcf(path, count)
+            print(f"{name}: {count:,} вариантов, {path.stat().st_size / 1024 ** 2:.1f} МБ")
+            for mode, access in modes.items():
+                started = time.perf_counter()
+                with VcfReader(path) as reader:
+                    for record in reader.read():
+                        access(record)
+                elapsed = time.perf_counter() - started
+                print(f"  {mode:<30}{count / elapsed:12,.0f} вариантов/с  {elapsed:6.2f} с")
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности модулей чтения")
+    commands = parser.add_subparsers(dest="command", required=True)
+    records = commands.add_parser("records", help="память на рид: SequenceRecord и SequenceRecordBatch")
+    records.add_argument("-n", "--count", type=int, default=1_000_000, help="число ридов")
+    records.add_argument("-l", "--length", type=int, default=100, help="длина рида")
+    vcf = commands.add_parser("vcf", help="скорость чтения VCF и .vcf.gz (VcfReader)")
+    vcf.add_argument("-n", "--count", type=int, default=1_000_000, help="число вариантов")
+    args = parser.parse_args(argv)
+
+    if args.command == "records":
+        passed = bench_records(args.count, args.length)
+    else:
+        passed = bench_vcf(args.count)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
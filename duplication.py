@@ -0,0 +1,476 @@
+import numpy as np
+
+from record import SequenceRecordBatch
+
+# Как в FastQC: риды длиннее TRUNCATE_ABOVE сравниваются по первым TRUNCATE_TO основаниям
+TRUNCATE_ABOVE = 75
+TRUNCATE_TO = 50
+
+# Уровни дублирования (нижние границы групп), как на графике FastQC
+DUPLICATION_LEVELS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 50, 100, 500, 1000, 5000, 10000)
+
+# Случайное 64-битное значение для каждого байта и основание полиномиального хеша
+_BYTE_HASHES = np.random.default_rng(0x5EED).integers(0, 2 ** 63, 256, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+_hash_powers = np.ones(1, dtype=np.uint64)
+
+
+def _powers(count: int) -> np.ndarray:
+    """
+    Возвращает степени основания хеша 0..count-1 (по модулю 2**64), расширяя кэш при необходимости.
+
+    Args:
+        count (int): Число степеней.
+
+    Returns:
+        np.ndarray: Массив uint64 длиной не меньше count.
+    """
+    global _hash_powers
+    if len(_hash_powers) < count:
+        powers = np.full(count, _HASH_BASE, dtype=np.uint64)
+        powers[0] = 1
+        _hash_powers = np.cumprod(powers, dtype=np.uint64)
+    return _hash_powers
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """
+    Перемешивает биты 64-битных значений (финализатор splitmix64).
+
+    Args:
+        values (np.ndarray): Массив uint64.
+
+    Returns:
+        np.ndarray: Перемешанные значения.
+    """
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def sequence_hashes(batch: SequenceRecordBatch) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Вычисляет 64-битный хеш последовательности каждого рида пакета без цикла Python по ридам.
+
+    Хеш — полином по модулю 2**64 от случайных значений байтов с последующим
+    перемешиванием; он детерминирован (не зависит от PYTHONHASHSEED), поэтому
+    результаты разных процессов можно объединять. Длинные риды усекаются так же,
+    как в FastQC.
+
+    Args:
+        batch (SequenceRecordBatch): Пакет ридов.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Хеши (uint64) и длины учтённых префиксов ридов.
+    """
+    offsets = np.frombuffer(batch.offsets, dtype=np.uint64).astype(np.intp)
+    lengths = np.diff(offsets)
+    used = np.where(lengths > TRUNCATE_ABOVE, TRUNCATE_TO, lengths)
+    sequence = np.frombuffer(batch.sequences, dtype=np.uint8)
+    if (used == lengths).all():
+        read_used = np.repeat(used, lengths)
+        kept = sequence
+        positions = np.arange(len(sequence)) - np.repeat(offsets[:-1], lengths)
+    else:
+        read_used = np.repeat(used, lengths)
+        positions = np.arange(len(sequence)) - np.repeat(offsets[:-1], lengths)
+        mask = positions < read_used
+        kept, positions, read_used = sequence[mask], positions[mask], read_used[mask]
+    powers = _powers(int(used.max()))
+    terms = _BYTE_HASHES[kept] * powers[read_used - 1 - positions]
+    starts = np.concatenate(([0], np.cumsum(used[:-1])))
+    hashes = np.add.reduceat(terms, starts) ^ used.astype(np.uint64)
+    return _mix(hashes), used
+
+
+class HyperLogLog:
+    """
+    Оценка числа различных элементов (HyperLogLog) в фиксированной памяти.
+
+    Использует 2**precision однобайтовых регистров; относительная ошибка
+    около 1.04 / sqrt(2**precision) (0.8 % при precision = 14).
+
+    Attributes:
+        precision (int): Число бит хеша, выбирающих регистр.
+        registers (np.ndarray): Регистры (uint8).
+    """
+
+    def __init__(self, precision: int = 14):
+        """
+        Args:
+            precision (int, optional): Точность от 4 до 18.
+
+        Raises:
+            ValueError: Если precision вне диапазона.
+        """
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray):
+        """
+        Добавляет элементы по их 64-битным хешам.
+
+        Args:
+            hashes (np.ndarray): Хеши (uint64).
+        """
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = (hashes & np.uint64((1 << bits) - 1)).astype(np.float64)
+        # Номер старшего единичного бита остатка: rank = bits - bit_length + 1
+        rank = (bits + 1 - np.frexp(rest)[1]).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        """
+        Объединяет с оценкой другого множества той же точности.
+
+        Args:
+            other (HyperLogLog): Другая оценка.
+        """
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        """
+        Оценивает число различных элементов.
+
+        Returns:
+            float: Оценка мощности множества.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)
+        return float(raw)
+
+
+class HeavyHitters:
+    """
+    Частые элементы потока в фиксированной памяти (алгоритм Мисры — Гриса).
+
+    Хранит не больше capacity счётчиков. Счётчик элемента занижен не более чем
+    на error (сумма всех вычтенных порогов), что не превышает N / (capacity + 1);
+    любой элемент с частотой больше этой величины гарантированно присутствует.
+    Сводки разных частей потока объединяются через merge() с той же гарантией.
+
+    Attributes:
+        capacity (int): Максимальное число счётчиков.
+        keys (np.ndarray): Хеши отслеживаемых элементов (uint64, по возрастанию).
+        counts (np.ndarray): Заниженные счётчики.
+        sequences (dict[int, bytes]): Последовательность для каждого хеша.
+        error (int): Верхняя граница занижения счётчиков.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Args:
+            capacity (int, optional): Максимальное число счётчиков.
+        """
+        self.capacity = capacity
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sequences: dict[int, bytes] = {}
+        self.error = 0
+
+    def add(self, hashes: np.ndarray, counts: np.ndarray, sequences: dict[int, bytes] | None = None, lookup=None):
+        """
+        Добавляет элементы с кратностями.
+
+        Args:
+            hashes (np.ndarray): Различные хеши (uint64).
+            counts (np.ndarray): Кратность каждого хеша.
+            sequences (dict[int, bytes] | None, optional): Последовательности для хешей.
+            lookup (Callable[[int], bytes] | None, optional): Возвращает последовательность
+                по номеру в hashes для элементов, которых нет в sequences.
+        """
+        keys = np.concatenate((self.keys, hashes))
+        merged, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate((self.counts, counts))).astype(np.int64)
+        if len(merged) > self.capacity:
+            threshold = np.partition(totals, len(totals) - self.capacity - 1)[len(totals) - self.capacity - 1]
+            totals -= threshold
+            self.error += int(threshold)
+            keep = totals > 0
+            merged, totals = merged[keep], totals[keep]
+        known = self.sequences
+        if sequences is not None:
+            known = {**known, **sequences}
+        positions = np.searchsorted(hashes, merged) if lookup is not None else None
+        result = {}
+        for i, key in enumerate(merged.tolist()):
+            sequence = known.get(key)
+            if sequence is None and lookup is not None:
+                sequence = lookup(int(positions[i]))
+            result[key] = sequence
+        self.keys, self.counts, self.sequences = merged, totals, result
+
+    def merge(self, other: "HeavyHitters"):
+        """
+        Объединяет со сводкой другой части потока.
+
+        Args:
+            other (HeavyHitters): Другая сводка.
+        """
+        self.error += other.error
+        self.add(other.keys, other.counts, other.sequences)
+
+    def top(self, limit: int) -> list[tuple[bytes, int]]:
+        """
+        Возвращает самые частые элементы.
+
+        Args:
+            limit (int): Максимальное число элементов.
+
+        Returns:
+            list[tuple[bytes, int]]: Пары (последовательность, заниженный счётчик) по убыванию.
+        """
+        order = np.argsort(self.counts, kind="stable")[::-1][:limit]
+        return [(self.sequences[int(self.keys[i])], int(self.counts[i])) for i in order]
+
+
+class DuplicationStats:
+    """
+    Потоковая оценка дублирования ридов и сверхпредставленных последовательностей
+    в ограниченной памяти (модуль в духе FastQC).
+
+    Объём памяти не зависит от числа ридов и складывается из трёх частей:
+
+    * HyperLogLog оценивает число различных последовательностей во всём файле,
+      откуда берётся доля ридов, остающихся после дедупликации;
+    * точная таблица счётчиков для первых exact_limit различных последовательностей
+      (как в FastQC) даёт распределение уровней дублирования;
+    * сводка Мисры — Гриса (top_k счётчиков) находит сверхпредставленные последовательности.
+
+    Последовательности сравниваются по 64-битному хешу (sequence_hashes()).
+
+    Attributes:
+        total (int): Число учтённых ридов.
+        hll (HyperLogLog): Оценка числа различных последовательностей.
+        exact_limit (int): Максимальный размер точной таблицы.
+        table_keys (np.ndarray): Хеши точной таблицы (uint64, по возрастанию).
+        table_counts (np.ndarray): Счётчики точной таблицы.
+        heavy (HeavyHitters): Сводка частых последовательностей.
+    """
+
+    DEFAULT_EXACT_LIMIT = 100_000
+    DEFAULT_TOP_K = 1000
+    # Порог сверхпредставленности, как в FastQC: 0.1 % ридов
+    OVERREPRESENTED_FRACTION = 0.001
+
+    def __init__(self, exact_limit: int = DEFAULT_EXACT_LIMIT, top_k: int = DEFAULT_TOP_K, precision: int = 14):
+        """
+        Args:
+            exact_limit (int, optional): Максимальное число различных последовательностей
+                в точной таблице.
+            top_k (int, optional): Число счётчиков сводки частых последовательностей.
+            precision (int, optional): Точность HyperLogLog.
+        """
+        self.total = 0
+        self.hll = HyperLogLog(precision)
+        self.exact_limit = exact_limit
+        self.table_keys = np.zeros(0, dtype=np.uint64)
+        self.table_counts = np.zeros(0, dtype=np.int64)
+        self.heavy = HeavyHitters(top_k)
+
+    def update(self, batch: SequenceRecordBatch):
+        """
+        Добавляет пакет ридов.
+
+        Args:
+            batch (SequenceRecordBatch): Пакет ридов.
+        """
+        if not len(batch):
+            return
+        hashes, used = sequence_hashes(batch)
+        self.total += len(batch)
+        self.hll.add(hashes)
+        unique, first, counts = np.unique(hashes, return_index=True, return_counts=True)
+        self._add_to_table(unique, counts, first)
+
+        offsets = batch.offsets
+        sequences = batch.sequences
+
+        def lookup(position):
+            read = int(first[position])
+            start = offsets[read]
+            return sequences[start:start + int(used[read])]
+
+        self.heavy.add(unique, counts, lookup=lookup)
+
+    def _add_to_table(self, unique: np.ndarray, counts: np.ndarray, order: np.ndarray):
+        """
+        Обновляет точную таблицу: известные хеши увеличиваются, новые добавляются, пока есть место.
+
+        Args:
+            unique (np.ndarray): Различные хеши (по возрастанию).
+            counts (np.ndarray): Их кратности.
+            order (np.ndarray): Порядок первого появления (новые хеши добавляются в этом порядке).
+        """
+        positions = np.minimum(np.searchsorted(self.table_keys, unique), max(len(self.table_keys) - 1, 0))
+        found = (
+            self.table_keys[positions] == unique
+            if len(self.table_keys)
+            else np.zeros(len(unique), dtype=bool)
+        )
+        np.add.at(self.table_counts, positions[found], counts[found])
+        room = self.exact_limit - len(self.table_keys)
+        if room <= 0 or found.all():
+            return
+        new = ~found
+        chosen = np.argsort(order[new], kind="stable")[:room]
+        keys = np.concatenate((self.table_keys, unique[new][chosen]))
+        values = np.concatenate((self.table_counts, counts[new][chosen]))
+        sort = np.argsort(keys, kind="stable")
+        self.table_keys, self.table_counts = keys[sort], values[sort]
+
+    def merge(self, other: "DuplicationStats") -> "DuplicationStats":
+        """
+        Добавляет статистику другой части файла.
+
+        Точная таблица объединения — это известные хеши обеих частей, пока хватает места;
+        она остаётся выборкой различных последовательностей, а не строго первыми из файла.
+
+        Args:
+            other (DuplicationStats): Статистика другой части.
+
+        Returns:
+            DuplicationStats: Текущий объект.
+        """
+        self.total += other.total
+        self.hll.merge(other.hll)
+        self._add_to_table(other.table_keys, other.table_counts, np.arange(len(other.table_keys)))
+        self.heavy.merge(other.heavy)
+        return self
+
+    def distinct_estimate(self) -> float:
+        """
+        Оценивает число различных последовательностей во всех учтённых ридах.
+
+        Returns:
+            float: Оценка (не больше числа ридов).
+        """
+        return min(self.hll.estimate(), float(self.total))
+
+    def duplication_levels(self) -> list[dict]:
+        """
+        Распределение уровней дублирования по точной таблице.
+
+        Returns:
+            list[dict]: Для каждой группы DUPLICATION_LEVELS: "level" (подпись),
+                "distinct_percent" (доля различных последовательностей) и
+                "reads_percent" (доля ридов таблицы).
+        """
+        counts = self.table_counts
+        bounds = np.array(DUPLICATION_LEVELS[1:])
+        groups = np.searchsorted(bounds, counts, side="right")
+        distinct = np.bincount(groups, minlength=len(DUPLICATION_LEVELS))
+        reads = np.bincount(groups, weights=counts, minlength=len(DUPLICATION_LEVELS))
+        distinct_total = max(int(distinct.sum()), 1)
+        reads_total = max(float(reads.sum()), 1.0)
+        levels = []
+        for i, low in enumerate(DUPLICATION_LEVELS):
+            label = str(low) if low < 10 else f">{low}" if low < 1000 else f">{low // 1000}k"
+            levels.append({
+                "level": label,
+                "distinct_percent": float(distinct[i] / distinct_total * 100),
+                "reads_percent": float(reads[i] / reads_total * 100),
+            })
+        return levels
+
+    def overrepresented(self, fraction: float = OVERREPRESENTED_FRACTION, limit: int = 20) -> list[dict]:
+        """
+        Возвращает последовательности, доля которых превышает fraction.
+
+        Args:
+            fraction (float, optional): Минимальная доля ридов.
+            limit (int, optional): Максимальное число последовательностей.
+
+        Returns:
+            list[dict]: "sequence", "count" (нижняя оценка), "count_max" (верхняя оценка)
+                и "percent" (по нижней оценке), по убыванию частоты.
+        """
+        if not self.total:
+            return []
+        result = []
+        for sequence, count in self.heavy.top(limit):
+            if count + self.heavy.error < fraction * self.total:
+                break
+            result.append({
+                "sequence": sequence.decode("ascii"),
+                "count": count,
+                "count_max": count + self.heavy.error,
+                "percent": count / self.total * 100,
+            })
+        return result
+
+    def to_dict(self) -> dict:
+        """
+        Формирует словарь результатов.
+
+        Returns:
+            dict: "total", "distinct" (оценка числа различных последовательностей),
+                "deduplicated_percent" (доля ридов после дедупликации),
+                "levels" (см. duplication_levels()) и "overrepresented" (см. overrepresented()).
+        """
+        distinct = self.distinct_estimate()
+        return {
+            "total": self.total,
+            "distinct": distinct,
+            "deduplicated_percent": distinct / self.total * 100 if self.total else 0,
+            "levels": self.duplication_levels(),
+            "overrepresented": self.overrepresented(),
+        }
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Возвращает состояние в виде массивов для сохранения в .npz (см. FastqStats.save()).
+
+        Returns:
+            dict[str, np.ndarray]: Именованные массивы.
+        """
+        heavy_sequences = [self.heavy.sequences[int(key)] for key in self.heavy.keys]
+        return {
+            "dup_totals": np.array([self.total, self.exact_limit, self.heavy.capacity, self.heavy.error], dtype=np.int64),
+            "dup_registers": self.hll.registers,
+            "dup_table_keys": self.table_keys,
+            "dup_table_counts": self.table_counts,
+            "dup_heavy_keys": self.heavy.keys,
+            "dup_heavy_counts": self.heavy.counts,
+            "dup_heavy_lengths": np.array(list(map(len, heavy_sequences)), dtype=np.int64),
+            "dup_heavy_sequences": np.frombuffer(b"".join(heavy_sequences), dtype=np.uint8),
+        }
+
+    @classmethod
+    def from_arrays(cls, data) -> "DuplicationStats":
+        """
+        Восстанавливает состояние, сохранённое через to_arrays().
+
+        Args:
+            data (Mapping[str, np.ndarray]): Массивы (например, открытый архив .npz).
+
+        Returns:
+            DuplicationStats: Восстановленная статистика.
+
+        Raises:
+            KeyError: Если массивов нет (архив сохранён старой версией).
+        """
+        total, exact_limit, capacity, error = (int(v) for v in data["dup_totals"])
+        registers = data["dup_registers"]
+        stats = cls(exact_limit, capacity, int(np.log2(len(registers))))
+        stats.total = total
+        stats.hll.registers = registers.copy()
+        stats.table_keys = data["dup_table_keys"]
+        stats.table_counts = data["dup_table_counts"]
+        stats.heavy.keys = data["dup_heavy_keys"]
+        stats.heavy.counts = data["dup_heavy_counts"]
+        stats.heavy.error = error
+        sequences = data["dup_heavy_sequences"].tobytes()
+        bounds = np.concatenate(([0], np.cumsum(data["dup_heavy_lengths"]))).tolist()
+        stats.heavy.sequences = {
+            int(key): sequences[start:end]
+            for key, start, end in zip(stats.heavy.keys, bounds, bounds[1:])
+        }
+        return stats
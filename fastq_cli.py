@@ -0,0 +1,115 @@
+import argparse
+import sys
+
+from batch_analysis import analyze_files, collect_fastq_files, write_json, write_tsv
+from results_cache import ResultsCache
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Создаёт парсер аргументов командной строки.
+
+    Returns:
+        argparse.ArgumentParser: Парсер аргументов.
+    """
+    parser = argparse.ArgumentParser(
+        description="Пакетный анализ FASTQ-файлов без графического интерфейса.",
+    )
+    parser.add_argument("paths", nargs="+", help="FASTQ-файлы или каталоги с ними")
+    parser.add_argument("-r", "--recursive", action="store_true", help="искать файлы во вложенных каталогах")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="число одновременно анализируемых файлов")
+    parser.add_argument("--json", metavar="FILE", help="записать отчёт JSON ('-' — stdout)")
+    parser.add_argument("--tsv", metavar="FILE", help="записать сводную таблицу TSV ('-' — stdout)")
+    parser.add_argument("--details", action="store_true", help="добавить в JSON статистику по позициям")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш результатов")
+    parser.add_argument("--tiles", action="store_true", help="статистика качества по тайлам Illumina")
+
+    sampling = parser.add_mutually_exclusive_group()
+    sampling.add_argument("--head", type=int, metavar="N", help="анализировать только первые N ридов")
+    sampling.add_argument("--rate", type=float, metavar="P", help="случайная выборка с долей P")
+    sampling.add_argument("--reservoir", type=int, metavar="N", help="ровно N случайных ридов")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора выборки")
+    parser.add_argument("--seek", action="store_true", help="выборка переходами по файлу (для .gz — обычным чтением)")
+    return parser
+
+
+def sampling_options(args: argparse.Namespace) -> dict | None:
+    """
+    Преобразует аргументы выборки в параметры analyze_sample().
+
+    Args:
+        args (argparse.Namespace): Разобранные аргументы.
+
+    Returns:
+        dict | None: Параметры выборки или None для полного анализа.
+    """
+    if args.head is not None:
+        return {"mode": "head", "n": args.head}
+    if args.rate is not None:
+        return {"mode": "rate", "rate": args.rate, "seed": args.seed, "seek": args.seek}
+    if args.reservoir is not None:
+        return {"mode": "reservoir", "n": args.reservoir, "seed": args.seed, "seek": args.seek}
+    return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Точка входа командной строки.
+
+    Без --json и --tsv сводная таблица TSV выводится в stdout.
+    Ход работы печатается в stderr.
+
+    Args:
+        argv (list[str] | None, optional): Аргументы (по умолчанию — sys.argv[1:]).
+
+    Returns:
+        int: Код возврата: 0 — все файлы обработаны, 1 — были ошибки, 2 — неверные аргументы.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        files = collect_fastq_files(args.paths, recursive=args.recursive)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if not files:
+        parser.error("no FASTQ files found")
+
+    details = {} if args.details else None
+    done = 0
+
+    def report(row, stats):
+        nonlocal done
+        done += 1
+        if details is not None and stats is not None:
+            details[row["file"]] = stats.to_dict()
+        message = row["error"] if row["status"] == "error" else f"{row['total_seq']:,} reads"
+        print(f"[{done}/{len(files)}] {row['file']}: {message}", file=sys.stderr)
+
+    rows = analyze_files(
+        files,
+        jobs=args.jobs,
+        cache=None if args.no_cache else ResultsCache(),
+        sampling=sampling_options(args),
+        on_result=report,
+        tiles=args.tiles,
+    )
+    # Отчёт в порядке входных файлов, а не завершения
+    order = {str(path): i for i, path in enumerate(files)}
+    rows.sort(key=lambda row: order[row["file"]])
+
+    if args.tsv is None and args.json is None:
+        args.tsv = "-"
+    for path, write in ((args.tsv, write_tsv), (args.json, write_json)):
+        if path is None:
+            continue
+        extra = (details,) if write is write_json else ()
+        if path == "-":
+            write(rows, sys.stdout, *extra)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                write(rows, f, *extra)
+    return 1 if any(row["status"] == "error" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import os
 import threading
-import matplotlib.pyplot as plt
+import time
+import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
 from pathlib import Path
 
-from fastq_reader import FastqReader
+from analysis_job import AnalysisJob, CancellationToken
+from batch_analysis import analyze_files, collect_fastq_files
+from fastq_index import FastqIndex
+from fastq_stats import BASES, MAX_PHRED
+from plot_decimation import group_mean, histogram_from_counts, min_max_decimate
+from results_cache import ResultsCache
 
 try:
     from tkinterdnd2 import DND_FILES, TkinterDnD
@@ -26,6 +34,115 @@ COLORS = {
 }
 
 
+PROGRESS_INTERVAL = 2.0
+
+# Максимальное число столбцов (групп позиций) тепловой карты качества по тайлам
+HEATMAP_MAX_COLUMNS = 200
+
+# Число самых частых k-меров на графике
+TOP_KMERS = 20
+
+# Столбцы таблицы пакетного анализа: ключ строки сводки -> (заголовок, ширина, формат)
+BATCH_COLUMNS = {
+    "name": ("Файл", 260, "{}"),
+    "status": ("Статус", 70, "{}"),
+    "total_seq": ("Ридов", 100, "{:,}"),
+    "avg_len": ("Ср. длина", 80, "{:.1f}"),
+    "gc_content": ("GC, %", 70, "{:.2f}"),
+    "mean_quality": ("Ср. качество", 90, "{:.2f}"),
+    "seconds": ("Время, с", 70, "{:.1f}"),
+}
+
+# Режимы выборки: подпись в интерфейсе -> режим analyze_sample() (None — весь файл)
+SAMPLING_CHOICES = {
+    "Весь файл": None,
+    "Первые N ридов": "head",
+    "Случайная доля p": "rate",
+    "Ровно N случайных ридов": "reservoir",
+}
+
+
+class PlotTab:
+    """
+    Вкладка с графиком, который строится при первом показе вкладки.
+
+    Фигура и холст создаются один раз; новые данные только помечают вкладку
+    устаревшей, а перерисовка выполняется, когда вкладка видна. Функция
+    draw(tab, stats) при первом вызове создаёт элементы графика (tab.artists),
+    а при последующих — обновляет их данные, не пересоздавая фигуру.
+
+    Attributes:
+        frame (tk.Widget): Контейнер графика.
+        figure (Figure | None): Фигура (None до первого показа).
+        artists (dict): Элементы графика, созданные функцией draw.
+    """
+
+    def __init__(self, frame, draw, figsize=(5, 4)):
+        """
+        Создаёт вкладку с надписью-заглушкой; фигура создаётся при первом показе.
+
+        Args:
+            frame (tk.Widget): Контейнер графика.
+            draw (Callable): Функция draw(tab, stats), строящая или обновляющая график.
+            figsize (tuple[float, float], optional): Размер фигуры в дюймах.
+        """
+        self.frame = frame
+        self.draw = draw
+        self.figsize = figsize
+        self.figure = None
+        self.canvas = None
+        self.toolbar = None
+        self.artists = {}
+        self.stats = None
+        self.dirty = False
+        self.placeholder = tk.Label(
+            frame, text="Загрузите файл для построения графика", bg=COLORS["bg"]
+        )
+        self.placeholder.pack(expand=True)
+
+    def update(self, stats):
+        """Запоминает новые результаты; график перестроится при показе вкладки."""
+        self.stats = stats
+        self.dirty = True
+
+    def clear(self):
+        """Сбрасывает результаты; при показе вкладки вместо графика появится заглушка."""
+        self.update(None)
+
+    def render(self):
+        """Перерисовывает график, если данные изменились с прошлого показа."""
+        if not self.dirty:
+            return
+        self.dirty = False
+        if self.stats is None:
+            if self.canvas is not None:
+                self.toolbar.pack_forget()
+                self.canvas.get_tk_widget().pack_forget()
+            self.placeholder.pack(expand=True)
+            return
+
+        if self.figure is None:
+            self.figure = Figure(figsize=self.figsize, dpi=100)
+            self.canvas = FigureCanvasTkAgg(self.figure, master=self.frame)
+            self.toolbar = NavigationToolbar2Tk(self.canvas, self.frame, pack_toolbar=False)
+        if not self.canvas.get_tk_widget().winfo_manager():
+            self.placeholder.pack_forget()
+            self.toolbar.pack(side="bottom", fill="x")
+            self.canvas.get_tk_widget().pack(expand=True, fill="both")
+        self.draw(self, self.stats)
+        self.canvas.draw_idle()
+
+    def close(self):
+        """Освобождает фигуру и виджеты холста."""
+        if self.figure is not None:
+            self.figure.clear()
+            self.toolbar.destroy()
+            self.canvas.get_tk_widget().destroy()
+        self.figure = self.canvas = self.toolbar = None
+        self.artists.clear()
+        self.stats = None
+
+
 class FastqAnalyzerApp(BaseClass):
     def __init__(self):
         super().__init__()
@@ -34,10 +151,21 @@ class FastqAnalyzerApp(BaseClass):
         self.configure(bg=COLORS["bg"])
 
         self.current_file = None
+        self.current_job = None
+        self.current_batch = None
+        self.batch_rows = {}
+        self.batch_sort = ("name", False)
         self.is_processing = False
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        self.sampling_var = tk.StringVar(value="Весь файл")
+        self.sample_value_var = tk.StringVar(value="100000")
+        self.sample_seek_var = tk.BooleanVar(value=False)
+        self.tiles_var = tk.BooleanVar(value=False)
+        self.results_cache = ResultsCache()
 
         self._setup_styles()
         self._build_ui()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def _setup_styles(self):
         style = ttk.Style()
@@ -66,7 +194,7 @@ class FastqAnalyzerApp(BaseClass):
 
         self.btn_select = tk.Button(
             file_frame,
-            text="📂 Выбрать файл...",
+            text="📂 Выбрать файлы...",
             command=self._select_file_dialog,
             bg=COLORS["primary"],
             fg="white",
@@ -78,6 +206,20 @@ class FastqAnalyzerApp(BaseClass):
         )
         self.btn_select.pack(side="left")
 
+        self.btn_select_dir = tk.Button(
+            file_frame,
+            text="🗂 Папка...",
+            command=self._select_directory_dialog,
+            bg=COLORS["primary"],
+            fg="white",
+            font=("Segoe UI", 10, "bold"),
+            relief="flat",
+            padx=15,
+            pady=5,
+            cursor="hand2",
+        )
+        self.btn_select_dir.pack(side="left", padx=(10, 0))
+
         self.lbl_filename = tk.Label(
             file_frame,
             text="Файл не выбран",
@@ -87,10 +229,83 @@ class FastqAnalyzerApp(BaseClass):
         )
         self.lbl_filename.pack(side="left", padx=15)
 
+        tk.Label(
+            file_frame,
+            text="Процессов:",
+            font=("Segoe UI", 10),
+            bg=COLORS["secondary"],
+            fg=COLORS["text"],
+        ).pack(side="left")
+        self.spin_workers = ttk.Spinbox(
+            file_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.workers_var,
+            width=4,
+        )
+        self.spin_workers.pack(side="left", padx=5)
+
+        self.btn_cancel = tk.Button(
+            file_frame,
+            text="⏹ Отменить",
+            command=self._cancel_analysis,
+            bg=COLORS["danger"],
+            fg="white",
+            font=("Segoe UI", 10, "bold"),
+            relief="flat",
+            padx=15,
+            pady=5,
+            cursor="hand2",
+            state="disabled",
+        )
+        self.btn_cancel.pack(side="left", padx=10)
+
+        sample_frame = tk.Frame(top_frame, bg=COLORS["secondary"])
+        sample_frame.pack(fill="x", pady=(10, 0))
+
+        tk.Label(
+            sample_frame,
+            text="Выборка:",
+            font=("Segoe UI", 10),
+            bg=COLORS["secondary"],
+            fg=COLORS["text"],
+        ).pack(side="left")
+        ttk.Combobox(
+            sample_frame,
+            textvariable=self.sampling_var,
+            values=list(SAMPLING_CHOICES),
+            state="readonly",
+            width=24,
+        ).pack(side="left", padx=5)
+        tk.Label(
+            sample_frame,
+            text="N / p:",
+            font=("Segoe UI", 10),
+            bg=COLORS["secondary"],
+            fg=COLORS["text"],
+        ).pack(side="left")
+        ttk.Entry(sample_frame, textvariable=self.sample_value_var, width=10).pack(
+            side="left", padx=5
+        )
+        tk.Checkbutton(
+            sample_frame,
+            text="Переходы по файлу",
+            variable=self.sample_seek_var,
+            bg=COLORS["secondary"],
+            fg=COLORS["text"],
+        ).pack(side="left", padx=5)
+        tk.Checkbutton(
+            sample_frame,
+            text="Тайлы Illumina",
+            variable=self.tiles_var,
+            bg=COLORS["secondary"],
+            fg=COLORS["text"],
+        ).pack(side="left", padx=5)
+
         if HAS_DND:
             self.drop_area = tk.Label(
                 top_frame,
-                text="...или перетащите файл сюда",
+                text="...или перетащите файлы или папку сюда",
                 bg="#E1E1E6",
                 fg="#888",
                 relief="groove",
@@ -108,249 +323,697 @@ class FastqAnalyzerApp(BaseClass):
         self.tab_len_dist = ttk.Frame(self.notebook)
         self.tab_quality = ttk.Frame(self.notebook)
         self.tab_content = ttk.Frame(self.notebook)
+        self.tab_duplication = ttk.Frame(self.notebook)
+        self.tab_kmers = ttk.Frame(self.notebook)
+        self.tab_read_quality = ttk.Frame(self.notebook)
+        self.tab_batch = ttk.Frame(self.notebook)
 
         self.notebook.add(self.tab_summary, text="📝 Сводка")
         self.notebook.add(self.tab_len_dist, text="📏 Длины ридов")
         self.notebook.add(self.tab_quality, text="⭐ Качество (Phred)")
+        self.notebook.add(self.tab_read_quality, text="📊 Качество ридов и тайлов")
         self.notebook.add(self.tab_content, text="🧬 Состав (ACGT)")
+        self.notebook.add(self.tab_duplication, text="🔁 Дубликаты")
+        self.notebook.add(self.tab_kmers, text="🔎 K-меры и адаптеры")
+        self.notebook.add(self.tab_batch, text="📋 Пакет файлов")
 
-        for tab in [self.tab_len_dist, self.tab_quality, self.tab_content]:
-            tk.Label(
-                tab, text="Загрузите файл для построения графика", bg=COLORS["bg"]
-            ).pack(expand=True)
+        self.tree_overrepresented = ttk.Treeview(
+            self.tab_duplication, columns=("sequence", "count", "percent"), show="headings", height=6
+        )
+        for key, heading, width in (
+            ("sequence", "Сверхпредставленная последовательность", 520),
+            ("count", "Число ридов", 120),
+            ("percent", "% ридов", 80),
+        ):
+            self.tree_overrepresented.heading(key, text=heading)
+            self.tree_overrepresented.column(key, width=width, anchor="w" if key == "sequence" else "e")
+        self.tree_overrepresented.pack(side="bottom", fill="x")
+        duplication_plot = ttk.Frame(self.tab_duplication)
+        duplication_plot.pack(expand=True, fill="both")
+
+        # Графики строятся при первом показе вкладки; ключ — имя вкладки в notebook
+        self.plot_tabs = {
+            str(tab): PlotTab(frame, draw, figsize)
+            for tab, frame, draw, figsize in (
+                (self.tab_len_dist, self.tab_len_dist, self._draw_length_distribution, (5, 4)),
+                (self.tab_quality, self.tab_quality, self._draw_quality, (5, 4)),
+                (self.tab_read_quality, self.tab_read_quality, self._draw_read_quality, (8, 4)),
+                (self.tab_content, self.tab_content, self._draw_content, (5, 4)),
+                (self.tab_duplication, duplication_plot, self._draw_duplication, (5, 3)),
+                (self.tab_kmers, self.tab_kmers, self._draw_kmers, (8, 4)),
+            )
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         self.txt_summary = tk.Text(
             self.tab_summary, font=("Consolas", 11), padx=10, pady=10, state="disabled"
         )
         self.txt_summary.pack(expand=True, fill="both")
 
+        self.tree_batch = ttk.Treeview(
+            self.tab_batch, columns=list(BATCH_COLUMNS), show="headings", selectmode="browse"
+        )
+        for key, (heading, width, _) in BATCH_COLUMNS.items():
+            self.tree_batch.heading(key, text=heading, command=lambda k=key: self._sort_batch(k))
+            self.tree_batch.column(key, width=width, anchor="w" if key == "name" else "e")
+        scroll_batch = ttk.Scrollbar(self.tab_batch, orient="vertical", command=self.tree_batch.yview)
+        self.tree_batch.configure(yscrollcommand=scroll_batch.set)
+        scroll_batch.pack(side="right", fill="y")
+        self.tree_batch.pack(expand=True, fill="both")
+        self.tree_batch.bind("<Double-1>", self._show_batch_file)
+
         status_frame = tk.Frame(self, bg=COLORS["bg"], height=30)
         status_frame.pack(fill="x", side="bottom")
 
-        self.progress = ttk.Progressbar(status_frame, mode="indeterminate")
+        self.progress = ttk.Progressbar(status_frame, mode="determinate", maximum=100)
         self.progress.pack(fill="x", padx=0, pady=0)
 
+        self.lbl_progress = tk.Label(
+            status_frame, text="", font=("Segoe UI", 9), bg=COLORS["bg"], fg="#666"
+        )
+        self.lbl_progress.pack(anchor="w", padx=10)
+
     def _select_file_dialog(self):
-        file_path = filedialog.askopenfilename(
-            title="Выберите FASTQ файл",
+        file_paths = filedialog.askopenfilenames(
+            title="Выберите FASTQ файлы",
             filetypes=[("FASTQ files", "*.fastq *.fq *.gz"), ("All files", "*.*")],
         )
-        if file_path:
-            self._start_analysis(file_path)
+        self._open_paths(file_paths)
+
+    def _select_directory_dialog(self):
+        directory = filedialog.askdirectory(title="Выберите папку с FASTQ файлами")
+        if directory:
+            self._open_paths([directory])
 
     def _on_drop(self, event):
-        file_path = event.data
-        if file_path.startswith("{") and file_path.endswith("}"):
-            file_path = file_path[1:-1]
-        self._start_analysis(file_path)
+        # tkinterdnd2 передаёт список путей в синтаксисе Tcl ({путь с пробелами} ...)
+        self._open_paths(self.tk.splitlist(event.data))
 
-    def _start_analysis(self, file_path):
-        if self.is_processing:
+    def _open_paths(self, paths):
+        """Один файл анализируется подробно, несколько файлов или папка — пакетом."""
+        if not paths:
             return
+        if len(paths) == 1 and not Path(paths[0]).is_dir():
+            self._start_analysis(paths[0])
+        else:
+            self._start_batch(paths)
 
+    def _start_analysis(self, file_path):
         path_obj = Path(file_path)
         if not path_obj.exists():
             messagebox.showerror("Ошибка", "Файл не существует!")
             return
 
+        try:
+            sampling = self._sampling_options()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", f"Неверные параметры выборки: {e}")
+            return
+
+        # Новый файл отменяет текущий анализ; его прогресс сохраняется в контрольной точке
+        self._cancel_running()
+
         self.current_file = path_obj
         self.lbl_filename.config(text=f"Файл: {path_obj.name}", fg=COLORS["text"])
 
         self.is_processing = True
-        self.btn_select.config(state="disabled")
-        self.progress.start(10)
+        self.btn_cancel.config(state="normal")
+        try:
+            workers = max(1, self.workers_var.get())
+        except tk.TclError:
+            workers = 1
+        self.progress["value"] = 0
+        self.lbl_progress.config(text="")
+        self.started_at = time.monotonic()
         self.txt_summary.config(state="normal")
         self.txt_summary.delete("1.0", tk.END)
-        self.txt_summary.insert(
-            "1.0",
-            "Анализ файла...\nПожалуйста, подождите. Для больших файлов это может занять время.",
-        )
+        message = "Анализ файла...\nПожалуйста, подождите. Для больших файлов это может занять время."
+        index = FastqIndex.load(path_obj)
+        if index is not None:
+            message += f"\n\nРидов в файле (по индексу .fqi): {len(index):,}"
+        self.txt_summary.insert("1.0", message)
         self.txt_summary.config(state="disabled")
 
-        self._clear_tab(self.tab_len_dist)
-        self._clear_tab(self.tab_quality)
-        self._clear_tab(self.tab_content)
-
-        threading.Thread(
-            target=self._worker_analyze, args=(path_obj,), daemon=True
-        ).start()
-
-    def _worker_analyze(self, file_path):
-        """Фоновая задача для парсинга и сбора статистики."""
+        for tab in self.plot_tabs.values():
+            tab.clear()
+        self.tree_overrepresented.delete(*self.tree_overrepresented.get_children())
+        self._on_tab_changed()
+
+        job = AnalysisJob(
+            path_obj,
+            workers=workers,
+            cache=self.results_cache,
+            progress_interval=PROGRESS_INTERVAL,
+            sampling=sampling,
+            tiles=self.tiles_var.get(),
+        )
+        # Обратные вызовы приходят из потока задачи: передаём их в главный поток
+        job.on_progress = lambda *args: self.after(0, self._update_ui_progress, job, *args)
+        job.on_done = lambda stats: self.after(0, self._update_ui_success, job, stats.to_dict())
+        job.on_error = lambda e: self.after(0, self._update_ui_error, job, str(e))
+        job.on_cancel = lambda stats: self.after(0, self._update_ui_cancelled, job)
+        self.current_job = job.start()
+
+    def _sampling_options(self):
+        """Параметры выборки из полей интерфейса (None — анализ всего файла)."""
+        mode = SAMPLING_CHOICES[self.sampling_var.get()]
+        if mode is None:
+            return None
+        value = self.sample_value_var.get().strip()
+        if mode == "rate":
+            rate = float(value)
+            if not 0 < rate <= 1:
+                raise ValueError("доля p должна быть в диапазоне (0, 1]")
+            return {"mode": mode, "rate": rate, "seek": self.sample_seek_var.get()}
+        n = int(value)
+        if n <= 0:
+            raise ValueError("N должно быть положительным")
+        return {"mode": mode, "n": n, "seek": self.sample_seek_var.get()}
+
+    def _start_batch(self, paths):
         try:
-            sequence_lengths = []
-            quality_per_position = {}
-            base_content_per_position = {}
-
-            total_sequences = 0
-            total_length = 0
-            gc_count = 0
-            total_bases_count = 0
-
-            with FastqReader(file_path) as reader:
-                for record in reader.read():
-                    seq = record.sequence
-                    qual = record.quality
-                    seq_len = len(seq)
-
-                    total_sequences += 1
-                    total_length += seq_len
-                    sequence_lengths.append(seq_len)
-
-                    seq_upper = seq.upper()
-                    gc_count += seq_upper.count("G") + seq_upper.count("C")
-                    total_bases_count += seq_len
-
-                    for i, q in enumerate(qual):
-                        if i not in quality_per_position:
-                            quality_per_position[i] = []
-                        quality_per_position[i].append(q)
-
-                    for i, base in enumerate(seq_upper):
-                        if i not in base_content_per_position:
-                            base_content_per_position[i] = {
-                                "A": 0,
-                                "T": 0,
-                                "G": 0,
-                                "C": 0,
-                            }
-                        if base in "ATGC":
-                            base_content_per_position[i][base] += 1
-
-            stats = {
-                "total_seq": total_sequences,
-                "avg_len": total_length / total_sequences if total_sequences else 0,
-                "gc_content": (
-                    (gc_count / total_bases_count * 100) if total_bases_count else 0
-                ),
-                "seq_lens": sequence_lengths,
-                "qual_pos": quality_per_position,
-                "base_pos": base_content_per_position,
-            }
-
-            self.after(0, self._update_ui_success, stats)
-
-        except Exception as e:
-            self.after(0, self._update_ui_error, str(e))
-
-    def _update_ui_error(self, error_msg):
-        self.progress.stop()
+            files = collect_fastq_files(paths)
+            sampling = self._sampling_options()
+        except FileNotFoundError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+        except ValueError as e:
+            messagebox.showerror("Ошибка", f"Неверные параметры выборки: {e}")
+            return
+        if not files:
+            messagebox.showerror("Ошибка", "FASTQ файлы не найдены!")
+            return
+        try:
+            jobs = max(1, self.workers_var.get())
+        except tk.TclError:
+            jobs = 1
+
+        self._cancel_running()
+        token = CancellationToken()
+        self.current_batch = token
+        self.batch_total = len(files)
+        self.batch_rows = {}
+        self.tree_batch.delete(*self.tree_batch.get_children())
+        self.lbl_filename.config(text=f"Файлов: {len(files)}", fg=COLORS["text"])
+        self.is_processing = True
+        self.btn_cancel.config(state="normal")
+        self.progress["value"] = 0
+        self.lbl_progress.config(text=f"0 из {len(files)} файлов")
+        self.started_at = time.monotonic()
+        self.notebook.select(self.tab_batch)
+        tiles = self.tiles_var.get()
+
+        def run():
+            try:
+                analyze_files(
+                    files,
+                    jobs=jobs,
+                    cache=self.results_cache,
+                    sampling=sampling,
+                    on_result=lambda row, stats: self.after(
+                        0, self._add_batch_row, token, row, stats.to_dict() if stats else None
+                    ),
+                    cancel=token,
+                    tiles=tiles,
+                )
+            except Exception as e:
+                self.after(0, self._finish_batch, token, str(e))
+            else:
+                self.after(0, self._finish_batch, token, None)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _add_batch_row(self, token, row, stats):
+        if token is not self.current_batch:
+            return
+        row = dict(row, name=Path(row["file"]).name)
+        item = self.tree_batch.insert("", tk.END, values=self._batch_values(row))
+        self.batch_rows[item] = (row, stats)
+        self._sort_batch(self.batch_sort[0], toggle=False)
+
+        done = len(self.batch_rows)
+        self.progress["value"] = done / self.batch_total * 100
+        self.lbl_progress.config(text=f"{done} из {self.batch_total} файлов")
+
+    def _batch_values(self, row):
+        values = []
+        for key, (_, _, template) in BATCH_COLUMNS.items():
+            value = row.get(key)
+            values.append("" if value is None else template.format(value))
+        return values
+
+    def _sort_batch(self, key, toggle=True):
+        """Сортирует таблицу пакета по столбцу; повторный щелчок меняет направление."""
+        current, descending = self.batch_sort
+        if toggle:
+            descending = not descending if key == current else False
+        self.batch_sort = (key, descending)
+
+        filled = [item for item in self.batch_rows if self.batch_rows[item][0].get(key) is not None]
+        empty = [item for item in self.batch_rows if self.batch_rows[item][0].get(key) is None]
+        filled.sort(key=lambda item: self.batch_rows[item][0][key], reverse=descending)
+        # Пустые значения (файлы с ошибкой) — всегда в конце
+        for position, item in enumerate(filled + empty):
+            self.tree_batch.move(item, "", position)
+
+    def _show_batch_file(self, event):
+        item = self.tree_batch.focus()
+        if item not in self.batch_rows:
+            return
+        row, stats = self.batch_rows[item]
+        if stats is None:
+            messagebox.showerror("Ошибка анализа", f"{row['name']}:\n{row['error']}")
+            return
+        self.current_file = Path(row["file"])
+        self._render_stats(stats)
+        self.notebook.select(self.tab_summary)
+
+    def _finish_batch(self, token, error_msg):
+        if token is not self.current_batch:
+            return
+        self.current_batch = None
+        self.is_processing = False
+        self.btn_cancel.config(state="disabled")
+        if error_msg is not None:
+            self.lbl_progress.config(text="")
+            messagebox.showerror("Ошибка анализа", error_msg)
+            return
+        done = len(self.batch_rows)
+        errors = sum(1 for row, _ in self.batch_rows.values() if row["status"] == "error")
+        text = f"Готово: {done} из {self.batch_total} файлов за {time.monotonic() - self.started_at:.1f} с"
+        if errors:
+            text += f", с ошибками: {errors}"
+        if token.cancelled:
+            text += " (отменено)"
+        self.lbl_progress.config(text=text)
+
+    def _cancel_running(self):
+        """Отменяет текущий анализ файла или пакета, если он идёт."""
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.current_job = None
+        if self.current_batch is not None:
+            self.current_batch.cancel()
+            self.current_batch = None
+
+    def _cancel_analysis(self):
+        if self.current_job is None and self.current_batch is None:
+            return
+        if self.current_job is not None:
+            self.current_job.cancel()
+        if self.current_batch is not None:
+            self.current_batch.cancel()
+        self.btn_cancel.config(state="disabled")
+        self.lbl_progress.config(text="Отмена...")
+
+    def _finish_job(self, job):
+        """Сбрасывает состояние после завершения задачи; False — задача уже не текущая."""
+        if job is not self.current_job:
+            return False
+        self.current_job = None
         self.is_processing = False
-        self.btn_select.config(state="normal")
+        self.btn_cancel.config(state="disabled")
+        return True
+
+    def _update_ui_progress(self, job, stats, bytes_done, bytes_total):
+        if job is not self.current_job or job.cancelled:
+            return
+
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        fraction = min(bytes_done / bytes_total, 1.0) if bytes_total else 0.0
+        throughput = bytes_done / elapsed
+        eta = (bytes_total - bytes_done) / throughput if throughput else 0
+        minutes, seconds = divmod(int(eta), 60)
+
+        self.progress["value"] = fraction * 100
+        self.lbl_progress.config(
+            text=(
+                f"{fraction * 100:.0f}%  ·  {throughput / 1024 ** 2:.1f} МБ/с  ·  "
+                f"осталось ~{minutes:02d}:{seconds:02d}"
+            )
+        )
+        self._render_stats(stats, partial=True)
+
+    def _update_ui_error(self, job, error_msg):
+        if not self._finish_job(job):
+            return
+        self.progress["value"] = 0
+        self.lbl_progress.config(text="")
         messagebox.showerror(
             "Ошибка анализа", f"Не удалось прочитать файл:\n{error_msg}"
         )
 
-    def _update_ui_success(self, stats):
-        self.progress.stop()
-        self.is_processing = False
-        self.btn_select.config(state="normal")
+    def _update_ui_success(self, job, stats):
+        if not self._finish_job(job):
+            return
+        self.progress["value"] = 100
+        text = f"Готово за {time.monotonic() - self.started_at:.1f} с"
+        if job.resumed:
+            text += " (продолжено с контрольной точки)"
+        self.lbl_progress.config(text=text)
 
+        self._render_stats(stats)
+
+    def _update_ui_cancelled(self, job):
+        if not self._finish_job(job):
+            return
+        text = "Анализ отменён."
+        if not str(job.file_path).endswith(".gz"):
+            text += " При повторном запуске он продолжится с места остановки."
+        self.lbl_progress.config(text=text)
+
+    def _render_stats(self, stats, partial=False):
+        """Отображает сводку и графики (partial=True — промежуточные результаты)."""
+        title = "ПРОМЕЖУТОЧНЫЕ РЕЗУЛЬТАТЫ" if partial else "РЕЗУЛЬТАТЫ АНАЛИЗА"
+        if stats["estimated"]:
+            title += " (ОЦЕНКА ПО ВЫБОРКЕ)"
         summary_text = (
-            f"РЕЗУЛЬТАТЫ АНАЛИЗА\n"
-            f"==================\n"
+            f"{title}\n"
+            f"{'=' * len(title)}\n"
             f"Файл: {self.current_file.name}\n\n"
             f"Всего последовательностей: {stats['total_seq']:,}\n"
             f"Средняя длина:             {stats['avg_len']:.2f} bp\n"
+            f"Медианная длина:           {stats['median_len']:.0f} bp\n"
             f"GC состав:                 {stats['gc_content']:.2f} %\n"
+            f"Среднее качество:          {stats['mean_quality']:.2f}\n"
+            f"После дедупликации:        ~{stats['duplication']['deduplicated_percent']:.1f} % ридов\n"
         )
+        if stats["estimated"]:
+            summary_text += self._format_sampling(stats)
         self.txt_summary.config(state="normal")
         self.txt_summary.delete("1.0", tk.END)
         self.txt_summary.insert("1.0", summary_text)
         self.txt_summary.config(state="disabled")
 
-        self._plot_length_distribution(stats["seq_lens"])
-        self._plot_quality(stats["qual_pos"])
-        self._plot_content(stats["base_pos"])
-
-    def _clear_tab(self, tab):
-        for widget in tab.winfo_children():
-            widget.destroy()
-
-    def _embed_matplotlib(self, fig, parent_tab):
-        """Встраивает фигуру Matplotlib в Tkinter Frame."""
-        canvas = FigureCanvasTkAgg(fig, master=parent_tab)
-        canvas.draw()
-
-        toolbar = NavigationToolbar2Tk(canvas, parent_tab)
-        toolbar.update()
-
-        canvas.get_tk_widget().pack(expand=True, fill="both")
-
-    def _plot_length_distribution(self, lengths):
-        fig = plt.Figure(figsize=(5, 4), dpi=100)
-        ax = fig.add_subplot(111)
-
-        if lengths:
-            bins = min(50, len(set(lengths)))
-            ax.hist(lengths, bins=bins, color="skyblue", edgecolor="black", alpha=0.7)
+        # Промежуточные результаты не перерисовывают скрытые вкладки
+        for tab in self.plot_tabs.values():
+            tab.update(stats)
+        self._on_tab_changed()
+
+    def _format_sampling(self, stats):
+        """Описание выборки и 95 % доверительные интервалы для сводки."""
+        sampling = stats["sampling"]
+        if sampling["mode"] == "head":
+            description = f"первые {sampling['n']:,} ридов"
+        elif sampling["mode"] == "rate":
+            description = f"случайная доля {sampling['rate']:g} ридов"
+        else:
+            description = f"{sampling['n']:,} случайных ридов"
+        text = f"\nВыборка: {description}"
+        if sampling["seek"]:
+            text += " (переходы по файлу)"
+        text += "\nВсе значения — оценки; 95 % доверительные интервалы:\n"
+        for label, key, unit in (("GC состав", "gc_ci", " %"), ("Среднее качество", "qual_ci", "")):
+            low, high = stats[key]
+            if low == low:  # не NaN
+                text += f"  {label + ':':<24}{low:.2f} – {high:.2f}{unit}\n"
+        if sampling["mode"] == "head":
+            text += "  (начало файла может быть нерепрезентативно)\n"
+        return text
+
+    def _on_tab_changed(self, event=None):
+        """Рисует график выбранной вкладки, если его данные обновились."""
+        tab = self.plot_tabs.get(self.notebook.select())
+        if tab is not None:
+            tab.render()
+
+    def _on_close(self):
+        """Отменяет анализ и освобождает фигуры перед закрытием окна."""
+        self._cancel_running()
+        for tab in self.plot_tabs.values():
+            tab.close()
+        self.destroy()
+
+    @staticmethod
+    def _set_empty(tab, ax, empty, message="No Data"):
+        """Показывает надпись вместо графика на осях ax, пока данных нет."""
+        label = tab.artists.get(("empty", ax))
+        if label is None:
+            label = tab.artists[("empty", ax)] = ax.text(
+                0.5, 0.5, message, ha="center", va="center", transform=ax.transAxes
+            )
+        label.set_text(message)
+        label.set_visible(empty)
+
+    @staticmethod
+    def _rescale(*axes):
+        for ax in axes:
+            ax.relim()
+            ax.autoscale_view()
+
+    def _draw_length_distribution(self, tab, stats):
+        artists = tab.artists
+        if "bars" not in artists:
+            ax = tab.figure.add_subplot(111)
+            artists["bars"] = ax.stairs(
+                [0], [0, 1], fill=True, color="skyblue", edgecolor="black", alpha=0.7
+            )
             ax.set_title("Sequence Length Distribution")
             ax.set_xlabel("Length (bp)")
             ax.set_ylabel("Count")
             ax.grid(True, linestyle="--", alpha=0.3)
-        else:
-            ax.text(0.5, 0.5, "No Data", ha="center")
-
-        self._embed_matplotlib(fig, self.tab_len_dist)
-
-    def _plot_quality(self, qual_data):
-        fig = plt.Figure(figsize=(5, 4), dpi=100)
-        ax = fig.add_subplot(111)
+        ax = tab.figure.axes[0]
 
-        if qual_data:
-            positions = sorted(qual_data.keys())
-            mean_qualities = [sum(qual_data[p]) / len(qual_data[p]) for p in positions]
-
-            ax.plot(positions, mean_qualities, color="#007AFF", linewidth=2)
+        length_hist = stats["len_hist"]
+        if length_hist:
+            # Гистограмма строится по готовым счётчикам длин, а не по списку ридов
+            heights, edges = histogram_from_counts(list(length_hist.keys()), list(length_hist.values()))
+            artists["bars"].set_data(heights, edges)
+        else:
+            artists["bars"].set_data([0], [0, 1])
+        self._set_empty(tab, ax, not length_hist)
+        self._rescale(ax)
+
+    def _draw_quality(self, tab, stats):
+        artists = tab.artists
+        if "mean" not in artists:
+            ax = tab.figure.add_subplot(111)
+            artists["median"], = ax.plot([], [], color="#FF9500", linewidth=1, label="Median")
+            artists["mean"], = ax.plot([], [], color="#007AFF", linewidth=2, label="Mean")
             ax.axhline(y=20, color="#FF3B30", linestyle="--", alpha=0.5, label="Q20")
             ax.axhline(y=30, color="#34C759", linestyle="--", alpha=0.5, label="Q30")
-
-            ax.set_title("Mean Quality per Position")
+            ax.set_title("Quality per Position")
             ax.set_xlabel("Position (bp)")
             ax.set_ylabel("Phred Score")
-            ax.legend()
             ax.grid(True, linestyle="--", alpha=0.3)
+        ax = tab.figure.axes[0]
+
+        mean_qualities = stats["qual_mean"]
+        empty = not mean_qualities
+        # Полоса Q1–Q3 (PolyCollection) не поддерживает замену данных — пересоздаётся
+        if "band" in artists:
+            artists.pop("band").remove()
+        if not empty:
+            # Длинные риды: позиции объединяются в группы (как в FastQC), значения
+            # групп — средние, взвешенные по числу оснований в позиции
+            coverage = np.sum(list(stats["base_pos"].values()), axis=0)
+            positions, (mean_qualities, q1, median, q3) = group_mean(
+                [mean_qualities, stats["qual_q1"], stats["qual_median"], stats["qual_q3"]],
+                weights=coverage,
+            )
+            artists["band"] = ax.fill_between(
+                positions, q1, q3, color="#007AFF", alpha=0.15, label="Q1–Q3"
+            )
+            artists["median"].set_data(positions, median)
+            artists["mean"].set_data(positions, mean_qualities)
+            ax.legend()
         else:
-            ax.text(0.5, 0.5, "No Data", ha="center")
-
-        self._embed_matplotlib(fig, self.tab_quality)
-
-    def _plot_content(self, base_data):
-        fig = plt.Figure(figsize=(5, 4), dpi=100)
-        ax = fig.add_subplot(111)
-
-        if base_data:
-            positions = sorted(base_data.keys())
-            a, t, g, c = [], [], [], []
-
-            for p in positions:
-                total = sum(base_data[p].values())
-                if total > 0:
-                    a.append(base_data[p]["A"] / total * 100)
-                    t.append(base_data[p]["T"] / total * 100)
-                    g.append(base_data[p]["G"] / total * 100)
-                    c.append(base_data[p]["C"] / total * 100)
-                else:
-                    a.append(0)
-                    t.append(0)
-                    g.append(0)
-                    c.append(0)
-
-            ax.plot(positions, a, label="A", color="green", alpha=0.8)
-            ax.plot(positions, t, label="T", color="red", alpha=0.8)
-            ax.plot(positions, g, label="G", color="black", alpha=0.8)
-            ax.plot(positions, c, label="C", color="blue", alpha=0.8)
-
+            artists["median"].set_data([], [])
+            artists["mean"].set_data([], [])
+        self._set_empty(tab, ax, empty)
+        self._rescale(ax)
+
+    def _draw_content(self, tab, stats):
+        artists = tab.artists
+        if "N" not in artists:
+            ax, ax_n = tab.figure.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios": [3, 1]})
+            for base, color in zip(BASES, ("green", "red", "black", "blue")):
+                artists[base], = ax.plot([], [], label=base, color=color, alpha=0.8)
             ax.set_title("Base Content per Position")
             ax.set_ylabel("%")
-            ax.set_xlabel("Position")
             ax.legend(loc="upper right")
             ax.set_ylim(0, 100)
             ax.grid(True, alpha=0.3)
-        else:
-            ax.text(0.5, 0.5, "No Data", ha="center")
 
-        self._embed_matplotlib(fig, self.tab_content)
+            artists["N"], = ax_n.plot([], [], label="N", color="#FF3B30")
+            ax_n.set_title("N Content per Position")
+            ax_n.set_ylabel("% N")
+            ax_n.set_xlabel("Position")
+            ax_n.grid(True, alpha=0.3)
+            tab.figure.tight_layout()
+        ax, ax_n = tab.figure.axes
+
+        base_data = stats["base_pos"]
+        empty = not base_data["A"]
+        counts = np.array([base_data[base] for base in BASES], dtype=float).reshape(len(BASES), -1)
+        percents = counts / np.maximum(counts.sum(axis=0), 1) * 100
+        # Прореживание с сохранением минимумов и максимумов: всплески не теряются
+        for base, values in zip(BASES, percents):
+            artists[base].set_data(*min_max_decimate(values))
+        n_content = stats["n_content"]
+        artists["N"].set_data(*min_max_decimate(n_content))
+        ax_n.set_ylim(0, max(5, max(n_content, default=0) * 1.1))
+        self._set_empty(tab, ax, empty)
+        ax.relim()
+        ax.autoscale_view(scaley=False)
+
+    def _draw_duplication(self, tab, stats):
+        """График уровней дублирования и таблица сверхпредставленных последовательностей."""
+        artists = tab.artists
+        if "reads" not in artists:
+            ax = tab.figure.add_subplot(111)
+            artists["reads"], = ax.plot([], [], color="#FF3B30", marker="o", label="% of reads")
+            artists["distinct"], = ax.plot(
+                [], [], color="#007AFF", marker="o", label="% of distinct sequences"
+            )
+            ax.set_xlabel("Duplication level")
+            ax.set_ylabel("%")
+            ax.set_ylim(0, 100)
+            ax.legend(loc="upper right")
+            ax.grid(True, alpha=0.3)
+        ax = tab.figure.axes[0]
+
+        duplication = stats["duplication"]
+        levels = duplication["levels"] if duplication["total"] else []
+        positions = list(range(len(levels)))
+        artists["reads"].set_data(positions, [level["reads_percent"] for level in levels])
+        artists["distinct"].set_data(positions, [level["distinct_percent"] for level in levels])
+        ax.set_xticks(positions)
+        ax.set_xticklabels([level["level"] for level in levels])
+        ax.set_title(
+            f"Duplication Levels "
+            f"(~{duplication['deduplicated_percent']:.1f} % remain after deduplication)"
+            if levels else "Duplication Levels"
+        )
+        self._set_empty(tab, ax, not levels)
+        ax.relim()
+        ax.autoscale_view(scaley=False)
+
+        tree = self.tree_overrepresented
+        tree.delete(*tree.get_children())
+        for item in duplication["overrepresented"]:
+            count = f"{item['count']:,}"
+            if item["count_max"] > item["count"]:
+                count += f"–{item['count_max']:,}"
+            tree.insert("", "end", values=(item["sequence"], count, f"{item['percent']:.2f}"))
+        if not duplication["overrepresented"]:
+            tree.insert("", "end", values=("Нет последовательностей с долей больше 0.1 %", "", ""))
+
+    def _draw_kmers(self, tab, stats):
+        """Содержание адаптеров по позициям и самые частые k-меры."""
+        artists = tab.artists
+        kmers = stats["kmers"]
+        if "bars" not in artists:
+            ax_adapters, ax_kmers = tab.figure.subplots(1, 2, gridspec_kw={"width_ratios": [3, 2]})
+            for name in kmers["adapters"]:
+                artists[name], = ax_adapters.plot([], [], label=name, linewidth=1.5)
+            ax_adapters.set_title("Adapter Content")
+            ax_adapters.set_xlabel("Position (bp)")
+            ax_adapters.set_ylabel("% of reads")
+            ax_adapters.set_ylim(0, 100)
+            ax_adapters.legend(loc="upper left", fontsize="small")
+            ax_adapters.grid(True, alpha=0.3)
+
+            # Число столбцов постоянно: меняются только их длины и подписи
+            artists["bars"] = ax_kmers.barh(
+                range(TOP_KMERS), [0] * TOP_KMERS, color="#5856D6", alpha=0.8
+            )
+            ax_kmers.set_yticks(range(TOP_KMERS))
+            ax_kmers.set_xlabel("Count")
+            ax_kmers.grid(True, axis="x", alpha=0.3)
+        ax_adapters, ax_kmers = tab.figure.axes[:2]
+
+        for name, content in kmers["adapters"].items():
+            artists[name].set_data(*min_max_decimate(content))
+        top = kmers["top_kmers"][:TOP_KMERS][::-1]
+        top = [None] * (TOP_KMERS - len(top)) + top
+        for bar, item in zip(artists["bars"], top):
+            bar.set_width(item["count"] if item else 0)
+        ax_kmers.set_yticklabels(
+            [f"{item['kmer']} ×{item['ratio']:.1f}" if item else "" for item in top],
+            fontfamily="monospace", fontsize="small",
+        )
+        ax_kmers.set_title(f"Top {kmers['k']}-mers (obs/exp)")
+        self._set_empty(tab, ax_adapters, not kmers["top_kmers"])
+        ax_adapters.relim()
+        ax_adapters.autoscale_view(scaley=False)
+        ax_kmers.set_xlim(0, max(max((item["count"] for item in top if item), default=0) * 1.05, 1))
+        tab.figure.tight_layout()
+
+    def _draw_read_quality(self, tab, stats):
+        """Распределение среднего качества ридов и тепловая карта качества по тайлам."""
+        artists = tab.artists
+        if "reads" not in artists:
+            ax_reads, ax_tiles = tab.figure.subplots(1, 2)
+            # Столбец на каждое значение Phred: данные меняются, число столбцов — нет
+            artists["reads"] = ax_reads.stairs(
+                np.zeros(MAX_PHRED + 1), np.arange(MAX_PHRED + 2) - 0.5,
+                fill=True, color="#007AFF", alpha=0.8,
+            )
+            ax_reads.set_title("Per Sequence Quality Scores")
+            ax_reads.set_xlabel("Mean Phred Score")
+            ax_reads.set_ylabel("Reads")
+            ax_reads.grid(True, alpha=0.3)
+            ax_tiles.set_title("Quality per Tile (deviation from mean)")
+            ax_tiles.set_xlabel("Position (bp)")
+            ax_tiles.set_ylabel("Tile")
+        ax_reads, ax_tiles = tab.figure.axes[:2]
+
+        read_quality_hist = stats["read_quality_hist"]
+        heights = np.zeros(MAX_PHRED + 1)
+        heights[list(read_quality_hist.keys())] = list(read_quality_hist.values())
+        artists["reads"].set_data(heights)
+        if read_quality_hist:
+            ax_reads.set_xlim(min(read_quality_hist) - 1, max(read_quality_hist) + 1)
+            ax_reads.set_ylim(0, heights.max() * 1.05)
+        self._set_empty(tab, ax_reads, not read_quality_hist)
+
+        tiles = stats["tiles"]
+        has_tiles = bool(tiles and tiles["tiles"])
+        if has_tiles:
+            # Столбцы карты — группы позиций, как на графике качества
+            starts, deviation = group_mean(
+                np.array(tiles["deviation"], dtype=float), max_groups=HEATMAP_MAX_COLUMNS
+            )
+            edges = np.append(starts, len(tiles["deviation"][0]))
+            limit = max(np.nanmax(np.abs(deviation)), 1.0) if np.isfinite(deviation).any() else 1.0
+            grid = (tuple(tiles["tiles"]), tuple(edges.tolist()))
+            mesh = artists.get("mesh")
+            if mesh is not None and artists["grid"] == grid:
+                mesh.set_array(np.ma.masked_invalid(deviation))
+            else:
+                if mesh is not None:
+                    mesh.remove()
+                # Другие тайлы или границы групп — сетка создаётся заново
+                artists["grid"] = grid
+                mesh = artists["mesh"] = ax_tiles.pcolormesh(
+                    edges,
+                    np.arange(len(tiles["tiles"]) + 1),
+                    np.ma.masked_invalid(deviation),
+                    cmap="RdYlBu",
+                )
+                ax_tiles.set_xlim(edges[0], edges[-1])
+                ax_tiles.set_ylim(len(tiles["tiles"]), 0)
+                step = max(1, len(tiles["tiles"]) // 20)
+                ax_tiles.set_yticks(np.arange(0, len(tiles["tiles"]), step) + 0.5)
+                ax_tiles.set_yticklabels(tiles["tiles"][::step], fontsize="small")
+            mesh.set_clim(-limit, limit)
+            if "colorbar" in artists:
+                artists["colorbar"].update_normal(mesh)
+            else:
+                artists["colorbar"] = tab.figure.colorbar(mesh, ax=ax_tiles)
+        elif "mesh" in artists:
+            artists.pop("mesh").remove()
+            del artists["grid"]
+        if has_tiles:
+            ax_tiles.set_axis_on()
+        else:
+            ax_tiles.set_axis_off()
+        message = "Включите «Тайлы Illumina»" if tiles is None else "No tile IDs in read headers"
+        self._set_empty(tab, ax_tiles, not has_tiles, message)
+        if "colorbar" in artists:
+            artists["colorbar"].ax.set_visible(has_tiles)
+        tab.figure.tight_layout()
 
 
 if __name__ == "__main__":
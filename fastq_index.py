@@ -0,0 +1,266 @@
+from array import array
+from pathlib import Path
+import gzip
+import os
+import struct
+import sys
+
+
+class FastqIndex:
+    """
+    Индекс смещений записей FASTQ-файла, сохраняемый рядом с файлом (.fqi).
+
+    Хранит байтовые смещения каждой step-й записи (для .gz — смещения в распакованном
+    потоке), общее число ридов и суммарное число оснований. Индекс привязан
+    к размеру и времени изменения файла и считается устаревшим, если они изменились.
+
+    Формат файла .fqi (little-endian): заголовок HEADER, затем n_offsets значений uint64.
+
+    Attributes:
+        filepath (Path): Путь к индексируемому FASTQ-файлу.
+        file_size (int): Размер FASTQ-файла на момент построения индекса.
+        mtime_ns (int): Время изменения FASTQ-файла на момент построения индекса.
+        step (int): Шаг выборки смещений (каждая step-я запись).
+        read_count (int): Общее число ридов.
+        total_bases (int): Суммарное число оснований.
+        offsets (array): Массив array('Q') смещений записей 0, step, 2 * step, ...
+    """
+
+    MAGIC = b"FQI1"
+    HEADER = struct.Struct("<4sQqIQQQ")
+    SUFFIX = ".fqi"
+    DEFAULT_STEP = 1000
+
+    def __init__(
+        self,
+        filepath: str | Path,
+        file_size: int,
+        mtime_ns: int,
+        step: int,
+        read_count: int,
+        total_bases: int,
+        offsets: array,
+    ):
+        """
+        Инициализирует индекс из готовых значений.
+
+        Args:
+            filepath (str | Path): Путь к FASTQ-файлу.
+            file_size (int): Размер FASTQ-файла.
+            mtime_ns (int): Время изменения FASTQ-файла в наносекундах.
+            step (int): Шаг выборки смещений.
+            read_count (int): Общее число ридов.
+            total_bases (int): Суммарное число оснований.
+            offsets (array): Смещения каждой step-й записи.
+        """
+        self.filepath = Path(filepath)
+        self.file_size = file_size
+        self.mtime_ns = mtime_ns
+        self.step = step
+        self.read_count = read_count
+        self.total_bases = total_bases
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        """
+        Возвращает число ридов в проиндексированном файле.
+
+        Returns:
+            int: Число ридов.
+        """
+        return self.read_count
+
+    @classmethod
+    def index_path(cls, filepath: str | Path) -> Path:
+        """
+        Возвращает путь к файлу индекса для FASTQ-файла.
+
+        Args:
+            filepath (str | Path): Путь к FASTQ-файлу.
+
+        Returns:
+            Path: Путь вида "<файл>.fqi".
+        """
+        return Path(str(filepath) + cls.SUFFIX)
+
+    @classmethod
+    def build(cls, filepath: str | Path, step: int = DEFAULT_STEP) -> "FastqIndex":
+        """
+        Строит индекс за один проход по файлу.
+
+        Границы записей определяются так же, как при чтении FastqReader: по четыре
+        строки на запись, чтение останавливается на пустой строке последовательности
+        или качества и на неполной записи в конце файла. Маркеры '@' и '+' здесь
+        не проверяются — это делает ридер при чтении.
+
+        Args:
+            filepath (str | Path): Путь к FASTQ-файлу (поддерживается .gz).
+            step (int, optional): Сохранять смещение каждой step-й записи.
+
+        Returns:
+            FastqIndex: Построенный индекс.
+
+        Raises:
+            ValueError: Если step неположителен.
+            OSError: Если файл не может быть прочитан.
+        """
+        if step <= 0:
+            raise ValueError(f"step must be positive, got {step}")
+        filepath = Path(filepath)
+        stat = filepath.stat()
+        offsets = array("Q")
+        read_count = 0
+        total_bases = 0
+        position = 0
+        opener = gzip.open if str(filepath).endswith('.gz') else open
+        with opener(filepath, "rb") as f:
+            readline = f.readline
+            while True:
+                header = readline()
+                sequence = readline()
+                plus_line = readline()
+                quality = readline()
+                sequence_length = len(sequence.rstrip(b"\r\n"))
+                if not (header and sequence_length and plus_line and quality.rstrip(b"\r\n")):
+                    break
+                if read_count % step == 0:
+                    offsets.append(position)
+                read_count += 1
+                total_bases += sequence_length
+                position += len(header) + len(sequence) + len(plus_line) + len(quality)
+        return cls(filepath, stat.st_size, stat.st_mtime_ns, step, read_count, total_bases, offsets)
+
+    @classmethod
+    def load(cls, filepath: str | Path) -> "FastqIndex | None":
+        """
+        Загружает индекс из файла .fqi, если он существует и не устарел.
+
+        Args:
+            filepath (str | Path): Путь к FASTQ-файлу (не к индексу).
+
+        Returns:
+            FastqIndex | None: Индекс или None, если индекса нет, он повреждён
+            либо размер или время изменения FASTQ-файла не совпадают.
+        """
+        filepath = Path(filepath)
+        try:
+            stat = filepath.stat()
+            with open(cls.index_path(filepath), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < cls.HEADER.size:
+            return None
+        magic, file_size, mtime_ns, step, read_count, total_bases, n_offsets = (
+            cls.HEADER.unpack_from(data)
+        )
+        if (
+            magic != cls.MAGIC
+            or file_size != stat.st_size
+            or mtime_ns != stat.st_mtime_ns
+            or len(data) != cls.HEADER.size + n_offsets * 8
+        ):
+            return None
+        offsets = array("Q")
+        offsets.frombytes(data[cls.HEADER.size:])
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        return cls(filepath, file_size, mtime_ns, step, read_count, total_bases, offsets)
+
+    @classmethod
+    def load_or_build(cls, filepath: str | Path, step: int = DEFAULT_STEP) -> "FastqIndex":
+        """
+        Загружает актуальный индекс или строит и сохраняет новый.
+
+        Если сохранить индекс не удалось (например, каталог только для чтения),
+        построенный индекс всё равно возвращается.
+
+        Args:
+            filepath (str | Path): Путь к FASTQ-файлу.
+            step (int, optional): Шаг выборки смещений для нового индекса.
+
+        Returns:
+            FastqIndex: Актуальный индекс.
+        """
+        index = cls.load(filepath)
+        if index is None:
+            index = cls.build(filepath, step)
+            try:
+                index.save()
+            except OSError:
+                pass
+        return index
+
+    def save(self):
+        """
+        Сохраняет индекс в файл .fqi рядом с FASTQ-файлом.
+
+        Запись идёт во временный файл, который затем атомарно переименовывается.
+
+        Raises:
+            OSError: Если файл индекса не может быть записан.
+        """
+        offsets = array("Q", self.offsets)
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        path = self.index_path(self.filepath)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(
+                self.HEADER.pack(
+                    self.MAGIC,
+                    self.file_size,
+                    self.mtime_ns,
+                    self.step,
+                    self.read_count,
+                    self.total_bases,
+                    len(offsets),
+                )
+            )
+            f.write(offsets.tobytes())
+        os.replace(tmp_path, path)
+
+    def locate(self, n: int) -> tuple[int, int]:
+        """
+        Находит ближайшую сохранённую точку перед записью n.
+
+        Args:
+            n (int): Номер записи (с нуля).
+
+        Returns:
+            tuple[int, int]: Смещение сохранённой записи и число записей,
+            которые нужно пропустить от неё до записи n.
+
+        Raises:
+            IndexError: Если n вне диапазона [0, read_count].
+        """
+        if not 0 <= n <= self.read_count:
+            raise IndexError(f"record {n} out of range for {self.read_count} reads")
+        if n == self.read_count and n % self.step == 0:
+            # Позиция сразу после последней записи
+            return self.offsets[-1] if self.offsets else 0, self.step if self.offsets else 0
+        return self.offsets[n // self.step], n % self.step
+
+    def split_byte_ranges(self, parts: int) -> list[tuple[int, int]]:
+        """
+        Делит несжатый файл на диапазоны байтов по сохранённым смещениям записей.
+
+        В отличие от FastqReader.split_byte_ranges() не требует поиска границ в файле.
+
+        Args:
+            parts (int): Желаемое число диапазонов.
+
+        Returns:
+            list[tuple[int, int]]: Непересекающиеся диапазоны [start, end).
+
+        Raises:
+            ValueError: Если parts неположительно.
+        """
+        if parts <= 0:
+            raise ValueError(f"parts must be positive, got {parts}")
+        if not self.offsets:
+            return []
+        count = len(self.offsets)
+        bounds = sorted({self.offsets[count * i // parts] for i in range(parts)})
+        bounds.append(self.file_size)
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
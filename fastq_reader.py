@@ -1,8 +1,17 @@
+from array import array
+from itertools import accumulate, islice, repeat
 from pathlib import Path
 from typing import Iterator
 import gzip
+import io
+import math
+import mmap
+import random
 from abstract import SequenceReader
-from record import SequenceRecord
+from fastq_index import FastqIndex
+from parallel_gzip import ParallelGzipReader
+from record import SequenceRecord, SequenceRecordBatch, SequenceRecordView, _phred_table
+from sampling import BernoulliSampler, ReservoirSampler
 
 
 class FastqReader(SequenceReader):
@@ -11,29 +20,130 @@ class FastqReader(SequenceReader):
 
     Поддерживает итеративное чтение записей в формате FASTQ, автоматическое определение
     сжатия по расширению файла (.gz), валидацию структуры записей и преобразование
-    ASCII-строк качества в числовые значения Phred+33.
+    ASCII-строк качества в числовые значения Phred+33 (или Phred+64).
+
+    Доступны три движка разбора:
+        - "text": построчное чтение в текстовом режиме (исходная реализация);
+        - "binary": чтение файла крупными бинарными блоками, поиск границ записей
+          прямо в буфере и перенос незавершённой записи на следующий блок.
+          Результаты и сообщения об ошибках совпадают с движком "text";
+        - "mmap": только для несжатых файлов; файл отображается в память, и read()
+          возвращает SequenceRecordView, у которых последовательность и качество —
+          memoryview-срезы отображения без копирования до первого обращения.
+
+    Помимо построчного read() доступен колоночный read_batches(), возвращающий
+    пакеты SequenceRecordBatch без создания объекта на каждый рид.
+
+    Для несжатых файлов движок "binary" может читать только диапазон байтов
+    (byte_range), выровненный по границам записей, — это позволяет обрабатывать
+    части одного файла в разных процессах (см. split_byte_ranges()).
+
+    Для сжатых файлов можно включить распаковку в фоновом потоке (gzip_threads),
+    тогда разбор идёт параллельно с распаковкой, а файлы BGZF распаковываются
+    сразу в нескольких потоках (см. ParallelGzipReader).
+
+    Индекс смещений записей (.fqi, см. FastqIndex) даёт len(reader), переход
+    к произвольной записи seek_record(n) и чтение диапазона записей read_range().
+
+    Качество может возвращаться в двух представлениях:
+        - "list": список int (исходное поведение);
+        - "bytes": компактный буфер bytes, в котором смещение вычтено одной
+          операцией bytes.translate; поддерживает len(), индексацию, sum() и
+          memoryview/numpy.frombuffer без циклов Python.
 
     Attributes:
         filepath (Path): Путь к FASTQ-файлу (может быть сжатым).
         file (file object or None): Открытый файловый дескриптор (обычный или gzip).
+        engine (str): Используемый движок разбора ("text", "binary" или "mmap").
+        chunk_size (int): Размер блока чтения в байтах для движка "binary".
+        quality_format (str): Представление качества ("list" или "bytes").
+        phred_offset (int | str): Смещение кодировки качества (33, 64 или "auto"
+            до открытия файла; после открытия — определённое значение).
+        byte_range (tuple[int, int] | None): Читаемый диапазон байтов [start, end)
+            или None для всего файла.
+        gzip_threads (int): Число потоков фоновой распаковки .gz (0 — распаковка
+            в вызывающем потоке через модуль gzip).
     """
 
-    def __init__(self, filepath: str | Path):
+    ENGINES = ("text", "binary", "mmap")
+    QUALITY_FORMATS = ("list", "bytes")
+    PHRED_OFFSETS = (33, 64)
+    DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+    DETECT_SAMPLE_RECORDS = 10000
+    DEFAULT_BATCH_SIZE = 10000
+    BOUNDARY_WINDOW = 64 * 1024
+    SEEK_RUN_LENGTH = 100
+
+    def __init__(
+        self,
+        filepath: str | Path,
+        engine: str = "text",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        quality_format: str = "list",
+        phred_offset: int | str = 33,
+        byte_range: tuple[int, int] | None = None,
+        gzip_threads: int = 0,
+    ):
         """
         Инициализирует FastqReader с указанным путём к файлу.
 
         Args:
             filepath (str | Path): Путь к FASTQ-файлу. Поддерживается сжатие (.gz).
+            engine (str, optional): Движок разбора: "text" (по умолчанию), "binary" или "mmap".
+            chunk_size (int, optional): Размер блока чтения в байтах для движка "binary".
+            quality_format (str, optional): Представление качества: "list" (по умолчанию)
+                или "bytes".
+            phred_offset (int | str, optional): Смещение кодировки качества: 33 (по умолчанию),
+                64 или "auto" для автоматического определения при открытии файла.
+            byte_range (tuple[int, int] | None, optional): Диапазон байтов [start, end),
+                начинающийся с границы записи. Только для движков "binary" и "mmap"
+                и несжатых файлов.
+            gzip_threads (int, optional): Число потоков фоновой распаковки .gz-файлов.
+                По умолчанию 0 — распаковка в вызывающем потоке.
+
+        Raises:
+            ValueError: Если указан неизвестный движок, формат качества, смещение,
+                неположительный размер блока, недопустимый диапазон байтов
+                или отрицательное число потоков распаковки.
         """
         super().__init__(filepath)
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown FASTQ engine: {engine!r}")
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if quality_format not in self.QUALITY_FORMATS:
+            raise ValueError(f"Unknown quality format: {quality_format!r}")
+        if phred_offset != "auto" and phred_offset not in self.PHRED_OFFSETS:
+            raise ValueError(f"Unsupported Phred offset: {phred_offset!r}")
+        self.engine = engine
+        self.chunk_size = chunk_size
+        if engine == "mmap" and str(self.filepath).endswith('.gz'):
+            raise ValueError("The 'mmap' engine requires an uncompressed file")
+        if byte_range is not None:
+            if engine == "text" or str(self.filepath).endswith('.gz'):
+                raise ValueError(
+                    "byte_range requires the 'binary' or 'mmap' engine and an uncompressed file"
+                )
+            if not 0 <= byte_range[0] <= byte_range[1]:
+                raise ValueError(f"Invalid byte range: {byte_range!r}")
+        if gzip_threads < 0:
+            raise ValueError(f"gzip_threads must be non-negative, got {gzip_threads}")
+        self.quality_format = quality_format
+        self.phred_offset = phred_offset
+        self.byte_range = byte_range
+        self.gzip_threads = gzip_threads
         self.file = None
+        self._mmap = None
+        self._mmap_position = 0
+        self._index = None
 
     def __enter__(self):
         """
         Поддержка контекстного менеджера (with-блока).
 
         Автоматически определяет, сжат ли файл (по расширению .gz),
-        и открывает его в текстовом режиме с кодировкой ASCII.
+        и открывает его в текстовом режиме с кодировкой ASCII
+        (или в бинарном режиме для движка "binary").
 
         Returns:
             FastqReader: Текущий экземпляр после открытия файла.
@@ -41,10 +151,7 @@ class FastqReader(SequenceReader):
         Raises:
             OSError: Если файл не может быть открыт (например, не существует или повреждён).
         """
-        if str(self.filepath).endswith('.gz'):
-            self.file = gzip.open(self.filepath, "rt", encoding="ascii")
-        else:
-            self.file = open(self.filepath, "r", encoding="ascii")
+        self._open()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -64,12 +171,164 @@ class FastqReader(SequenceReader):
         """
         Закрывает открытый файл, если он существует и не закрыт.
 
-        Устанавливает атрибут self.file в None после закрытия.
+        Устанавливает атрибут self.file в None после закрытия. Если записи движка
+        "mmap" ещё ссылаются на отображение файла, оно будет закрыто сборщиком
+        мусора после их удаления.
         """
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+            self._mmap = None
         if self.file:
             self.file.close()
             self.file = None
 
+    def __len__(self) -> int:
+        """
+        Возвращает число ридов в файле по индексу .fqi (строит индекс при необходимости).
+
+        Returns:
+            int: Число ридов.
+        """
+        return len(self.index())
+
+    def index(self, build: bool = True) -> FastqIndex | None:
+        """
+        Возвращает актуальный индекс смещений записей файла.
+
+        Индекс загружается из файла .fqi; если его нет или он устарел
+        (изменились размер или время изменения файла), он строится и сохраняется.
+
+        Args:
+            build (bool, optional): Строить индекс, если актуального нет.
+                При False в этом случае возвращается None.
+
+        Returns:
+            FastqIndex | None: Индекс файла.
+        """
+        if self._index is not None and self._index_is_current(self._index):
+            return self._index
+        self._index = FastqIndex.load_or_build(self.filepath) if build else FastqIndex.load(self.filepath)
+        return self._index
+
+    def _index_is_current(self, index: FastqIndex) -> bool:
+        """
+        Проверяет, что индекс соответствует текущему состоянию файла.
+
+        Args:
+            index (FastqIndex): Проверяемый индекс.
+
+        Returns:
+            bool: True, если размер и время изменения файла не изменились.
+        """
+        stat = self.filepath.stat()
+        return index.file_size == stat.st_size and index.mtime_ns == stat.st_mtime_ns
+
+    def seek_record(self, n: int):
+        """
+        Перемещает позицию чтения к записи с номером n (с нуля), используя индекс.
+
+        Файл смещается к ближайшей сохранённой в индексе записи, после чего
+        оставшиеся записи (меньше шага индекса) пропускаются построчно.
+        Следующий вызов read() или read_batches() начнёт чтение с записи n.
+        Для .gz-файлов переход выполняется распаковкой до нужного места.
+
+        Args:
+            n (int): Номер записи.
+
+        Raises:
+            IndexError: Если n вне диапазона [0, len(self)].
+            ValueError: Если задан byte_range или включена фоновая распаковка gzip.
+        """
+        if self.byte_range is not None or (self.gzip_threads and str(self.filepath).endswith('.gz')):
+            raise ValueError("seek_record is not supported with byte_range or gzip_threads")
+        offset, skip = self.index().locate(n)
+        if not self.file:
+            self._open()
+        if self._mmap is not None:
+            self._mmap.seek(offset)
+            readline = self._mmap.readline
+        else:
+            self.file.seek(offset)
+            readline = self.file.readline
+        for _ in range(skip * 4):
+            readline()
+        if self._mmap is not None:
+            self.file.seek(self._mmap.tell())
+
+    def read_range(self, start: int, stop: int) -> Iterator[SequenceRecord]:
+        """
+        Итеративно читает записи с номерами из диапазона [start, stop).
+
+        Args:
+            start (int): Номер первой записи.
+            stop (int): Номер записи, следующей за последней.
+
+        Yields:
+            SequenceRecord: Записи диапазона.
+
+        Raises:
+            IndexError: Если start вне диапазона записей файла.
+        """
+        self.seek_record(start)
+        yield from islice(self.read(), max(0, stop - start))
+
+    def bytes_consumed(self) -> int:
+        """
+        Возвращает позицию чтения в исходном файле (для .gz — в сжатом файле).
+
+        Позиция учитывает уже прочитанные вперёд блоки и используется для оценки
+        прогресса: её можно сравнить с размером файла на диске.
+
+        Returns:
+            int: Число байт файла на диске, прочитанных к текущему моменту.
+        """
+        if self._mmap is not None:
+            return self._mmap_position
+        f = self.file
+        if f is None:
+            return 0
+        f = getattr(f, "buffer", f)
+        f = getattr(f, "raw", f)
+        f = getattr(f, "fileobj", f)
+        return f.tell()
+
+    def _open(self):
+        """
+        Открывает файл в режиме, соответствующем выбранному движку.
+
+        Для движка "text" файл открывается в текстовом режиме с кодировкой ASCII,
+        для движка "binary" — в бинарном режиме. Если смещение качества
+        задано как "auto", оно определяется перед открытием.
+        """
+        if self.phred_offset == "auto":
+            self.phred_offset = self.detect_phred_offset()
+        binary = self.engine != "text"
+        if str(self.filepath).endswith('.gz') and self.gzip_threads:
+            raw = ParallelGzipReader(self.filepath, threads=self.gzip_threads)
+            if binary:
+                self.file = raw
+            else:
+                self.file = io.TextIOWrapper(io.BufferedReader(raw), encoding="ascii")
+        elif str(self.filepath).endswith('.gz'):
+            if binary:
+                self.file = gzip.open(self.filepath, "rb")
+            else:
+                self.file = gzip.open(self.filepath, "rt", encoding="ascii")
+        else:
+            if binary:
+                self.file = open(self.filepath, "rb")
+                if self.engine == "mmap" and self.filepath.stat().st_size:
+                    self._mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                if self.byte_range is not None:
+                    self.file.seek(self.byte_range[0])
+                    if self._mmap is not None:
+                        self._mmap.seek(self.byte_range[0])
+            else:
+                self.file = open(self.filepath, "r", encoding="ascii")
+
     def read(self) -> Iterator[SequenceRecord]:
         """
         Итеративно читает FASTQ-файл и возвращает объекты SequenceRecord.
@@ -81,19 +340,29 @@ class FastqReader(SequenceReader):
             4. Строка качества (ASCII, Phred+33)
 
         Метод выполняет базовую валидацию структуры и длины данных.
+        Для движка "binary" является тонкой обёрткой над read_batches(),
+        для движка "mmap" возвращает SequenceRecordView без копирования данных.
 
         Yields:
-            SequenceRecord: Объект с атрибутами id, sequence и quality (список int).
+            SequenceRecord: Объект с атрибутами id, sequence и quality
+                (список int или bytes, в зависимости от quality_format).
 
         Raises:
             ValueError: При нарушении формата FASTQ (неверные маркеры, несоответствие длины и т.д.).
             OSError: Если файл не может быть прочитан.
         """
         if not self.file:
-            if str(self.filepath).endswith('.gz'):
-                self.file = gzip.open(self.filepath, "rt", encoding="ascii")
-            else:
-                self.file = open(self.filepath, "r", encoding="ascii")
+            self._open()
+
+        if self.engine == "mmap":
+            yield from self._read_mmap()
+            return
+
+        if self.engine == "binary":
+            quality_as_list = self.quality_format == "list"
+            for batch in self.read_batches():
+                yield from batch.records(quality_as_list)
+            return
 
         while True:
             header = self.file.readline()
@@ -123,30 +392,752 @@ class FastqReader(SequenceReader):
             if not seq_clean:
                 raise ValueError(f"Empty sequence for {seq_id}")
 
-            quality_scores = self._parse_quality(qual_clean)
+            if self.quality_format == "bytes":
+                quality_scores = self._decode_quality(qual_clean.encode("ascii"), seq_id)
+            else:
+                try:
+                    quality_scores = self._parse_quality(qual_clean, self.phred_offset)
+                except ValueError:
+                    raise ValueError(f"Invalid quality character for {seq_id}") from None
 
 
             record = SequenceRecord(id=seq_id, sequence=seq_clean, quality=quality_scores)
             yield record
 
+    def _iter_blocks(self) -> Iterator[bytes]:
+        """
+        Итеративно читает открытый бинарный файл блоками по chunk_size байт.
+
+        Каждый блок проверяется на ASCII так же, как это делает текстовый режим
+        с кодировкой ASCII.
+
+        Yields:
+            bytes: Очередной непустой блок данных.
+
+        Raises:
+            UnicodeDecodeError: Если блок содержит не-ASCII байты.
+        """
+        read = self._mmap.read if self._mmap is not None else self.file.read
+        chunk_size = self.chunk_size
+        remaining = None
+        if self.byte_range is not None:
+            remaining = self.byte_range[1] - self.byte_range[0]
+        while True:
+            if remaining is not None:
+                if remaining <= 0:
+                    return
+                chunk_size = min(chunk_size, remaining)
+            block = read(chunk_size)
+            if not block:
+                return
+            if remaining is not None:
+                remaining -= len(block)
+            if not block.isascii():
+                block.decode("ascii")
+            yield block
+
+    def _iter_line_groups(self) -> Iterator[tuple[list[bytes], int | None]]:
+        """
+        Разбивает поток блоков на строки и группирует их по четыре (одна запись FASTQ).
+
+        Незавершённая запись в конце блока (в виде сырых байт) переносится
+        на следующий блок. Окончания строк "\\r\\n" нормализуются так же,
+        как в текстовом режиме; одиночный "\\r" внутри строки (в текстовом режиме —
+        тоже перевод строки) остаётся в ней и отвергается в _build_batch().
+        Как и движок "text", чтение останавливается на первой записи с пустой
+        строкой последовательности или качества, а также на неполной записи в конце файла.
+
+        Yields:
+            tuple[list[bytes], int | None]: Список строк без символов перевода строки
+            (длина кратна четырём) и позиция в файле сразу после последней записи группы.
+            Позиция известна только для несжатых файлов, иначе None.
+        """
+        position = self._raw_position()
+        tail = b""
+        for block in self._iter_blocks():
+            if tail:
+                block = tail + block
+            cut = block.rfind(b"\n") + 1
+            if not cut:
+                tail = block
+                continue
+            lines = block[:cut].split(b"\n")
+            lines.pop()
+            usable = len(lines) - len(lines) % 4
+            end = cut - sum(map(len, lines[usable:])) - (len(lines) - usable)
+            tail = block[end:]
+            if not usable:
+                continue
+            if block.find(b"\r", 0, end) >= 0:
+                lines = block[:end].replace(b"\r\n", b"\n").split(b"\n")
+                lines.pop()
+            else:
+                del lines[usable:]
+            if position is not None:
+                position += end
+            stop = self._truncate_at_empty(lines)
+            if lines:
+                yield lines, None if stop else position
+            if stop:
+                return
+
+        if tail:
+            lines = tail.split(b"\n")
+            if not lines[-1]:
+                lines.pop()
+            lines = [line[:-1] if line.endswith(b"\r") else line for line in lines]
+            del lines[len(lines) - len(lines) % 4:]
+            stop = self._truncate_at_empty(lines)
+            if lines:
+                yield lines, None if stop or position is None else position + len(tail)
+
+    def _raw_position(self) -> int | None:
+        """
+        Возвращает текущую позицию чтения в несжатом файле.
+
+        Returns:
+            int | None: Позиция в байтах или None для сжатых файлов.
+        """
+        if str(self.filepath).endswith('.gz'):
+            return None
+        if self._mmap is not None:
+            return self._mmap.tell()
+        return self.file.tell()
+
     @staticmethod
-    def _parse_quality(quality_str: str) -> list[int]:
+    def _truncate_at_empty(lines: list[bytes]) -> bool:
+        """
+        Обрезает список строк перед первой записью с пустой последовательностью или качеством.
+
+        Args:
+            lines (list[bytes]): Строки записей, длина кратна четырём. Изменяется на месте.
+
+        Returns:
+            bool: True, если запись с пустой строкой найдена и чтение нужно остановить.
+        """
+        sequences = lines[1::4]
+        qualities = lines[3::4]
+        if b"" not in sequences and b"" not in qualities:
+            return False
+        first = len(sequences)
+        if b"" in sequences:
+            first = sequences.index(b"")
+        if b"" in qualities:
+            first = min(first, qualities.index(b""))
+        del lines[first * 4:]
+        return True
+
+    def _read_mmap(self) -> Iterator[SequenceRecordView]:
+        """
+        Движок "mmap": сканирует отображённый в память файл и выдаёт записи без копирования.
+
+        Строки находятся поиском перевода строки прямо в отображении; последовательность
+        и качество передаются в SequenceRecordView как memoryview-срезы. Структура записей
+        проверяется сразу (с теми же сообщениями, что у движка "text"), как и отсутствие
+        не-ASCII байтов в строках записи и одиночных "\\r" в последовательности и качестве;
+        символы качества ниже смещения кодировки проверяются при первом обращении к quality.
+
+        Yields:
+            SequenceRecordView: Запись, ссылающаяся на отображение файла.
+
+        Raises:
+            ValueError: При нарушении формата FASTQ.
+        """
+        mapped = self._mmap
+        if mapped is None:
+            return
+        start = mapped.tell()
+        end = self.byte_range[1] if self.byte_range is not None else len(mapped)
+        view = memoryview(mapped)
+        find = mapped.find
+        offset = self.phred_offset
+        as_list = self.quality_format == "list"
+
+        def line(pos: int) -> tuple[int, int]:
+            # Конец содержимого строки (без "\n" и "\r") и начало следующей строки
+            newline = find(b"\n", pos, end)
+            if newline < 0:
+                newline = end
+            content_end = newline
+            if content_end > pos and mapped[content_end - 1] == 13:
+                content_end -= 1
+            return content_end, newline + 1
+
+        pos = start
+        while pos < end:
+            header_start = pos
+            header_end, pos = line(pos)
+            sequence_start = pos
+            sequence_end, pos = line(pos)
+            if sequence_end <= sequence_start:
+                break
+            plus_start = pos
+            if plus_start >= end:
+                break
+            plus_end, pos = line(pos)
+            quality_start = pos
+            quality_end, pos = line(pos)
+            if quality_end <= quality_start:
+                break
+            self._mmap_position = pos
+
+            if header_end == header_start or mapped[header_start] != 64:
+                header = mapped[header_start:header_end].decode("ascii")
+                raise ValueError(f"Invalid FASTQ: expected '@', got {header.strip()!r}")
+            if plus_end == plus_start or mapped[plus_start] != 43:
+                plus_line = mapped[plus_start:plus_end].decode("ascii")
+                raise ValueError(f"Invalid FASTQ: expected '+', got {plus_line.strip()!r}")
+
+            seq_id = mapped[header_start + 1:header_end].split(None, 1)[0].decode("ascii")
+
+            if sequence_end - sequence_start != quality_end - quality_start:
+                raise ValueError(f"Sequence and quality length mismatch for {seq_id}")
+            # Движки "text" и "binary" отвергают не-ASCII байты при декодировании
+            if not mapped[sequence_start:quality_end].isascii():
+                raise ValueError(f"Non-ASCII character in record {seq_id}")
+            if find(b"\r", sequence_start, sequence_end) >= 0 or find(b"\r", quality_start, quality_end) >= 0:
+                raise ValueError(f"Invalid FASTQ: carriage return inside the sequence or quality of {seq_id}")
+
+            yield SequenceRecordView(
+                seq_id,
+                view[sequence_start:sequence_end],
+                view[quality_start:quality_end],
+                offset,
+                as_list,
+            )
+
+    def read_batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[SequenceRecordBatch]:
         """
-        Преобразует строку качества FASTQ (ASCII) в список числовых значений Phred+33.
+        Итеративно читает FASTQ-файл пакетами по batch_size ридов в колоночном виде.
+
+        Каждый пакет содержит конкатенированный буфер последовательностей,
+        конкатенированный буфер Phred-оценок качества, массив смещений и список
+        идентификаторов. Валидация и сообщения об ошибках совпадают с read().
+        Для движка "text" пакеты собираются из записей построчного парсера.
+
+        Пакеты не пересекают границы прочитанных блоков файла, поэтому часть пакетов
+        может быть меньше batch_size. Для несжатых файлов у последнего пакета блока
+        заполнен end_offset — позиция в файле сразу после его последней записи,
+        с которой можно продолжить чтение (например, через byte_range).
+
+        Args:
+            batch_size (int, optional): Максимальное число ридов в пакете.
+
+        Yields:
+            SequenceRecordBatch: Очередной пакет ридов (не более batch_size).
+
+        Raises:
+            ValueError: При нарушении формата FASTQ или неположительном batch_size.
+        """
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        if not self.file:
+            self._open()
+
+        if self.engine == "text":
+            yield from self._batches_from_records(batch_size)
+            return
+
+        span = batch_size * 4
+        for lines, end_offset in self._iter_line_groups():
+            for start in range(0, len(lines), span):
+                chunk = lines[start:start + span] if len(lines) > span else lines
+                for batch in self._build_batch(chunk):
+                    if start + span >= len(lines):
+                        batch.end_offset = end_offset
+                    yield batch
+
+    def _batches_from_records(self, batch_size: int) -> Iterator[SequenceRecordBatch]:
+        """
+        Собирает пакеты из записей построчного парсера (движок "text").
+
+        Args:
+            batch_size (int): Максимальное число ридов в пакете.
+
+        Yields:
+            SequenceRecordBatch: Очередной пакет ридов.
+        """
+        quality_format = self.quality_format
+        self.quality_format = "bytes"
+        try:
+            ids, sequences, qualities = [], [], []
+            for record in self.read():
+                ids.append(record.id)
+                sequences.append(record.sequence)
+                qualities.append(record.quality)
+                if len(ids) == batch_size:
+                    yield self._assemble_batch(ids, sequences, qualities)
+                    ids, sequences, qualities = [], [], []
+            if ids:
+                yield self._assemble_batch(ids, sequences, qualities)
+        finally:
+            self.quality_format = quality_format
+
+    @staticmethod
+    def _assemble_batch(ids: list[str], sequences: list[str], qualities: list[bytes]) -> SequenceRecordBatch:
+        """
+        Упаковывает уже разобранные записи в SequenceRecordBatch.
+
+        Args:
+            ids (list[str]): Идентификаторы ридов.
+            sequences (list[str]): Последовательности ридов.
+            qualities (list[bytes]): Декодированные оценки качества ридов.
+
+        Returns:
+            SequenceRecordBatch: Пакет ридов.
+        """
+        offsets = array("Q", accumulate(map(len, sequences), initial=0))
+        return SequenceRecordBatch(
+            ids, "".join(sequences).encode("ascii"), b"".join(qualities), offsets
+        )
+
+    def _build_batch(self, lines: list[bytes]) -> Iterator[SequenceRecordBatch]:
+        """
+        Строит колоночный пакет из строк записей FASTQ (движок "binary").
+
+        Маркеры '@' и '+', совпадение длин, отсутствие одиночных "\\r" в последовательности
+        и качестве и допустимость символов качества проверяются сразу для всего пакета. При нарушении формата записи
+        просматриваются по порядку: корректные записи перед ошибочной выдаются
+        отдельным пакетом, после чего выбрасывается то же исключение,
+        что и у построчного парсера.
+
+        Args:
+            lines (list[bytes]): Строки записей без переводов строки, длина кратна четырём.
+
+        Yields:
+            SequenceRecordBatch: Пакет ридов (не более одного).
+
+        Raises:
+            ValueError: При нарушении формата FASTQ.
+        """
+        headers = lines[0::4]
+        sequences = lines[1::4]
+        qualities = lines[3::4]
+        seq_lengths = list(map(len, sequences))
+        sequence = b"".join(sequences)
+        quality = b"".join(qualities)
+        offset = self.phred_offset
+        if not (
+            all(map(bytes.startswith, headers, repeat(b"@")))
+            and all(map(bytes.startswith, lines[2::4], repeat(b"+")))
+            and seq_lengths == list(map(len, qualities))
+            and b"\r" not in sequence
+            and b"\r" not in quality
+            and min(quality) >= offset
+        ):
+            index, error = self._find_first_error(lines)
+            if index:
+                yield from self._build_batch(lines[:index * 4])
+            raise error
+
+        yield SequenceRecordBatch(
+            [header[1:].split(None, 1)[0].decode("ascii") for header in headers],
+            sequence.upper(),
+            quality.translate(_phred_table(offset)),
+            array("Q", accumulate(seq_lengths, initial=0)),
+        )
+
+    def _find_first_error(self, lines: list[bytes]) -> tuple[int, Exception]:
+        """
+        Находит первую некорректную запись в пакете.
+
+        Порядок проверок совпадает с построчным парсером: маркер '@', маркер '+',
+        идентификатор, совпадение длин последовательности и качества, символы качества.
+        Одиночный "\\r", который построчный парсер считает переводом строки, отвергается
+        после проверки длин.
+
+        Args:
+            lines (list[bytes]): Строки записей без переводов строки, длина кратна четырём.
+
+        Returns:
+            tuple[int, Exception]: Номер первой некорректной записи и исключение для неё.
+        """
+        it = iter(lines)
+        for index, (header, sequence, plus_line, quality) in enumerate(zip(it, it, it, it)):
+            try:
+                if not header.startswith(b"@"):
+                    raise ValueError(
+                        f"Invalid FASTQ: expected '@', got {header.decode('ascii').strip()!r}"
+                    )
+                if not plus_line.startswith(b"+"):
+                    raise ValueError(
+                        f"Invalid FASTQ: expected '+', got {plus_line.decode('ascii').strip()!r}"
+                    )
+
+                seq_id = header[1:].split(None, 1)[0].decode("ascii")
+
+                if len(sequence) != len(quality):
+                    raise ValueError(f"Sequence and quality length mismatch for {seq_id}")
+                if b"\r" in sequence or b"\r" in quality:
+                    raise ValueError(f"Invalid FASTQ: carriage return inside the sequence or quality of {seq_id}")
+
+                self._decode_quality(quality, seq_id)
+            except (ValueError, IndexError) as e:
+                return index, e
+        raise AssertionError("batch validation failed without an invalid record")
+
+    def head_batches(self, n: int, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[SequenceRecordBatch]:
+        """
+        Читает пакетами только первые n ридов; остальная часть файла не читается.
+
+        Args:
+            n (int): Число ридов.
+            batch_size (int, optional): Максимальное число ридов в пакете.
+
+        Yields:
+            SequenceRecordBatch: Очередной пакет ридов.
+
+        Raises:
+            ValueError: Если n отрицательно.
+        """
+        if n < 0:
+            raise ValueError(f"n must be non-negative, got {n}")
+        remaining = n
+        if not remaining:
+            return
+        for batch in self.read_batches(min(batch_size, n)):
+            if len(batch) >= remaining:
+                yield batch if len(batch) == remaining else batch.select(range(remaining))
+                return
+            remaining -= len(batch)
+            yield batch
+
+    def sample_batches(
+        self, rate: float, seed: int | None = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[SequenceRecordBatch]:
+        """
+        Читает файл целиком и выдаёт равномерную случайную выборку ридов с долей rate.
+
+        Args:
+            rate (float): Вероятность выбора каждого рида, 0 < rate <= 1.
+            seed (int | None, optional): Зерно генератора для воспроизводимой выборки.
+            batch_size (int, optional): Максимальное число прочитанных ридов в пакете.
+
+        Yields:
+            SequenceRecordBatch: Выбранные риды очередного пакета (пустые пакеты пропускаются).
+
+        Raises:
+            ValueError: Если rate вне диапазона (0, 1].
+        """
+        sampler = BernoulliSampler(rate, seed)
+        for batch in self.read_batches(batch_size):
+            sample = sampler.sample(batch)
+            if len(sample):
+                yield sample
+
+    def reservoir_sample(
+        self, n: int, seed: int | None = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> SequenceRecordBatch:
+        """
+        Выбирает ровно n ридов (или все, если их меньше) за один проход по файлу.
+
+        Args:
+            n (int): Размер выборки.
+            seed (int | None, optional): Зерно генератора для воспроизводимой выборки.
+            batch_size (int, optional): Максимальное число прочитанных ридов в пакете.
+
+        Returns:
+            SequenceRecordBatch: Выборка в порядке следования ридов в файле.
+
+        Raises:
+            ValueError: Если n неположительно.
+        """
+        sampler = ReservoirSampler(n, seed)
+        for batch in self.read_batches(batch_size):
+            sampler.add(batch)
+        return sampler.result()
+
+    def sample_by_seeking(
+        self, n: int, seed: int | None = None, run_length: int = SEEK_RUN_LENGTH
+    ) -> Iterator[SequenceRecordBatch]:
+        """
+        Выбирает n ридов, переходя к случайным местам файла без чтения его целиком.
+
+        Читаются серии по run_length подряд идущих ридов, начинающиеся в случайных местах:
+        в случайных сохранённых записях индекса .fqi, если он есть, иначе в случайных
+        байтовых позициях, выровненных по началу записи. Серии идут в порядке
+        следования в файле; серия, начало которой попало внутрь предыдущей, продолжает
+        её. Если серии у конца файла оказались короче, выборка добирается ридами
+        из непрочитанных промежутков от начала файла, так что при достаточном числе
+        ридов в файле их выбирается ровно n. Выборка кластерная: при неоднородном
+        файле её разброс больше, чем у простой случайной выборки того же размера.
+
+        Args:
+            n (int): Размер выборки.
+            seed (int | None, optional): Зерно генератора для воспроизводимой выборки.
+            run_length (int, optional): Число подряд читаемых ридов в одной серии.
+
+        Yields:
+            SequenceRecordBatch: Риды одной серии.
+
+        Raises:
+            ValueError: Если файл сжат, n или run_length неположительны
+                или в файле не найдено ни одной записи.
+        """
+        if n <= 0 or run_length <= 0:
+            raise ValueError(f"n and run_length must be positive, got {n} and {run_length}")
+        if str(self.filepath).endswith('.gz'):
+            raise ValueError("Seeking requires an uncompressed FASTQ file")
+        if self.phred_offset == "auto":
+            self.phred_offset = self.detect_phred_offset()
+        rng = random.Random(seed)
+        size = self.filepath.stat().st_size
+        runs = math.ceil(n / run_length)
+        with open(self.filepath, "rb") as f:
+            index = self.index(build=False)
+            if index is not None and index.offsets:
+                runs = min(runs, len(index.offsets))
+                run_length = min(index.step, math.ceil(n / runs))
+                chosen = rng.sample(range(len(index.offsets)), runs)
+                starts = sorted(index.offsets[j] for j in chosen)
+            else:
+                starts = sorted(
+                    self._find_record_start(f, rng.randrange(size), size) for _ in range(runs)
+                ) if size else []
+            remaining = n
+            covered = []
+            position = 0
+            for start in starts:
+                start = max(start, position)
+                if start >= size or not remaining:
+                    continue
+                batches, position = self._read_run(f, start, min(run_length, remaining), size)
+                covered.append((start, position))
+                for batch in batches:
+                    remaining -= len(batch)
+                    yield batch
+            # Добор из промежутков между прочитанными сериями
+            gap_start = 0
+            for start, end in covered + [(size, size)]:
+                while remaining and gap_start < start:
+                    batches, gap_start = self._read_run(f, gap_start, remaining, start)
+                    if not batches:
+                        break
+                    for batch in batches:
+                        remaining -= len(batch)
+                        yield batch
+                if not remaining:
+                    break
+                gap_start = end
+        if remaining == n:
+            raise ValueError(f"No FASTQ records found in {self.filepath}")
+
+    def _read_run(self, f, start: int, count: int, stop: int) -> tuple[list[SequenceRecordBatch], int]:
+        """
+        Читает до count записей подряд, начиная с позиции start и не заходя за stop.
+
+        Args:
+            f (file object): Файл, открытый в бинарном режиме.
+            start (int): Позиция начала записи.
+            count (int): Максимальное число записей.
+            stop (int): Позиция, на которой чтение останавливается (начало записи или конец файла).
+
+        Returns:
+            tuple[list[SequenceRecordBatch], int]: Пакеты прочитанных ридов и позиция
+            после последней прочитанной записи.
+        """
+        f.seek(start)
+        lines = []
+        while len(lines) < count * 4 and f.tell() < stop:
+            lines.extend(f.readline() for _ in range(4))
+        position = f.tell()
+        lines = [line[:-1] if line.endswith(b"\n") else line for line in lines]
+        lines = [line[:-1] if line.endswith(b"\r") else line for line in lines]
+        self._truncate_at_empty(lines)
+        return (list(self._build_batch(lines)) if lines else []), position
+
+    def estimate_record_count(self, sample_records: int = DETECT_SAMPLE_RECORDS) -> int:
+        """
+        Оценивает число ридов в файле без полного чтения.
+
+        Используется индекс .fqi, если он актуален; иначе размер файла делится
+        на средний размер записи среди первых sample_records записей.
+
+        Args:
+            sample_records (int, optional): Число записей для оценки среднего размера.
+
+        Returns:
+            int: Точное (по индексу) или оценочное число ридов.
+
+        Raises:
+            ValueError: Если файл сжат и индекса нет.
+        """
+        index = self.index(build=False)
+        if index is not None:
+            return len(index)
+        if str(self.filepath).endswith('.gz'):
+            raise ValueError("Cannot estimate the read count of a compressed FASTQ file without an index")
+        with open(self.filepath, "rb") as f:
+            lines = list(islice(f, sample_records * 4))
+        records = len(lines) // 4
+        if not records:
+            return 0
+        record_size = sum(map(len, lines[:records * 4])) / records
+        return round(self.filepath.stat().st_size / record_size)
+
+    def split_byte_ranges(
+        self, parts: int, start: int = 0, end: int | None = None
+    ) -> list[tuple[int, int]]:
+        """
+        Делит несжатый FASTQ-файл на диапазоны байтов, выровненные по границам записей.
+
+        Номинальные границы (равные доли размера файла) сдвигаются вперёд
+        до начала ближайшей записи. Полученные диапазоны можно передать
+        в параметр byte_range для параллельной обработки.
+
+        Args:
+            parts (int): Желаемое число диапазонов.
+            start (int, optional): Начало делимой области; должно совпадать с началом записи.
+            end (int | None, optional): Конец делимой области (по умолчанию — конец файла).
+
+        Returns:
+            list[tuple[int, int]]: Непересекающиеся диапазоны [start, end), покрывающие область.
+
+        Raises:
+            ValueError: Если файл сжат или parts неположительно.
+        """
+        if parts <= 0:
+            raise ValueError(f"parts must be positive, got {parts}")
+        if str(self.filepath).endswith('.gz'):
+            raise ValueError("Cannot split a compressed FASTQ file into byte ranges")
+        size = self.filepath.stat().st_size
+        end = size if end is None else min(end, size)
+        with open(self.filepath, "rb") as f:
+            bounds = [start]
+            for i in range(1, parts):
+                offset = start + (end - start) * i // parts
+                bounds.append(max(bounds[-1], min(end, self._find_record_start(f, offset, size))))
+        bounds.append(end)
+        return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+
+    @classmethod
+    def _find_record_start(cls, f, offset: int, size: int) -> int:
+        """
+        Находит начало первой записи FASTQ, начинающейся не раньше offset.
+
+        Поскольку строка качества тоже может начинаться с '@', кандидат
+        принимается, только если третья строка начинается с '+', длины
+        последовательности и качества совпадают, а следующая строка
+        снова начинается с '@' (или достигнут конец файла).
+
+        Args:
+            f (file object): Файл, открытый в бинарном режиме.
+            offset (int): Номинальная позиция в байтах.
+            size (int): Размер файла в байтах.
+
+        Returns:
+            int: Позиция начала записи или size, если записей после offset нет.
+        """
+        if offset <= 0:
+            return 0
+        window = cls.BOUNDARY_WINDOW
+        while True:
+            f.seek(offset - 1)
+            data = f.read(window)
+            eof = offset - 1 + len(data) >= size
+            lines = data.split(b"\n")
+            position = offset + len(lines[0])
+            lines = lines[1:]
+            if not eof:
+                lines.pop()
+            for i in range(len(lines) - 3):
+                header, sequence, plus_line, quality = lines[i:i + 4]
+                if (
+                    header.startswith(b"@")
+                    and plus_line.startswith(b"+")
+                    and len(sequence) == len(quality)
+                ):
+                    if i + 4 == len(lines):
+                        if eof:
+                            return position
+                        break
+                    following = lines[i + 4]
+                    if following.startswith(b"@") or (eof and i + 5 == len(lines) and not following):
+                        return position
+                position += len(header) + 1
+            else:
+                if eof:
+                    return size
+            window *= 2
+
+    def detect_phred_offset(self, max_records: int = DETECT_SAMPLE_RECORDS) -> int:
+        """
+        Определяет смещение кодировки качества (Phred+33 или Phred+64) по началу файла.
+
+        Просматривает строки качества первых max_records записей. Как и в FastQC,
+        если минимальный символ меньше '@' (ASCII 64), файл считается Phred+33,
+        иначе — Phred+64. Файл открывается отдельно и не влияет на текущее чтение.
+
+        Args:
+            max_records (int, optional): Максимальное число просматриваемых записей.
+
+        Returns:
+            int: 33 или 64.
+        """
+        lowest = 255
+        opener = gzip.open if str(self.filepath).endswith('.gz') else open
+        with opener(self.filepath, "rb") as f:
+            for i, line in enumerate(f):
+                if i % 4 == 3:
+                    line = line.rstrip(b"\r\n")
+                    if line:
+                        lowest = min(lowest, min(line))
+                    if i // 4 + 1 >= max_records:
+                        break
+        return 33 if lowest < 64 else 64
+
+    def _decode_quality(self, quality: bytes, seq_id: str) -> bytes:
+        """
+        Преобразует байтовую строку качества в компактный буфер Phred-значений.
+
+        Смещение вычитается одной операцией bytes.translate для всей строки.
+
+        Args:
+            quality (bytes): Строка качества в формате ASCII.
+            seq_id (str): Идентификатор записи (для сообщения об ошибке).
+
+        Returns:
+            bytes: Буфер, в котором каждый байт — Phred-оценка соответствующей позиции.
+
+        Raises:
+            ValueError: Если строка содержит символы ниже смещения кодировки.
+        """
+        if min(quality) < self.phred_offset:
+            raise ValueError(f"Invalid quality character for {seq_id}")
+        return quality.translate(_phred_table(self.phred_offset))
+
+    @staticmethod
+    def _parse_quality(quality_str: str, offset: int = 33) -> list[int]:
+        """
+        Преобразует строку качества FASTQ (ASCII) в список числовых значений Phred.
 
         Согласно стандарту Phred+33, символ '!' (ASCII 33) соответствует качеству 0,
         а максимальное значение обычно не превышает 93 (ASCII 126).
+        Для старых файлов Illumina (Phred+64) передаётся offset=64.
 
         Args:
             quality_str (str): Строка качества в формате ASCII (например, "IIIIJJI").
+            offset (int, optional): Смещение кодировки (33 или 64). По умолчанию 33.
 
         Returns:
             list[int]: Список целых чисел — Phred-оценок качества для каждой позиции.
 
+        Raises:
+            ValueError: Если строка содержит символы ниже смещения кодировки
+                (как в бинарном и mmap-режимах).
+
         Example:
             >>> FastqReader._parse_quality("!")
             [0]
             >>> FastqReader._parse_quality("I")
             [40]
+            >>> FastqReader._parse_quality("5", offset=64)
+            Traceback (most recent call last):
+            ...
+            ValueError: Invalid quality character '5' for Phred+64
         """
-        return [ord(ch) - 33 for ch in quality_str]
\ No newline at end of file
+        scores = [ord(ch) - offset for ch in quality_str]
+        if scores and min(scores) < 0:
+            raise ValueError(f"Invalid quality character {min(quality_str)!r} for Phred+{offset}")
+        return scores
+
@@ -0,0 +1,1016 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from duplication import DuplicationStats
+from kmer_stats import KmerStats
+from fastq_index import FastqIndex
+from fastq_reader import FastqReader
+from paired_fastq_reader import PairedFastqReader
+from record import SequenceRecordBatch
+from sampling import BernoulliSampler, ReservoirSampler
+from tile_stats import TileStats
+
+BASES = "ATGC"
+# Столбцы матрицы состава: основания BASES и N (все прочие символы)
+BASE_COLUMNS = BASES + "N"
+MAX_PHRED = 93
+
+# Таблица перевода байта в код основания для np.bincount:
+# A, T, G, C в любом регистре -> 0..3, N и все прочие символы -> 4
+_BASE_CODES = np.full(256, len(BASES), dtype=np.intp)
+for _code, _base in enumerate(BASES.encode("ascii")):
+    _BASE_CODES[_base] = _BASE_CODES[_base + ord("a") - ord("A")] = _code
+_GC_CODES = [BASES.index("G"), BASES.index("C")]
+
+# 1 для G и C, 0 для остальных байтов (GC-состав каждого рида через np.add.reduceat)
+_GC_MASK = np.zeros(256, dtype=np.int64)
+_GC_MASK[list(b"GCgc")] = 1
+
+# Режимы выборки analyze_sample(): первые n ридов, доля rate, ровно n ридов
+SAMPLING_MODES = ("head", "rate", "reservoir")
+
+# Интервал опроса токена отмены при ожидании процессов-воркеров, в секундах
+CANCEL_POLL_INTERVAL = 0.1
+
+# Флаг отмены в процессе-воркере (устанавливается инициализатором пула)
+_worker_cancel = None
+
+
+class AnalysisCancelled(Exception):
+    """
+    Анализ прерван по запросу отмены.
+
+    Несёт частичную статистику и диапазоны байтов, которые она покрывает,
+    чтобы анализ можно было продолжить (параметр resume у analyze_file()).
+
+    Attributes:
+        stats (FastqStats): Статистика по уже обработанным записям.
+        done_ranges (list[tuple[int, int]]): Полностью обработанные диапазоны байтов [start, end).
+            Для сжатых файлов список пуст: продолжить такой анализ нельзя.
+    """
+
+    def __init__(self, stats: "FastqStats", done_ranges: list[tuple[int, int]]):
+        """
+        Args:
+            stats (FastqStats): Частичная статистика.
+            done_ranges (list[tuple[int, int]]): Обработанные диапазоны байтов.
+        """
+        super().__init__("Analysis cancelled")
+        self.stats = stats
+        self.done_ranges = done_ranges
+
+    def __reduce__(self):
+        """Позволяет передавать исключение из процесса-воркера."""
+        return self.__class__, (self.stats, self.done_ranges)
+
+
+class FastqStats:
+    """
+    Накопитель статистики FASTQ, обновляемый колоночными пакетами ридов.
+
+    Все счётчики хранятся в массивах фиксированного размера (по длине рида),
+    поэтому частичные результаты из разных процессов можно сложить через merge().
+    Отдельные оценки качества и длины не сохраняются: вместо них ведутся
+    гистограммы (матрица позиция × значение Phred и гистограмма длин), из которых
+    вычисляются среднее, медиана, квартили и произвольные процентили. Объём памяти
+    зависит только от максимальной длины рида, а не от числа ридов в файле.
+
+    Для статистики по выборке (sampling задан) дополнительно ведутся суммы
+    по ридам, из которых вычисляются доверительные интервалы GC-состава
+    и среднего качества (confidence_intervals()).
+
+    Attributes:
+        total_seq (int): Количество ридов.
+        total_bases (int): Суммарное число оснований.
+        gc_count (int): Количество оснований G и C.
+        length_counts (np.ndarray): Гистограмма длин: length_counts[L] — число ридов длины L.
+        quality_counts (np.ndarray): Матрица позиция × Phred (0..MAX_PHRED): число
+            ридов с данной оценкой в данной позиции.
+        position_count (np.ndarray): Число ридов, покрывающих каждую позицию.
+        base_counts (np.ndarray): Матрица позиция × BASE_COLUMNS ({A, T, G, C, N});
+            все символы, кроме A, T, G, C в любом регистре, считаются N.
+        sampling (dict | None): Параметры выборки (см. analyze_sample()) или None,
+            если учтены все риды файла.
+        read_moments (np.ndarray): Суммы по ридам для оценки разброса: GC², GC·L, L²,
+            Q, Q², Q·L, где GC, Q и L — число G/C, сумма оценок качества и длина рида.
+        duplication (DuplicationStats): Уровни дублирования и сверхпредставленные
+            последовательности (в ограниченной памяти).
+        kmers (KmerStats): Счётчики k-меров и позиционное содержание адаптеров.
+        read_quality_counts (np.ndarray): Гистограмма среднего качества рида:
+            read_quality_counts[q] — число ридов со средней оценкой в [q, q + 1).
+        tiles (TileStats | None): Качество по тайлам Illumina или None, если модуль выключен.
+    """
+
+    def __init__(self, sampling: dict | None = None, kmer_size: int = KmerStats.DEFAULT_K, tiles: bool = False):
+        """
+        Инициализирует пустой накопитель.
+
+        Args:
+            sampling (dict | None, optional): Параметры выборки, если риды выбираются
+                не все; включает учёт сумм для доверительных интервалов.
+            kmer_size (int, optional): Длина подсчитываемых k-меров.
+            tiles (bool, optional): Вести статистику по тайлам (требует разбора идентификаторов).
+        """
+        self.sampling = sampling
+        self.read_moments = np.zeros(6)
+        self.total_seq = 0
+        self.total_bases = 0
+        self.gc_count = 0
+        self.length_counts = np.zeros(1, dtype=np.int64)
+        self.quality_counts = np.zeros((0, MAX_PHRED + 1), dtype=np.int64)
+        self.position_count = np.zeros(0, dtype=np.int64)
+        self.base_counts = np.zeros((0, len(BASE_COLUMNS)), dtype=np.int64)
+        self.duplication = DuplicationStats()
+        self.kmers = KmerStats(kmer_size)
+        self.read_quality_counts = np.zeros(MAX_PHRED + 1, dtype=np.int64)
+        self.tiles = TileStats() if tiles else None
+
+    def _grow(self, max_len: int):
+        """
+        Расширяет позиционные массивы до длины max_len (гистограмму длин — до max_len + 1).
+
+        Args:
+            max_len (int): Максимальная длина рида, которую нужно вместить.
+        """
+        extra = max_len - len(self.position_count)
+        if extra <= 0:
+            return
+        self.length_counts = np.pad(self.length_counts, (0, extra))
+        self.quality_counts = np.pad(self.quality_counts, ((0, extra), (0, 0)))
+        self.position_count = np.pad(self.position_count, (0, extra))
+        self.base_counts = np.pad(self.base_counts, ((0, extra), (0, 0)))
+
+    def update(self, batch: SequenceRecordBatch):
+        """
+        Добавляет в статистику пакет ридов без циклов Python по ридам и позициям.
+
+        Args:
+            batch (SequenceRecordBatch): Пакет ридов с качеством.
+        """
+        if not len(batch):
+            return
+        offsets = np.frombuffer(batch.offsets, dtype=np.uint64).astype(np.intp)
+        lengths = np.diff(offsets)
+        max_len = int(lengths.max())
+        self._grow(max_len)
+
+        sequence = np.frombuffer(batch.sequences, dtype=np.uint8)
+        quality = np.frombuffer(batch.qualities, dtype=np.uint8)
+
+        self.total_seq += len(batch)
+        self.total_bases += len(sequence)
+        self.length_counts[:max_len + 1] += np.bincount(lengths, minlength=max_len + 1)
+
+        # Позиция каждого основания внутри своего рида
+        positions = np.arange(len(sequence)) - np.repeat(offsets[:-1], lengths)
+        self.position_count[:max_len] += np.bincount(positions, minlength=max_len)
+        codes = positions * (MAX_PHRED + 1) + np.minimum(quality, MAX_PHRED)
+        self.quality_counts[:max_len] += np.bincount(
+            codes, minlength=max_len * (MAX_PHRED + 1)
+        ).reshape(max_len, MAX_PHRED + 1)
+        codes = positions * len(BASE_COLUMNS) + _BASE_CODES[sequence]
+        base_counts = np.bincount(
+            codes, minlength=max_len * len(BASE_COLUMNS)
+        ).reshape(max_len, len(BASE_COLUMNS))
+        self.base_counts[:max_len] += base_counts
+        self.gc_count += int(base_counts[:, _GC_CODES].sum())
+        self.duplication.update(batch)
+        self.kmers.update(batch)
+        if self.tiles is not None:
+            self.tiles.update(batch)
+
+        quality_sums = _per_read_sums(quality, offsets)
+        covered = lengths > 0
+        self.read_quality_counts += np.bincount(
+            np.minimum(quality_sums[covered] // lengths[covered], MAX_PHRED), minlength=MAX_PHRED + 1
+        )
+
+        if self.sampling is not None:
+            gc = _per_read_sums(_GC_MASK[sequence], offsets).astype(float)
+            quality_sums = quality_sums.astype(float)
+            lengths = lengths.astype(float)
+            self.read_moments += [
+                gc @ gc,
+                gc @ lengths,
+                lengths @ lengths,
+                quality_sums.sum(),
+                quality_sums @ quality_sums,
+                quality_sums @ lengths,
+            ]
+
+    def copy(self) -> "FastqStats":
+        """
+        Возвращает независимую копию накопителя.
+
+        Returns:
+            FastqStats: Копия с теми же счётчиками.
+        """
+        return FastqStats(self.sampling, self.kmers.k).merge(self)
+
+    def merge(self, other: "FastqStats") -> "FastqStats":
+        """
+        Добавляет к текущей статистике частичную статистику другого накопителя.
+
+        Args:
+            other (FastqStats): Статистика другой части файла.
+
+        Returns:
+            FastqStats: Текущий накопитель (для цепочек вызовов).
+        """
+        self.total_seq += other.total_seq
+        self.total_bases += other.total_bases
+        self.gc_count += other.gc_count
+        self.read_moments += other.read_moments
+        self._grow(len(other.position_count))
+        size = len(other.position_count)
+        self.length_counts[:len(other.length_counts)] += other.length_counts
+        self.quality_counts[:size] += other.quality_counts
+        self.position_count[:size] += other.position_count
+        self.base_counts[:size] += other.base_counts
+        self.duplication.merge(other.duplication)
+        self.kmers.merge(other.kmers)
+        self.read_quality_counts += other.read_quality_counts
+        if other.tiles is not None:
+            if self.tiles is None:
+                self.tiles = TileStats()
+            self.tiles.merge(other.tiles)
+        return self
+
+    def save(self, f):
+        """
+        Сохраняет накопитель в компактном бинарном виде (сжатый архив .npz).
+
+        Args:
+            f (str | Path | file object): Путь или файл, открытый для записи в бинарном режиме.
+        """
+        np.savez_compressed(
+            f,
+            totals=np.array([self.total_seq, self.total_bases, self.gc_count], dtype=np.int64),
+            length_counts=self.length_counts,
+            quality_counts=self.quality_counts,
+            position_count=self.position_count,
+            base_counts=self.base_counts,
+            read_moments=self.read_moments,
+            **self.duplication.to_arrays(),
+            **self.kmers.to_arrays(),
+            read_quality_counts=self.read_quality_counts,
+            **(self.tiles.to_arrays() if self.tiles is not None else {}),
+        )
+
+    @classmethod
+    def load(cls, f) -> "FastqStats":
+        """
+        Загружает накопитель, сохранённый методом save().
+
+        Args:
+            f (str | Path | file object): Путь или файл, открытый для чтения в бинарном режиме.
+
+        Returns:
+            FastqStats: Восстановленный накопитель.
+
+        Raises:
+            ValueError, OSError, KeyError: Если данные повреждены или имеют неверный формат.
+        """
+        stats = cls()
+        with np.load(f, allow_pickle=False) as data:
+            stats.total_seq, stats.total_bases, stats.gc_count = (int(v) for v in data["totals"])
+            stats.length_counts = data["length_counts"]
+            stats.quality_counts = data["quality_counts"]
+            stats.position_count = data["position_count"]
+            stats.base_counts = data["base_counts"]
+            if "read_moments" in data:
+                stats.read_moments = data["read_moments"]
+            stats.duplication = DuplicationStats.from_arrays(data)
+            stats.kmers = KmerStats.from_arrays(data)
+            stats.read_quality_counts = data["read_quality_counts"]
+            if "tile_ids" in data:
+                stats.tiles = TileStats.from_arrays(data)
+        return stats
+
+    def quality_mean(self) -> np.ndarray:
+        """
+        Вычисляет среднюю Phred-оценку в каждой позиции по гистограмме качества.
+
+        Returns:
+            np.ndarray: Средние значения по позициям (0 для непокрытых позиций).
+        """
+        totals = self.quality_counts @ np.arange(MAX_PHRED + 1)
+        return totals / np.maximum(self.position_count, 1)
+
+    def quality_percentile(self, percent: float) -> np.ndarray:
+        """
+        Вычисляет процентиль Phred-оценки в каждой позиции по гистограмме качества.
+
+        Args:
+            percent (float): Процентиль от 0 до 100 (50 — медиана).
+
+        Returns:
+            np.ndarray: Значения процентиля по позициям (NaN для непокрытых позиций).
+        """
+        return _percentile_from_counts(self.quality_counts, percent)
+
+    def quality_median(self) -> np.ndarray:
+        """
+        Вычисляет медиану Phred-оценки в каждой позиции.
+
+        Returns:
+            np.ndarray: Медианы по позициям.
+        """
+        return self.quality_percentile(50)
+
+    def quality_quartiles(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Вычисляет нижний квартиль, медиану и верхний квартиль Phred-оценки по позициям.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Массивы Q1, медианы и Q3.
+        """
+        return (
+            self.quality_percentile(25),
+            self.quality_percentile(50),
+            self.quality_percentile(75),
+        )
+
+    def length_percentile(self, percent: float) -> float:
+        """
+        Вычисляет процентиль длины рида по гистограмме длин.
+
+        Args:
+            percent (float): Процентиль от 0 до 100 (50 — медиана).
+
+        Returns:
+            float: Значение процентиля (NaN, если ридов нет).
+        """
+        return float(_percentile_from_counts(self.length_counts[np.newaxis, :], percent)[0])
+
+    def confidence_intervals(self, z: float = 1.96) -> dict:
+        """
+        Вычисляет доверительные интервалы GC-состава и среднего качества по выборке ридов.
+
+        Обе величины — отношения сумм по ридам (GC / длина, качество / длина),
+        поэтому стандартная ошибка оценивается методом линеаризации для
+        отношения средних с учётом разброса между ридами. Для выборки
+        "первые n ридов" интервал предполагает, что начало файла репрезентативно.
+
+        Args:
+            z (float, optional): Квантиль нормального распределения (1.96 — 95 %).
+
+        Returns:
+            dict: "gc_content" (в процентах) и "qual_mean" — пары (нижняя, верхняя граница);
+            (NaN, NaN), если ридов меньше двух или суммы по ридам не велись.
+        """
+        n = self.total_seq
+        if n < 2 or self.sampling is None:
+            return {"gc_content": (np.nan, np.nan), "qual_mean": (np.nan, np.nan)}
+        gc_sq, gc_len, len_sq, quality_sum, quality_sq, quality_len = self.read_moments
+        mean_len = self.total_bases / n
+        intervals = {}
+        for name, total, total_sq, cross, scale in (
+            ("gc_content", self.gc_count, gc_sq, gc_len, 100),
+            ("qual_mean", quality_sum, quality_sq, quality_len, 1),
+        ):
+            ratio = total / self.total_bases
+            variance = max(total_sq - 2 * ratio * cross + ratio ** 2 * len_sq, 0) / (n - 1)
+            error = z * np.sqrt(variance / n) / mean_len
+            intervals[name] = (float(scale * (ratio - error)), float(scale * (ratio + error)))
+        return intervals
+
+    def to_dict(self) -> dict:
+        """
+        Формирует словарь результатов для отображения в интерфейсе.
+
+        Returns:
+            dict: Ключи "total_seq", "avg_len", "median_len", "gc_content", "len_hist"
+                (длина -> число ридов), "qual_mean", "qual_q1", "qual_median", "qual_q3"
+                (статистики Phred-оценки по позициям), "base_pos"
+                (основание A, T, G, C или N -> список счётчиков по позициям), "n_content" (доля N
+                по позициям в процентах), "mean_quality" (среднее
+                по всем основаниям), а также "estimated" (True для статистики по выборке),
+                "sampling" (параметры выборки или None), "gc_ci" и "qual_ci"
+                (95 % доверительные интервалы или None), "duplication"
+                (см. DuplicationStats.to_dict()), "kmers" (см. KmerStats.to_dict()),
+                "read_quality_hist" (средняя оценка рида -> число ридов) и "tiles"
+                (см. TileStats.to_dict(); None, если модуль выключен).
+        """
+        q1, median, q3 = self.quality_quartiles()
+        intervals = self.confidence_intervals() if self.sampling is not None else {}
+        quality_total = self.quality_counts.sum(axis=0) @ np.arange(MAX_PHRED + 1)
+        return {
+            "total_seq": self.total_seq,
+            "avg_len": self.total_bases / self.total_seq if self.total_seq else 0,
+            "median_len": self.length_percentile(50) if self.total_seq else 0,
+            "gc_content": (self.gc_count / self.total_bases * 100) if self.total_bases else 0,
+            "len_hist": {
+                int(length): int(count)
+                for length, count in enumerate(self.length_counts)
+                if count
+            },
+            "qual_mean": self.quality_mean().tolist(),
+            "qual_q1": q1.tolist(),
+            "qual_median": median.tolist(),
+            "qual_q3": q3.tolist(),
+            "base_pos": {
+                base: self.base_counts[:, code].tolist() for code, base in enumerate(BASE_COLUMNS)
+            },
+            "n_content": (
+                self.base_counts[:, BASE_COLUMNS.index("N")] / np.maximum(self.position_count, 1) * 100
+            ).tolist(),
+            "mean_quality": float(quality_total / self.total_bases) if self.total_bases else 0,
+            "estimated": self.sampling is not None,
+            "sampling": self.sampling,
+            "gc_ci": intervals.get("gc_content"),
+            "qual_ci": intervals.get("qual_mean"),
+            "duplication": self.duplication.to_dict(),
+            "kmers": self.kmers.to_dict(),
+            "read_quality_hist": {
+                int(quality): int(count)
+                for quality, count in enumerate(self.read_quality_counts)
+                if count
+            },
+            "tiles": self.tiles.to_dict() if self.tiles is not None else None,
+        }
+
+
+class PairedFastqStats:
+    """
+    Статистика парных ридов: отдельно по мейтам R1 и R2 и по парам.
+
+    Для пар ведётся гистограмма разности длин мейтов |L1 - L2| (конкордантность
+    длин, важная для оценки перекрытия и длины вставки) и гистограмма разности
+    средних качеств мейтов (R1 минус R2, с шагом в одну Phred-единицу).
+
+    Attributes:
+        r1 (FastqStats): Статистика ридов R1.
+        r2 (FastqStats): Статистика ридов R2.
+        pairs (int): Число пар.
+        length_diff_counts (np.ndarray): length_diff_counts[d] — число пар с |L1 - L2| = d.
+        quality_diff_counts (np.ndarray): Гистограмма округлённой разности средних
+            качеств мейтов; индекс MAX_PHRED соответствует нулевой разности.
+    """
+
+    def __init__(self):
+        """Инициализирует пустой накопитель."""
+        self.r1 = FastqStats()
+        self.r2 = FastqStats()
+        self.pairs = 0
+        self.length_diff_counts = np.zeros(1, dtype=np.int64)
+        self.quality_diff_counts = np.zeros(2 * MAX_PHRED + 1, dtype=np.int64)
+
+    def update(self, batch1: SequenceRecordBatch, batch2: SequenceRecordBatch):
+        """
+        Добавляет в статистику пакеты мейтов одинаковой длины.
+
+        Args:
+            batch1 (SequenceRecordBatch): Риды R1.
+            batch2 (SequenceRecordBatch): Риды R2 (в том же порядке).
+        """
+        if not len(batch1):
+            return
+        self.r1.update(batch1)
+        self.r2.update(batch2)
+        self.pairs += len(batch1)
+
+        means = []
+        for batch in (batch1, batch2):
+            offsets = np.frombuffer(batch.offsets, dtype=np.uint64).astype(np.intp)
+            quality = np.frombuffer(batch.qualities, dtype=np.uint8)
+            lengths = np.diff(offsets)
+            means.append((np.add.reduceat(quality, offsets[:-1], dtype=np.int64) / lengths, lengths))
+        (mean1, lengths1), (mean2, lengths2) = means
+
+        diff = np.abs(lengths1 - lengths2)
+        counts = np.bincount(diff)
+        if len(counts) > len(self.length_diff_counts):
+            self.length_diff_counts = np.pad(
+                self.length_diff_counts, (0, len(counts) - len(self.length_diff_counts))
+            )
+        self.length_diff_counts[:len(counts)] += counts
+        quality_diff = np.rint(mean1 - mean2).astype(np.intp) + MAX_PHRED
+        self.quality_diff_counts += np.bincount(quality_diff, minlength=2 * MAX_PHRED + 1)
+
+    def to_dict(self) -> dict:
+        """
+        Формирует словарь результатов.
+
+        Returns:
+            dict: "pairs", "r1" и "r2" (словари FastqStats.to_dict()),
+                "concordant_fraction" (доля пар с равной длиной мейтов),
+                "length_diff_hist" (|L1 - L2| -> число пар),
+                "quality_diff_hist" (округлённая разность средних качеств R1 - R2 -> число пар).
+        """
+        return {
+            "pairs": self.pairs,
+            "r1": self.r1.to_dict(),
+            "r2": self.r2.to_dict(),
+            "concordant_fraction": self.length_diff_counts[0] / self.pairs if self.pairs else 0,
+            "length_diff_hist": {
+                int(diff): int(count) for diff, count in enumerate(self.length_diff_counts) if count
+            },
+            "quality_diff_hist": {
+                int(diff) - MAX_PHRED: int(count)
+                for diff, count in enumerate(self.quality_diff_counts)
+                if count
+            },
+        }
+
+
+def _percentile_from_counts(counts: np.ndarray, percent: float) -> np.ndarray:
+    """
+    Вычисляет процентиль по строкам матрицы гистограмм (без интерполяции).
+
+    Для каждой строки возвращается наименьшее значение v, для которого доля
+    наблюдений не больше v составляет не менее percent процентов.
+
+    Args:
+        counts (np.ndarray): Матрица строк-гистограмм: counts[i, v] — число наблюдений значения v.
+        percent (float): Процентиль от 0 до 100.
+
+    Returns:
+        np.ndarray: Значение процентиля для каждой строки (NaN для пустых строк).
+
+    Raises:
+        ValueError: Если percent вне диапазона [0, 100].
+    """
+    if not 0 <= percent <= 100:
+        raise ValueError(f"percent must be between 0 and 100, got {percent}")
+    cumulative = np.cumsum(counts, axis=1)
+    totals = cumulative[:, -1] if cumulative.shape[1] else np.zeros(len(counts), dtype=np.int64)
+    targets = np.maximum(np.ceil(totals * (percent / 100)), 1)
+    result = (cumulative < targets[:, np.newaxis]).sum(axis=1).astype(float)
+    result[totals == 0] = np.nan
+    return result
+
+
+def _per_read_sums(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Суммирует значения по ридам (в том числе пустым) по границам offsets.
+
+    Args:
+        values (np.ndarray): Значения всех оснований пакета подряд.
+        offsets (np.ndarray): Границы ридов (len(offsets) = число ридов + 1).
+
+    Returns:
+        np.ndarray: Суммы по ридам (int64).
+
+    >>> _per_read_sums(np.array([1, 2, 3], dtype=np.uint8), np.array([0, 2, 2, 3])).tolist()
+    [3, 0, 3]
+    """
+    starts = offsets[:-1]
+    if not len(values):
+        return np.zeros(len(starts), dtype=np.int64)
+    sums = np.add.reduceat(values, np.minimum(starts, len(values) - 1), dtype=np.int64)
+    sums[starts == offsets[1:]] = 0
+    return sums
+
+
+def _merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Объединяет пересекающиеся и смежные диапазоны байтов.
+
+    Args:
+        ranges (list[tuple[int, int]]): Диапазоны [start, end) в произвольном порядке.
+
+    Returns:
+        list[tuple[int, int]]: Отсортированные непересекающиеся диапазоны.
+
+    >>> _merge_ranges([(10, 20), (0, 5), (5, 8), (15, 30)])
+    [(0, 8), (10, 30)]
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _missing_ranges(size: int, done_ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Возвращает части файла, не покрытые обработанными диапазонами.
+
+    Args:
+        size (int): Размер файла в байтах.
+        done_ranges (list[tuple[int, int]]): Обработанные диапазоны.
+
+    Returns:
+        list[tuple[int, int]]: Необработанные диапазоны [start, end).
+
+    >>> _missing_ranges(100, [(0, 10), (40, 60)])
+    [(10, 40), (60, 100)]
+    """
+    missing = []
+    position = 0
+    for start, end in _merge_ranges(done_ranges):
+        if start > position:
+            missing.append((position, min(start, size)))
+        position = max(position, end)
+    if position < size:
+        missing.append((position, size))
+    return missing
+
+
+def _set_worker_cancel(event):
+    """
+    Инициализатор процесса-воркера: запоминает общий флаг отмены.
+
+    Args:
+        event (multiprocessing.Event): Флаг, устанавливаемый родительским процессом.
+    """
+    global _worker_cancel
+    _worker_cancel = event
+
+
+def _analyze_range(
+    file_path: str,
+    byte_range: tuple[int, int] | None,
+    phred_offset: int,
+    batch_size: int,
+    gzip_threads: int = 0,
+    progress: Callable[[FastqStats, int], None] | None = None,
+    progress_interval: float = 1.0,
+    cancel=None,
+    checkpoint: Callable[[FastqStats, list[tuple[int, int]]], None] | None = None,
+    checkpoint_interval: float = 30.0,
+    tiles: bool = False,
+) -> FastqStats:
+    """
+    Считает статистику для одного диапазона байтов файла (выполняется в процессе-воркере).
+
+    Флаг отмены проверяется между пакетами — для несжатых файлов только
+    на границах блоков чтения, где известна позиция в файле, так что частичная
+    статистика всегда соответствует целому числу записей до этой позиции.
+
+    Args:
+        file_path (str): Путь к FASTQ-файлу.
+        byte_range (tuple[int, int] | None): Диапазон байтов или None для всего файла.
+        phred_offset (int): Смещение кодировки качества.
+        batch_size (int): Размер пакета ридов.
+        gzip_threads (int, optional): Число потоков фоновой распаковки для .gz-файлов.
+        progress (Callable[[FastqStats, int], None] | None, optional): Вызывается не чаще
+            раза в progress_interval секунд с текущей статистикой и числом прочитанных
+            байт диапазона (для .gz — сжатых байт).
+        progress_interval (float, optional): Минимальный интервал между вызовами progress.
+        cancel (threading.Event | None, optional): Флаг отмены (объект с методом is_set()).
+            В процессе-воркере по умолчанию используется флаг, переданный инициализатору пула.
+        checkpoint (Callable[[FastqStats, list[tuple[int, int]]], None] | None, optional):
+            Вызывается не чаще раза в checkpoint_interval секунд с текущей статистикой
+            и обработанным диапазоном байтов (только для несжатых файлов).
+        checkpoint_interval (float, optional): Минимальный интервал между вызовами checkpoint.
+        tiles (bool, optional): Вести статистику по тайлам Illumina.
+
+    Returns:
+        FastqStats: Частичная статистика диапазона.
+
+    Raises:
+        AnalysisCancelled: Если установлен флаг отмены.
+    """
+    if cancel is None:
+        cancel = _worker_cancel
+    compressed = file_path.endswith(".gz")
+    start = byte_range[0] if byte_range is not None else 0
+    stats = FastqStats(tiles=tiles)
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled(stats, [])
+    with FastqReader(
+        file_path,
+        engine="binary",
+        quality_format="bytes",
+        phred_offset=phred_offset,
+        byte_range=byte_range,
+        gzip_threads=gzip_threads,
+    ) as reader:
+        last_report = last_checkpoint = time.monotonic()
+        for batch in reader.read_batches(batch_size):
+            stats.update(batch)
+            if progress is not None and time.monotonic() - last_report >= progress_interval:
+                progress(stats, reader.bytes_consumed() - start)
+                last_report = time.monotonic()
+            if batch.end_offset is None and not compressed:
+                continue
+            done = [(start, batch.end_offset)] if batch.end_offset is not None else []
+            if cancel is not None and cancel.is_set():
+                raise AnalysisCancelled(stats, done)
+            if done and checkpoint is not None and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                checkpoint(stats, done)
+                last_checkpoint = time.monotonic()
+    return stats
+
+
+def analyze_file(
+    file_path: str | Path,
+    workers: int | None = None,
+    batch_size: int = FastqReader.DEFAULT_BATCH_SIZE,
+    min_range_size: int = 16 * 1024 * 1024,
+    progress: Callable[[dict, int, int], None] | None = None,
+    progress_interval: float = 1.0,
+    cancel=None,
+    resume: tuple[FastqStats, list[tuple[int, int]]] | None = None,
+    checkpoint: Callable[[FastqStats, list[tuple[int, int]]], None] | None = None,
+    checkpoint_interval: float = 30.0,
+    tiles: bool = False,
+) -> FastqStats:
+    """
+    Считает статистику FASTQ-файла, при возможности — в нескольких процессах.
+
+    Несжатый файл делится на диапазоны байтов, выровненные по границам записей
+    (по индексу .fqi, если он есть, иначе поиском границ в файле);
+    каждый диапазон обрабатывается в отдельном процессе, а частичные результаты
+    складываются. Сжатые (.gz) и небольшие файлы обрабатываются в текущем процессе;
+    для .gz распаковка при этом идёт в фоновых потоках (workers потоков для BGZF).
+
+    Анализ можно отменить флагом cancel: тогда выбрасывается AnalysisCancelled
+    с частичной статистикой и обработанными диапазонами. Эту пару (или пару,
+    переданную в checkpoint) можно передать в resume, чтобы обработать
+    только оставшуюся часть несжатого файла.
+
+    Args:
+        file_path (str | Path): Путь к FASTQ-файлу.
+        workers (int | None, optional): Число процессов; по умолчанию — число ядер.
+        batch_size (int, optional): Размер пакета ридов.
+        min_range_size (int, optional): Минимальный размер диапазона на один процесс в байтах.
+        progress (Callable[[dict, int, int], None] | None, optional): Получает промежуточные
+            результаты (словарь, как у FastqStats.to_dict()), число обработанных байт
+            файла на диске (для .gz — сжатых) и размер файла. В одном процессе
+            вызывается не чаще раза в progress_interval секунд, в пуле процессов —
+            по завершении каждого диапазона.
+        progress_interval (float, optional): Минимальный интервал между вызовами progress.
+        cancel (threading.Event | None, optional): Флаг отмены (объект с методом is_set()).
+        resume (tuple[FastqStats, list[tuple[int, int]]] | None, optional): Частичная
+            статистика и обработанные диапазоны байтов прерванного анализа.
+        checkpoint (Callable[[FastqStats, list[tuple[int, int]]], None] | None, optional):
+            Периодически получает накопленную статистику и обработанные диапазоны
+            (не чаще раза в checkpoint_interval секунд; только для несжатых файлов).
+        checkpoint_interval (float, optional): Минимальный интервал между вызовами checkpoint.
+        tiles (bool, optional): Вести статистику по тайлам Illumina (разбор идентификаторов).
+
+    Returns:
+        FastqStats: Статистика всего файла.
+
+    Raises:
+        AnalysisCancelled: Если анализ отменён.
+        ValueError: Если resume передан для сжатого файла.
+    """
+    file_path = str(file_path)
+    compressed = file_path.endswith(".gz")
+    workers = workers or os.cpu_count() or 1
+    total_bytes = os.path.getsize(file_path)
+    phred_offset = FastqReader(file_path).detect_phred_offset()
+
+    stats = FastqStats(tiles=tiles)
+    done_ranges = []
+    if resume is not None:
+        if compressed:
+            raise ValueError("Cannot resume analysis of a compressed FASTQ file")
+        stats.merge(resume[0])
+        done_ranges = _merge_ranges(resume[1])
+
+    if compressed:
+        ranges = [None]
+    else:
+        ranges = _missing_ranges(total_bytes, done_ranges)
+        remaining = sum(end - start for start, end in ranges)
+        parts = min(workers * 4, remaining // min_range_size) if workers > 1 else 1
+        if parts > 1:
+            index = FastqIndex.load(file_path) if not done_ranges else None
+            if index is not None:
+                ranges = index.split_byte_ranges(parts) or ranges
+            else:
+                reader = FastqReader(file_path, engine="binary")
+                ranges = [
+                    part
+                    for start, end in ranges
+                    for part in reader.split_byte_ranges(
+                        max(1, parts * (end - start) // remaining), start, end
+                    )
+                ]
+
+    if len(ranges) <= 1 or workers == 1:
+        gzip_threads = workers if compressed else 0
+        for byte_range in ranges:
+            done_bytes = sum(end - start for start, end in done_ranges)
+
+            def report(partial, done):
+                progress(stats.copy().merge(partial).to_dict(), done_bytes + done, total_bytes)
+
+            def save(partial, covered):
+                checkpoint(stats.copy().merge(partial), _merge_ranges(done_ranges + covered))
+
+            try:
+                partial = _analyze_range(
+                    file_path,
+                    byte_range,
+                    phred_offset,
+                    batch_size,
+                    gzip_threads,
+                    report if progress is not None else None,
+                    progress_interval,
+                    cancel,
+                    save if checkpoint is not None else None,
+                    checkpoint_interval,
+                    tiles,
+                )
+            except AnalysisCancelled as e:
+                raise AnalysisCancelled(
+                    stats.merge(e.stats), _merge_ranges(done_ranges + e.done_ranges)
+                ) from None
+            stats.merge(partial)
+            if byte_range is not None:
+                done_ranges = _merge_ranges(done_ranges + [byte_range])
+        return stats
+
+    cancel_event = multiprocessing.Event()
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)),
+        initializer=_set_worker_cancel,
+        initargs=(cancel_event,),
+    ) as pool:
+        futures = {
+            pool.submit(_analyze_range, file_path, byte_range, phred_offset, batch_size, tiles=tiles): byte_range
+            for byte_range in ranges
+        }
+        pending = set(futures)
+        last_checkpoint = time.monotonic()
+        while pending:
+            if cancel is not None and cancel.is_set() and not cancel_event.is_set():
+                cancel_event.set()
+                for future in pending:
+                    future.cancel()
+            finished, pending = wait(pending, CANCEL_POLL_INTERVAL, FIRST_COMPLETED)
+            for future in finished:
+                if future.cancelled():
+                    continue
+                try:
+                    stats.merge(future.result())
+                    covered = [futures[future]]
+                except AnalysisCancelled as e:
+                    stats.merge(e.stats)
+                    covered = e.done_ranges
+                done_ranges = _merge_ranges(done_ranges + covered)
+                if progress is not None:
+                    done = sum(end - start for start, end in done_ranges)
+                    progress(stats.to_dict(), done, total_bytes)
+            if (
+                checkpoint is not None
+                and finished
+                and time.monotonic() - last_checkpoint >= checkpoint_interval
+            ):
+                checkpoint(stats, done_ranges)
+                last_checkpoint = time.monotonic()
+    if cancel_event.is_set():
+        raise AnalysisCancelled(stats, done_ranges)
+    return stats
+
+
+def analyze_sample(
+    file_path: str | Path,
+    mode: str,
+    n: int | None = None,
+    rate: float | None = None,
+    seed: int | None = None,
+    seek: bool = False,
+    batch_size: int = FastqReader.DEFAULT_BATCH_SIZE,
+    progress: Callable[[dict, int, int], None] | None = None,
+    progress_interval: float = 1.0,
+    cancel=None,
+    tiles: bool = False,
+) -> FastqStats:
+    """
+    Быстрая оценка статистики FASTQ-файла по выборке ридов (в текущем процессе).
+
+    Режимы:
+        "head" — первые n ридов (остаток файла не читается);
+        "rate" — равномерная случайная выборка с долей rate;
+        "reservoir" — ровно n случайных ридов за один проход.
+
+    При seek=True режимы "rate" и "reservoir" не читают файл целиком, а переходят
+    к случайным местам файла (FastqReader.sample_by_seeking()); для сжатых .gz-файлов
+    seek игнорируется и выборка строится обычным чтением. Для "rate" размер выборки
+    тогда определяется по числу ридов из индекса .fqi или по его оценке.
+
+    Результат помечен как оценка (FastqStats.sampling) и содержит данные
+    для доверительных интервалов GC-состава и среднего качества.
+
+    Args:
+        file_path (str | Path): Путь к FASTQ-файлу.
+        mode (str): Режим выборки из SAMPLING_MODES.
+        n (int | None, optional): Размер выборки для "head" и "reservoir".
+        rate (float | None, optional): Доля ридов для "rate".
+        seed (int | None, optional): Зерно генератора для воспроизводимой выборки.
+        seek (bool, optional): Переходить к случайным местам файла вместо полного чтения.
+        batch_size (int, optional): Размер пакета ридов.
+        progress (Callable[[dict, int, int], None] | None, optional): Как у analyze_file();
+            не вызывается при seek=True.
+        progress_interval (float, optional): Минимальный интервал между вызовами progress.
+        cancel (threading.Event | None, optional): Флаг отмены (объект с методом is_set()).
+        tiles (bool, optional): Вести статистику по тайлам Illumina.
+
+    Returns:
+        FastqStats: Статистика по выборке.
+
+    Raises:
+        ValueError: При неизвестном режиме или недопустимых n, rate.
+        AnalysisCancelled: Если анализ отменён (done_ranges всегда пуст).
+    """
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {mode!r}")
+    if mode == "rate" and (rate is None or not 0 < rate <= 1):
+        raise ValueError(f"rate must be in (0, 1], got {rate}")
+    if mode != "rate" and (n is None or n <= 0):
+        raise ValueError(f"n must be positive, got {n}")
+    file_path = str(file_path)
+    total_bytes = os.path.getsize(file_path)
+    # Сжатые файлы не поддерживают переходы: для них выборка строится потоковым чтением
+    seek = seek and mode != "head" and not file_path.endswith(".gz")
+    stats = FastqStats({"mode": mode, "n": n, "rate": rate, "seed": seed, "seek": seek}, tiles=tiles)
+
+    with FastqReader(
+        file_path, engine="binary", quality_format="bytes", phred_offset="auto"
+    ) as reader:
+        if seek:
+            if mode == "rate":
+                n = max(1, round(rate * reader.estimate_record_count()))
+            for batch in reader.sample_by_seeking(n, seed):
+                if cancel is not None and cancel.is_set():
+                    raise AnalysisCancelled(stats, [])
+                stats.update(batch)
+            return stats
+
+        reservoir = ReservoirSampler(n, seed) if mode == "reservoir" else None
+        sampler = BernoulliSampler(rate, seed) if mode == "rate" else None
+        batches = reader.head_batches(n, batch_size) if mode == "head" else reader.read_batches(batch_size)
+        last_report = time.monotonic()
+        for batch in batches:
+            if cancel is not None and cancel.is_set():
+                raise AnalysisCancelled(_with_reservoir(stats, reservoir), [])
+            if reservoir is not None:
+                reservoir.add(batch)
+            else:
+                stats.update(sampler.sample(batch) if sampler is not None else batch)
+            if progress is not None and time.monotonic() - last_report >= progress_interval:
+                progress(
+                    _with_reservoir(stats, reservoir).to_dict(), reader.bytes_consumed(), total_bytes
+                )
+                last_report = time.monotonic()
+    return _with_reservoir(stats, reservoir)
+
+
+def _with_reservoir(stats: FastqStats, reservoir: ReservoirSampler | None) -> FastqStats:
+    """
+    Возвращает статистику по текущему содержимому резервуара (или stats без резервуара).
+
+    Args:
+        stats (FastqStats): Пустой накопитель с параметрами выборки.
+        reservoir (ReservoirSampler | None): Резервуар выборки.
+
+    Returns:
+        FastqStats: Статистика выборки.
+    """
+    if reservoir is None:
+        return stats
+    result = stats.copy()
+    result.update(reservoir.result())
+    return result
+
+
+def analyze_pair(
+    file_path: str | Path,
+    mate_path: str | Path | None = None,
+    batch_size: int = FastqReader.DEFAULT_BATCH_SIZE,
+    gzip_threads: int = 0,
+    cancel=None,
+) -> PairedFastqStats:
+    """
+    Считает статистику парных ридов за один синхронный проход по R1 и R2.
+
+    Args:
+        file_path (str | Path): Файл R1 или чередующийся файл.
+        mate_path (str | Path | None, optional): Файл R2; None — чередующийся файл.
+        batch_size (int, optional): Размер пакета ридов.
+        gzip_threads (int, optional): Потоки фоновой распаковки для каждого .gz-файла.
+        cancel (threading.Event | None, optional): Флаг отмены (объект с методом is_set()).
+
+    Returns:
+        PairedFastqStats: Статистика пар.
+
+    Raises:
+        ValueError: При нарушении формата, несовпадении идентификаторов или числа ридов.
+        AnalysisCancelled: Если анализ отменён (stats — статистика R1, done_ranges пуст).
+    """
+    stats = PairedFastqStats()
+    with PairedFastqReader(
+        file_path, mate_path, phred_offset="auto", gzip_threads=gzip_threads
+    ) as reader:
+        for batch1, batch2 in reader.read_batches(batch_size):
+            if cancel is not None and cancel.is_set():
+                raise AnalysisCancelled(stats.r1, [])
+            stats.update(batch1, batch2)
+    return stats
@@ -0,0 +1,308 @@
+import numpy as np
+
+from record import SequenceRecordBatch
+
+# 2-битный код основания; прочие символы (N и т. п.) получают INVALID_CODE
+INVALID_CODE = 4
+_NUCLEOTIDE_CODES = np.full(256, INVALID_CODE, dtype=np.uint8)
+for _code, _base in enumerate("ACGT"):
+    _NUCLEOTIDE_CODES[ord(_base)] = _NUCLEOTIDE_CODES[ord(_base.lower())] = _code
+
+# Адаптеры, которые ищет FastQC (по 12 bp)
+ADAPTERS = {
+    "Illumina Universal": "AGATCGGAAGAG",
+    "Illumina Small RNA 3'": "TGGAATTCTCGG",
+    "Illumina Small RNA 5'": "GATCGTCGGACT",
+    "Nextera Transposase": "CTGTCTCTTATA",
+    "PolyA": "AAAAAAAAAAAA",
+    "PolyG": "GGGGGGGGGGGG",
+}
+ADAPTER_LENGTH = 12
+
+
+def encode_kmer(kmer: str) -> int:
+    """
+    Кодирует k-мер в целое число по 2 бита на основание (A=0, C=1, G=2, T=3).
+
+    Args:
+        kmer (str): Последовательность из A, C, G, T.
+
+    Returns:
+        int: Код k-мера.
+
+    Raises:
+        ValueError: Если встречается другой символ.
+
+    >>> encode_kmer("ACGT"), decode_kmer(27, 4)
+    (27, 'ACGT')
+    """
+    code = 0
+    for base in kmer.encode("ascii"):
+        value = int(_NUCLEOTIDE_CODES[base])
+        if value == INVALID_CODE:
+            raise ValueError(f"Invalid nucleotide in k-mer: {kmer!r}")
+        code = code << 2 | value
+    return code
+
+
+def decode_kmer(code: int, k: int) -> str:
+    """
+    Восстанавливает k-мер по коду encode_kmer().
+
+    Args:
+        code (int): Код k-мера.
+        k (int): Длина k-мера.
+
+    Returns:
+        str: Последовательность k-мера.
+    """
+    return "".join("ACGT"[(code >> 2 * (k - 1 - i)) & 3] for i in range(k))
+
+
+def window_codes(codes: np.ndarray, k: int) -> np.ndarray:
+    """
+    Вычисляет 2-битные коды всех окон длины k в массиве кодов оснований.
+
+    Окна собираются удвоением длины (окно 2m — два соседних окна m), поэтому
+    число проходов по массиву растёт как log2(k), а не как k.
+
+    Args:
+        codes (np.ndarray): Коды оснований 0..3.
+        k (int): Длина окна (не больше 32).
+
+    Returns:
+        np.ndarray: Коды окон (uint64) длиной len(codes) - k + 1; i-е окно начинается с codes[i].
+
+    >>> window_codes(np.array([0, 1, 2, 3], dtype=np.uint8), 3).tolist()
+    [6, 27]
+    """
+    power = codes.astype(np.uint64)
+    power_len = 1
+    result = None
+    result_len = 0
+    while k:
+        if k & 1:
+            if result is None:
+                result = power
+            else:
+                size = len(codes) - result_len - power_len + 1
+                result = (result[:size] << np.uint64(2 * power_len)) | power[result_len:result_len + size]
+            result_len += power_len
+        k >>= 1
+        if k:
+            size = len(codes) - 2 * power_len + 1
+            power = (power[:size] << np.uint64(2 * power_len)) | power[power_len:power_len + size]
+            power_len *= 2
+    return result
+
+
+# Таблица поиска адаптеров: коды по возрастанию и номер адаптера для каждого кода,
+# а также флаги 8-буквенных префиксов адаптеров — быстрый отсев окон перед поиском кода
+_ADAPTER_IDS = np.argsort([encode_kmer(sequence) for sequence in ADAPTERS.values()], kind="stable")
+_ADAPTER_CODES = np.array([encode_kmer(sequence) for sequence in ADAPTERS.values()], dtype=np.uint64)[_ADAPTER_IDS]
+_PREFIX_SHIFT = np.uint64(2 * (ADAPTER_LENGTH - 8))
+_ADAPTER_PREFIXES = np.zeros(4 ** 8, dtype=bool)
+_ADAPTER_PREFIXES[(_ADAPTER_CODES >> _PREFIX_SHIFT).astype(np.intp)] = True
+
+
+class KmerStats:
+    """
+    Подсчёт k-меров и позиционное содержание адаптеров за тот же проход, что и FastqStats.
+
+    Основания кодируются 2 битами, k-мер — целым числом, а счётчики хранятся
+    в массиве на 4**k элементов (для k = 7 — 16384), без словарей подстрок.
+    Окна, содержащие N или пересекающие границу рида, не учитываются.
+
+    Поиск адаптеров выполняется по заранее построенной отсортированной таблице
+    кодов: все адаптеры имеют одинаковую длину, поэтому сопоставление со всем
+    набором сводится к одному векторному поиску кода каждого окна, а не к поиску
+    подстроки для каждого адаптера. Как в FastQC, для каждого рида учитывается
+    первая позиция каждого адаптера; доля ридов с адаптером к позиции p —
+    накопленная сумма по позициям.
+
+    Attributes:
+        k (int): Длина k-мера.
+        counts (np.ndarray): Счётчики k-меров по коду (см. encode_kmer()).
+        base_totals (np.ndarray): Число оснований A, C, G, T (для ожидаемых частот).
+        total_reads (int): Число учтённых ридов.
+        adapter_counts (np.ndarray): Матрица адаптер × позиция: число ридов, в которых
+            адаптер впервые встречается в этой позиции.
+    """
+
+    DEFAULT_K = 7
+    MAX_K = 12
+
+    def __init__(self, k: int = DEFAULT_K):
+        """
+        Args:
+            k (int, optional): Длина k-мера от 1 до MAX_K.
+
+        Raises:
+            ValueError: Если k вне диапазона.
+        """
+        if not 1 <= k <= self.MAX_K:
+            raise ValueError(f"k must be between 1 and {self.MAX_K}, got {k}")
+        self.k = k
+        self.counts = np.zeros(4 ** k, dtype=np.int64)
+        self.base_totals = np.zeros(4, dtype=np.int64)
+        self.total_reads = 0
+        self.adapter_counts = np.zeros((len(ADAPTERS), 0), dtype=np.int64)
+
+    def update(self, batch: SequenceRecordBatch):
+        """
+        Добавляет пакет ридов.
+
+        Args:
+            batch (SequenceRecordBatch): Пакет ридов.
+        """
+        if not len(batch):
+            return
+        offsets = np.frombuffer(batch.offsets, dtype=np.uint64).astype(np.intp)
+        lengths = np.diff(offsets)
+        codes = _NUCLEOTIDE_CODES[np.frombuffer(batch.sequences, dtype=np.uint8)]
+        self.total_reads += len(batch)
+        self.base_totals += np.bincount(codes, minlength=INVALID_CODE + 1)[:4]
+        invalid = codes == INVALID_CODE
+        codes[invalid] = 0
+        # Сколько оснований осталось до конца рида от каждой позиции
+        remaining = np.repeat(offsets[1:], lengths) - np.arange(len(codes))
+        invalid_before = np.concatenate(([0], np.cumsum(invalid)))
+
+        if len(codes) >= self.k:
+            kmers = window_codes(codes, self.k)
+            size = len(kmers)
+            valid = (remaining[:size] >= self.k) & (invalid_before[self.k:] == invalid_before[:size])
+            self.counts += np.bincount(kmers[valid].astype(np.intp), minlength=len(self.counts))
+
+        max_len = int(lengths.max())
+        if max_len > self.adapter_counts.shape[1]:
+            self.adapter_counts = np.pad(self.adapter_counts, ((0, 0), (0, max_len - self.adapter_counts.shape[1])))
+        if len(codes) < ADAPTER_LENGTH:
+            return
+        windows = window_codes(codes, ADAPTER_LENGTH)
+        candidates = np.flatnonzero(_ADAPTER_PREFIXES[(windows >> _PREFIX_SHIFT).astype(np.intp)])
+        windows = windows[candidates]
+        found = np.minimum(np.searchsorted(_ADAPTER_CODES, windows), len(_ADAPTER_CODES) - 1)
+        matched = (
+            (_ADAPTER_CODES[found] == windows)
+            & (remaining[candidates] >= ADAPTER_LENGTH)
+            & (invalid_before[candidates + ADAPTER_LENGTH] == invalid_before[candidates])
+        )
+        hits = candidates[matched]
+        if not len(hits):
+            return
+        adapters = _ADAPTER_IDS[found[matched]]
+        reads = np.searchsorted(offsets, hits, side="right") - 1
+        # Окна идут по возрастанию позиции, поэтому первое вхождение пары (рид, адаптер) — самое левое
+        _, first = np.unique(reads * len(ADAPTERS) + adapters, return_index=True)
+        positions = hits[first] - offsets[reads[first]]
+        np.add.at(self.adapter_counts, (adapters[first], positions), 1)
+
+    def merge(self, other: "KmerStats") -> "KmerStats":
+        """
+        Добавляет счётчики другой части файла.
+
+        Args:
+            other (KmerStats): Счётчики с тем же k.
+
+        Returns:
+            KmerStats: Текущий объект.
+
+        Raises:
+            ValueError: Если длины k-меров различаются.
+        """
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge k-mer counts with k={other.k} into k={self.k}")
+        self.counts += other.counts
+        self.base_totals += other.base_totals
+        self.total_reads += other.total_reads
+        size = other.adapter_counts.shape[1]
+        if size > self.adapter_counts.shape[1]:
+            self.adapter_counts = np.pad(self.adapter_counts, ((0, 0), (0, size - self.adapter_counts.shape[1])))
+        self.adapter_counts[:, :size] += other.adapter_counts
+        return self
+
+    def top_kmers(self, limit: int = 20) -> list[dict]:
+        """
+        Возвращает самые частые k-меры и их обогащение относительно ожидаемого
+        по составу оснований.
+
+        Args:
+            limit (int, optional): Число k-меров.
+
+        Returns:
+            list[dict]: "kmer", "count" и "ratio" (наблюдаемое / ожидаемое) по убыванию count.
+        """
+        total = int(self.counts.sum())
+        if not total:
+            return []
+        frequencies = self.base_totals / max(int(self.base_totals.sum()), 1)
+        top = np.argsort(self.counts, kind="stable")[::-1][:limit]
+        result = []
+        for code in top.tolist():
+            if not self.counts[code]:
+                break
+            kmer = decode_kmer(code, self.k)
+            expected = total * np.prod([frequencies["ACGT".index(base)] for base in kmer])
+            result.append({
+                "kmer": kmer,
+                "count": int(self.counts[code]),
+                "ratio": float(self.counts[code] / expected) if expected else float("inf"),
+            })
+        return result
+
+    def adapter_content(self) -> dict[str, list[float]]:
+        """
+        Вычисляет накопленную долю ридов с адаптером по позициям.
+
+        Returns:
+            dict[str, list[float]]: Название адаптера -> процент ридов, в которых адаптер
+                начинается не дальше данной позиции.
+        """
+        cumulative = np.cumsum(self.adapter_counts, axis=1) / max(self.total_reads, 1) * 100
+        return {name: cumulative[i].tolist() for i, name in enumerate(ADAPTERS)}
+
+    def to_dict(self) -> dict:
+        """
+        Формирует словарь результатов.
+
+        Returns:
+            dict: "k", "top_kmers" (см. top_kmers()) и "adapters" (см. adapter_content()).
+        """
+        return {"k": self.k, "top_kmers": self.top_kmers(), "adapters": self.adapter_content()}
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Возвращает состояние в виде массивов для сохранения в .npz (см. FastqStats.save()).
+
+        Returns:
+            dict[str, np.ndarray]: Именованные массивы.
+        """
+        return {
+            "kmer_counts": self.counts,
+            "kmer_totals": np.concatenate((self.base_totals, [self.total_reads])),
+            "adapter_counts": self.adapter_counts,
+        }
+
+    @classmethod
+    def from_arrays(cls, data) -> "KmerStats":
+        """
+        Восстанавливает состояние, сохранённое через to_arrays().
+
+        Args:
+            data (Mapping[str, np.ndarray]): Массивы (например, открытый архив .npz).
+
+        Returns:
+            KmerStats: Восстановленные счётчики.
+
+        Raises:
+            KeyError: Если массивов нет (архив сохранён старой версией).
+        """
+        counts = data["kmer_counts"]
+        stats = cls(int(np.log2(len(counts))) // 2)
+        stats.counts = counts
+        totals = data["kmer_totals"]
+        stats.base_totals = totals[:4].copy()
+        stats.total_reads = int(totals[4])
+        stats.adapter_counts = data["adapter_counts"]
+        return stats
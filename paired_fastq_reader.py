@@ -0,0 +1,262 @@
+from pathlib import Path
+from typing import Iterator
+
+from abstract import SequenceReader
+from fastq_reader import FastqReader
+from record import SequenceRecord, SequenceRecordBatch
+
+
+class PairedFastqReader(SequenceReader):
+    """
+    Синхронное чтение парных ридов (R1/R2) из двух FASTQ-файлов или одного чередующегося.
+
+    Оба файла читаются пакетами (движок "binary" или "mmap" FastqReader), пакеты
+    выравниваются по числу ридов, так что пары формируются без Python-цикла
+    по отдельным записям. Для каждой пары проверяется совпадение идентификаторов
+    с учётом суффиксов "/1" и "/2"; разное число ридов в файлах считается ошибкой.
+
+    В чередующемся (interleaved) файле R1 и R2 каждой пары идут подряд.
+
+    Attributes:
+        filepath (Path): Путь к файлу R1 (или к чередующемуся файлу).
+        mate_filepath (Path | None): Путь к файлу R2 или None для чередующегося файла.
+        engine (str): Движок чтения FastqReader ("binary" или "mmap").
+        check_ids (bool): Проверять совпадение идентификаторов пар.
+    """
+
+    ENGINES = ("binary", "mmap")
+    MATE_SUFFIXES = ("/1", "/2")
+
+    def __init__(
+        self,
+        filepath: str | Path,
+        mate_filepath: str | Path | None = None,
+        engine: str = "binary",
+        chunk_size: int = FastqReader.DEFAULT_CHUNK_SIZE,
+        phred_offset: int | str = 33,
+        gzip_threads: int = 0,
+        check_ids: bool = True,
+    ):
+        """
+        Инициализирует парный ридер.
+
+        Args:
+            filepath (str | Path): Файл R1 или чередующийся файл.
+            mate_filepath (str | Path | None, optional): Файл R2; None — чередующийся файл.
+            engine (str, optional): "binary" (по умолчанию) или "mmap".
+            chunk_size (int, optional): Размер блока чтения в байтах.
+            phred_offset (int | str, optional): 33, 64 или "auto" (определяется по файлу R1).
+            gzip_threads (int, optional): Потоки фоновой распаковки для каждого .gz-файла.
+            check_ids (bool, optional): Проверять совпадение идентификаторов пар.
+
+        Raises:
+            ValueError: Если указан неподдерживаемый движок или параметры FastqReader неверны.
+        """
+        super().__init__(filepath)
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unsupported engine for paired reading: {engine!r}")
+        self.mate_filepath = Path(mate_filepath) if mate_filepath is not None else None
+        self.engine = engine
+        self.check_ids = check_ids
+        if phred_offset == "auto":
+            phred_offset = FastqReader(filepath).detect_phred_offset()
+        options = dict(
+            engine=engine,
+            chunk_size=chunk_size,
+            quality_format="bytes",
+            phred_offset=phred_offset,
+            gzip_threads=gzip_threads,
+        )
+        self._readers = [FastqReader(filepath, **options)]
+        if self.mate_filepath is not None:
+            self._readers.append(FastqReader(self.mate_filepath, **options))
+
+    @property
+    def interleaved(self) -> bool:
+        """True, если пары читаются из одного чередующегося файла."""
+        return self.mate_filepath is None
+
+    def __enter__(self):
+        """
+        Открывает файлы для чтения.
+
+        Returns:
+            PairedFastqReader: Текущий экземпляр.
+        """
+        for reader in self._readers:
+            reader._open()
+        return self
+
+    def close(self):
+        """
+        Закрывает все открытые файлы.
+        """
+        for reader in self._readers:
+            reader.close()
+
+    def read(self, quality_as_list: bool = False) -> Iterator[tuple[SequenceRecord, SequenceRecord]]:
+        """
+        Итеративно читает пары ридов.
+
+        Args:
+            quality_as_list (bool, optional): Возвращать качество списком int вместо bytes.
+
+        Yields:
+            tuple[SequenceRecord, SequenceRecord]: Рид R1 и рид R2 одной пары.
+
+        Raises:
+            ValueError: При нарушении формата FASTQ, несовпадении идентификаторов
+                или разном числе ридов R1 и R2.
+        """
+        for batch1, batch2 in self.read_batches():
+            yield from zip(batch1.records(quality_as_list), batch2.records(quality_as_list))
+
+    def read_batches(
+        self, batch_size: int = FastqReader.DEFAULT_BATCH_SIZE
+    ) -> Iterator[tuple[SequenceRecordBatch, SequenceRecordBatch]]:
+        """
+        Итеративно читает пары пакетов одинаковой длины: i-й рид первого пакета —
+        пара i-го рида второго.
+
+        Args:
+            batch_size (int, optional): Максимальное число прочитанных ридов в пакете
+                (для чередующегося файла — записей, т. е. двух мейтов на пару).
+
+        Yields:
+            tuple[SequenceRecordBatch, SequenceRecordBatch]: Пакеты R1 и R2.
+
+        Raises:
+            ValueError: При нарушении формата FASTQ, несовпадении идентификаторов
+                или разном числе ридов R1 и R2.
+        """
+        pairs = self._interleaved_batches(batch_size) if self.interleaved else self._aligned_batches(batch_size)
+        position = 0
+        for batch1, batch2 in pairs:
+            if self.check_ids:
+                self._check_mate_ids(batch1.ids, batch2.ids, position)
+            position += len(batch1)
+            yield batch1, batch2
+
+    def _aligned_batches(self, batch_size: int) -> Iterator[tuple[SequenceRecordBatch, SequenceRecordBatch]]:
+        """
+        Читает два файла синхронно, выравнивая пакеты по числу ридов.
+
+        Args:
+            batch_size (int): Максимальное число ридов в пакете.
+
+        Yields:
+            tuple[SequenceRecordBatch, SequenceRecordBatch]: Пакеты R1 и R2 одинаковой длины.
+
+        Raises:
+            ValueError: Если в одном из файлов риды закончились раньше.
+        """
+        streams = [reader.read_batches(batch_size) for reader in self._readers]
+        pending = [None, None]
+        while True:
+            for side in (0, 1):
+                if pending[side] is None or not len(pending[side]):
+                    pending[side] = next(streams[side], None)
+            first, second = pending
+            if first is None or second is None:
+                if first is not None or second is not None:
+                    raise ValueError("R1 and R2 files contain different numbers of reads")
+                return
+            count = min(len(first), len(second))
+            yield self._take(pending, 0, count), self._take(pending, 1, count)
+
+    @staticmethod
+    def _take(pending: list, side: int, count: int) -> SequenceRecordBatch:
+        """
+        Забирает первые count ридов из отложенного пакета стороны side.
+
+        Args:
+            pending (list): Отложенные пакеты R1 и R2.
+            side (int): 0 для R1, 1 для R2.
+            count (int): Число ридов.
+
+        Returns:
+            SequenceRecordBatch: Первые count ридов; остаток остаётся в pending.
+        """
+        batch = pending[side]
+        if count == len(batch):
+            pending[side] = None
+            return batch
+        pending[side] = batch.select(range(count, len(batch)))
+        return batch.select(range(count))
+
+    def _interleaved_batches(
+        self, batch_size: int
+    ) -> Iterator[tuple[SequenceRecordBatch, SequenceRecordBatch]]:
+        """
+        Разделяет записи чередующегося файла на R1 (чётные) и R2 (нечётные).
+
+        Args:
+            batch_size (int): Максимальное число записей в прочитанном пакете.
+
+        Yields:
+            tuple[SequenceRecordBatch, SequenceRecordBatch]: Пакеты R1 и R2 одинаковой длины.
+
+        Raises:
+            ValueError: Если число записей в файле нечётно.
+        """
+        carry = None
+        for batch in self._readers[0].read_batches(batch_size):
+            if carry is not None:
+                batch = SequenceRecordBatch.concat([carry, batch])
+                carry = None
+            if len(batch) % 2:
+                carry = batch.select([len(batch) - 1])
+                batch = batch.select(range(len(batch) - 1))
+            if len(batch):
+                yield batch.select(range(0, len(batch), 2)), batch.select(range(1, len(batch), 2))
+        if carry is not None:
+            raise ValueError("Interleaved FASTQ file contains an odd number of reads")
+
+    @classmethod
+    def _check_mate_ids(cls, ids1: list[str], ids2: list[str], position: int):
+        """
+        Проверяет, что идентификаторы пар совпадают (без суффиксов "/1" и "/2").
+
+        Суффикс R1 может быть только "/1", суффикс R2 — только "/2".
+
+        Args:
+            ids1 (list[str]): Идентификаторы R1.
+            ids2 (list[str]): Идентификаторы R2.
+            position (int): Номер первой пары пакета (для сообщения об ошибке).
+
+        Raises:
+            ValueError: При первом несовпадении.
+        """
+        if ids1 == ids2 and not any(seq_id.endswith(cls.MATE_SUFFIXES) for seq_id in ids1):
+            return
+        names1 = [cls.mate_name(seq_id, 1) for seq_id in ids1]
+        names2 = [cls.mate_name(seq_id, 2) for seq_id in ids2]
+        if names1 == names2 and None not in names1:
+            return
+        for i, (name1, name2) in enumerate(zip(names1, names2)):
+            if name1 is None or name1 != name2:
+                raise ValueError(
+                    f"Mate IDs do not match at pair {position + i}: {ids1[i]!r} vs {ids2[i]!r}"
+                )
+
+    @classmethod
+    def mate_name(cls, seq_id: str, mate: int) -> str | None:
+        """
+        Возвращает имя пары: идентификатор без суффикса мейта "/1" или "/2".
+
+        Args:
+            seq_id (str): Идентификатор рида.
+            mate (int): Номер мейта (1 — R1, 2 — R2).
+
+        Returns:
+            str | None: Идентификатор без суффикса или None, если у рида суффикс
+            другого мейта (например, "/2" у R1).
+
+        >>> PairedFastqReader.mate_name("SRR001.5/1", 1), PairedFastqReader.mate_name("SRR001.5", 2)
+        ('SRR001.5', 'SRR001.5')
+        >>> PairedFastqReader.mate_name("SRR001.5/1", 2) is None
+        True
+        """
+        if seq_id.endswith(cls.MATE_SUFFIXES):
+            return seq_id[:-2] if seq_id[-1] == str(mate) else None
+        return seq_id
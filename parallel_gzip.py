@@ -0,0 +1,452 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import io
+import os
+import queue
+import struct
+import threading
+import zlib
+
+# wbits для zlib, соответствующий формату gzip (заголовок и CRC проверяются zlib)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class ParallelGzipReader(io.RawIOBase):
+    """
+    Файловый объект для чтения .gz, распаковывающий данные в фоновом потоке.
+
+    Распаковка (inflate) выполняется отдельным потоком-производителем, который
+    передаёт распакованные блоки читателю через ограниченную очередь. zlib
+    освобождает GIL на время распаковки, поэтому разбор уже распакованных данных
+    идёт параллельно с распаковкой следующих.
+
+    Для файлов BGZF (bgzip), где размер каждого gzip-члена записан в заголовке,
+    члены распаковываются параллельно в пуле потоков с сохранением порядка.
+    Обычные (в том числе многочленные) gzip-файлы распаковываются
+    последовательно в одном фоновом потоке.
+
+    Attributes:
+        filepath (Path): Путь к сжатому файлу.
+        threads (int): Число потоков распаковки для BGZF.
+        is_bgzf (bool): True, если файл распознан как BGZF.
+    """
+
+    INPUT_CHUNK_SIZE = 1024 * 1024
+    BGZF_BLOCKS_PER_TASK = 16
+
+    def __init__(self, filepath: str | Path, threads: int | None = None, queue_size: int = 16):
+        """
+        Открывает файл и запускает фоновый поток распаковки.
+
+        Args:
+            filepath (str | Path): Путь к .gz-файлу.
+            threads (int | None, optional): Число потоков распаковки BGZF;
+                по умолчанию — число ядер.
+            queue_size (int, optional): Максимальное число распакованных блоков в очереди.
+
+        Raises:
+            OSError: Если файл не может быть открыт.
+        """
+        super().__init__()
+        self.filepath = Path(filepath)
+        self.threads = max(1, threads or os.cpu_count() or 1)
+        self._raw = open(self.filepath, "rb")
+        self.is_bgzf = self._read_bgzf_block_size(self._raw.read(18)) is not None
+        self._raw.seek(0)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._stop = threading.Event()
+        self._pending = memoryview(b"")
+        self._finished = False
+        target = self._produce_bgzf if self.is_bgzf else self._produce_stream
+        self._thread = threading.Thread(target=self._run, args=(target,), daemon=True)
+        self._thread.start()
+
+    @property
+    def fileobj(self):
+        """
+        Исходный сжатый файл (как атрибут fileobj у gzip.GzipFile).
+
+        Его позиция показывает, сколько сжатых байт уже прочитано.
+        """
+        return self._raw
+
+    def readable(self) -> bool:
+        """Файл доступен только для чтения."""
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Возвращает следующую порцию распакованных данных.
+
+        В отличие от обычного файла может вернуть меньше size байт, не достигнув конца;
+        пустой результат означает конец файла.
+
+        Args:
+            size (int, optional): Максимальное число байт; -1 — прочитать всё до конца.
+
+        Returns:
+            bytes: Распакованные данные или b"" в конце файла.
+
+        Raises:
+            OSError, EOFError, zlib.error: Ошибка, возникшая в потоке распаковки.
+        """
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(self.INPUT_CHUNK_SIZE), b""))
+        if not self._pending and not self._next_block():
+            return b""
+        data = self._pending[:size]
+        self._pending = self._pending[size:]
+        return bytes(data)
+
+    def readinto(self, buffer) -> int:
+        """
+        Копирует следующую порцию распакованных данных в buffer (для io.BufferedReader).
+
+        Args:
+            buffer (bytearray | memoryview): Буфер назначения.
+
+        Returns:
+            int: Число записанных байт (0 в конце файла).
+        """
+        if not self._pending and not self._next_block():
+            return 0
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+    def close(self):
+        """
+        Останавливает поток распаковки и закрывает файл.
+        """
+        if self.closed:
+            return
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        self._raw.close()
+        super().close()
+
+    def _next_block(self) -> bool:
+        """
+        Забирает из очереди следующий распакованный блок.
+
+        Returns:
+            bool: False, если данные закончились.
+
+        Raises:
+            Exception: Ошибка, переданная потоком распаковки.
+        """
+        while not self._finished:
+            item = self._queue.get()
+            if item is None:
+                self._finished = True
+            elif isinstance(item, BaseException):
+                self._finished = True
+                raise item
+            elif item:
+                self._pending = memoryview(item)
+                return True
+        return False
+
+    def _put(self, item) -> bool:
+        """
+        Помещает элемент в очередь, периодически проверяя запрос на остановку.
+
+        Args:
+            item: Распакованный блок, исключение или None (конец данных).
+
+        Returns:
+            bool: False, если чтение было остановлено.
+        """
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, target):
+        """
+        Тело фонового потока: запускает распаковку и сигнализирует о её завершении.
+
+        Args:
+            target (callable): Метод распаковки (_produce_stream или _produce_bgzf).
+        """
+        try:
+            target()
+        except BaseException as e:
+            self._put(e)
+            return
+        self._put(None)
+
+    def _produce_stream(self):
+        """
+        Последовательно распаковывает обычный (возможно, многочленный) gzip-поток.
+
+        Raises:
+            EOFError: Если поток оборван до маркера конца gzip-члена.
+        """
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        started = False
+        while not self._stop.is_set():
+            data = self._raw.read(self.INPUT_CHUNK_SIZE)
+            if not data:
+                break
+            while data:
+                started = True
+                if not self._put(decompressor.decompress(data)):
+                    return
+                if not decompressor.eof:
+                    break
+                data = decompressor.unused_data.lstrip(b"\x00")
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+                started = False
+        if started and not decompressor.eof:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+    def _produce_bgzf(self):
+        """
+        Распаковывает файл BGZF, обрабатывая группы членов параллельно в пуле потоков.
+
+        Члены читаются последовательно по размеру из заголовка (без распаковки),
+        группируются и распаковываются пулом; результаты передаются в очередь
+        в исходном порядке. Число задач в работе ограничено, чтобы не опережать
+        читателя больше чем на размер очереди.
+
+        Raises:
+            EOFError: Если файл оборван посреди члена.
+        """
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for blocks in self._iter_bgzf_groups():
+                in_flight.append(pool.submit(_inflate_members, blocks))
+                if len(in_flight) >= self.threads * 2:
+                    if not self._put(in_flight.popleft().result()):
+                        return
+            while in_flight:
+                if not self._put(in_flight.popleft().result()):
+                    return
+
+    def _iter_bgzf_groups(self):
+        """
+        Нарезает сжатый файл BGZF на группы целых членов.
+
+        Yields:
+            list[bytes]: Группа из BGZF_BLOCKS_PER_TASK (или меньше) сжатых членов.
+
+        Raises:
+            EOFError: Если член обрывается раньше указанного в заголовке размера.
+        """
+        group = []
+        while not self._stop.is_set():
+            header = self._raw.read(18)
+            if not header:
+                break
+            block_size = self._read_bgzf_block_size(header)
+            if block_size is None:
+                # Не-BGZF член в конце файла: дочитываем его целиком
+                block = header + self._raw.read()
+            else:
+                block = header + self._raw.read(block_size - len(header))
+                if len(block) < block_size:
+                    raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            group.append(block)
+            if len(group) >= self.BGZF_BLOCKS_PER_TASK:
+                yield group
+                group = []
+        if group:
+            yield group
+
+    @staticmethod
+    def _read_bgzf_block_size(header: bytes) -> int | None:
+        """
+        Извлекает полный размер BGZF-члена из его заголовка.
+
+        Args:
+            header (bytes): Первые 18 байт gzip-члена.
+
+        Returns:
+            int | None: Размер члена в байтах или None, если это не BGZF-заголовок.
+        """
+        if (
+            len(header) < 18
+            or header[:4] != b"\x1f\x8b\x08\x04"
+            or header[12:14] != b"BC"
+            or struct.unpack("<H", header[14:16])[0] != 2
+        ):
+            return None
+        return struct.unpack("<H", header[16:18])[0] + 1
+
+
+class BgzfReader:
+    """
+    Построчное чтение файла BGZF с переходом по виртуальным смещениям (как в htslib).
+
+    Виртуальное смещение — (начало сжатого блока << 16) | позиция в распакованном блоке.
+    seek() распаковывает только блок, к которому выполняется переход, поэтому чтение
+    с произвольного места не требует распаковки файла с начала. Обычные gzip-файлы
+    не поддерживаются: в них нет границ блоков, с которых можно начать распаковку.
+
+    Attributes:
+        filepath (Path): Путь к файлу BGZF.
+    """
+
+    def __init__(self, filepath: str | Path):
+        """
+        Открывает файл и проверяет, что он в формате BGZF.
+
+        Args:
+            filepath (str | Path): Путь к файлу .gz, сжатому bgzip.
+
+        Raises:
+            OSError: Если файл не может быть открыт.
+            ValueError: Если файл не в формате BGZF.
+        """
+        self.filepath = Path(filepath)
+        self._raw = open(self.filepath, "rb")
+        if ParallelGzipReader._read_bgzf_block_size(self._raw.read(18)) is None:
+            self._raw.close()
+            raise ValueError(f"{self.filepath} is not a BGZF file; compress it with bgzip to enable random access")
+        self._block_start = -1
+        self._next_block = 0
+        self._data = b""
+        self._offset = 0
+
+    def _load_block(self, position: int) -> bool:
+        """
+        Распаковывает блок, начинающийся со сжатого смещения position.
+
+        Args:
+            position (int): Смещение начала блока в сжатом файле.
+
+        Returns:
+            bool: False, если position — конец файла.
+
+        Raises:
+            ValueError: Если по смещению нет заголовка BGZF-блока.
+            EOFError: Если блок оборван.
+        """
+        self._raw.seek(position)
+        header = self._raw.read(18)
+        self._block_start = position
+        self._data = b""
+        self._offset = 0
+        if not header:
+            self._next_block = position
+            return False
+        block_size = ParallelGzipReader._read_bgzf_block_size(header)
+        if block_size is None:
+            raise ValueError(f"Invalid BGZF block at offset {position}")
+        block = header + self._raw.read(block_size - len(header))
+        if len(block) < block_size:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+        self._next_block = position + block_size
+        self._data = _inflate(block)
+        return True
+
+    def seek(self, virtual_offset: int):
+        """
+        Переходит к виртуальному смещению, распаковывая только нужный блок.
+
+        Args:
+            virtual_offset (int): Виртуальное смещение (см. tell()).
+        """
+        block = virtual_offset >> 16
+        if block != self._block_start:
+            self._load_block(block)
+        self._offset = virtual_offset & 0xFFFF
+
+    def tell(self) -> int:
+        """
+        Возвращает виртуальное смещение следующего непрочитанного байта.
+
+        Позиция в конце блока записывается как начало следующего блока,
+        поэтому смещение конца строки совпадает со смещением начала следующей.
+
+        Returns:
+            int: Виртуальное смещение.
+        """
+        if self._offset >= len(self._data):
+            return self._next_block << 16
+        return self._block_start << 16 | self._offset
+
+    def readline(self) -> bytes:
+        """
+        Читает строку до символа перевода строки включительно.
+
+        Returns:
+            bytes: Строка или b"" в конце файла.
+        """
+        parts = []
+        while True:
+            if self._offset >= len(self._data):
+                if not self._load_block(self._next_block):
+                    break
+                continue
+            end = self._data.find(b"\n", self._offset)
+            if end < 0:
+                parts.append(self._data[self._offset:])
+                self._offset = len(self._data)
+                continue
+            parts.append(self._data[self._offset:end + 1])
+            self._offset = end + 1
+            break
+        return b"".join(parts)
+
+    def __iter__(self):
+        """Итерирует по строкам файла с текущей позиции."""
+        return iter(self.readline, b"")
+
+    def close(self):
+        """Закрывает сжатый файл."""
+        self._raw.close()
+
+    def __enter__(self):
+        """Возвращает сам объект для использования в with-блоке."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Закрывает файл при выходе из with-блока."""
+        self.close()
+
+
+def _inflate_members(blocks: list[bytes]) -> bytes:
+    """
+    Распаковывает группу независимых gzip-членов.
+
+    Args:
+        blocks (list[bytes]): Сжатые члены, каждый — полный gzip-поток.
+
+    Returns:
+        bytes: Конкатенация распакованных данных.
+    """
+    return b"".join(_inflate(block) for block in blocks)
+
+
+def _inflate(data: bytes) -> bytes:
+    """
+    Распаковывает один или несколько подряд идущих gzip-членов.
+
+    Args:
+        data (bytes): Сжатые данные, состоящие из целых gzip-членов.
+
+    Returns:
+        bytes: Распакованные данные.
+
+    Raises:
+        EOFError: Если последний член оборван.
+    """
+    parts = []
+    while data:
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        parts.append(decompressor.decompress(data))
+        if not decompressor.eof:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+        data = decompressor.unused_data.lstrip(b"\x00")
+    return b"".join(parts)
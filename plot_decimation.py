@@ -0,0 +1,129 @@
+import numpy as np
+
+# Максимальное число точек, передаваемых в один вызов построения графика
+MAX_PLOT_POINTS = 2000
+
+# Первые позиции рида показываются по одной, как в FastQC
+UNGROUPED_POSITIONS = 9
+
+
+def position_groups(length: int, max_groups: int = MAX_PLOT_POINTS) -> np.ndarray:
+    """
+    Разбивает позиции 0..length-1 на группы в стиле FastQC: первые позиции — по одной,
+    далее группы одинаковой ширины из ряда 1, 2, 5, 10, 20, 50, ..., так чтобы групп
+    было не больше max_groups.
+
+    Args:
+        length (int): Число позиций.
+        max_groups (int, optional): Максимальное число групп.
+
+    Returns:
+        np.ndarray: Начала групп по возрастанию (первое — 0).
+
+    >>> position_groups(12, 20).tolist()
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+    >>> position_groups(100, 20).tolist()
+    [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 19, 29, 39, 49, 59, 69, 79, 89, 99]
+    """
+    if length <= max_groups:
+        return np.arange(length)
+    head = min(UNGROUPED_POSITIONS, max_groups // 2)
+    width = 1
+    steps = (2, 2.5, 2)  # 1 -> 2 -> 5 -> 10 -> 20 -> 50 -> ...
+    step = 0
+    while head + -(-(length - head) // width) > max_groups:
+        width = round(width * steps[step % 3])
+        step += 1
+    return np.concatenate((np.arange(head), np.arange(head, length, width)))
+
+
+def min_max_decimate(values, max_points: int = MAX_PLOT_POINTS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Прореживает ряд по позициям с сохранением экстремумов: в каждой группе
+    position_groups() остаются её минимум и максимум (в порядке позиций),
+    так что узкие выбросы не теряются на графике.
+
+    Args:
+        values (Sequence[float]): Значения по позициям (NaN допускаются).
+        max_points (int, optional): Максимальное число точек результата.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Позиции и значения не более чем max_points точек.
+
+    >>> x, y = min_max_decimate([0, 5, 1, 1, 9, 1, 1, 1], 4)
+    >>> x.tolist(), y.tolist()
+    ([0, 2, 4], [0.0, 1.0, 9.0])
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) <= max_points:
+        return np.arange(len(values)), values
+    starts = position_groups(len(values), max_points // 2)
+    ends = np.append(starts[1:], len(values))
+    filled_low = np.where(np.isnan(values), np.inf, values)
+    filled_high = np.where(np.isnan(values), -np.inf, values)
+    # Номера минимума и максимума в каждой группе
+    groups = np.repeat(np.arange(len(starts)), ends - starts)
+    order_low = np.lexsort((filled_low, groups))
+    order_high = np.lexsort((-filled_high, groups))
+    low = order_low[starts]
+    high = order_high[starts]
+    positions = np.unique(np.concatenate((low, high)))
+    return positions, values[positions]
+
+
+def group_mean(values, weights=None, max_groups: int = MAX_PLOT_POINTS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Усредняет значения по группам позиций position_groups() (NaN не учитываются).
+
+    Для долей и средних по основаниям весом служит покрытие позиции, тогда
+    среднее группы совпадает со значением, посчитанным по её суммарным счётчикам.
+
+    Args:
+        values (Sequence[float] | np.ndarray): Значения по позициям; для двумерного
+            массива группируются столбцы.
+        weights (Sequence[float] | None, optional): Вес каждой позиции.
+        max_groups (int, optional): Максимальное число групп.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Начала групп и средние значения (NaN для групп без данных).
+
+    >>> starts, means = group_mean([1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 4, 6], max_groups=10)
+    >>> starts.tolist(), means.tolist()
+    ([0, 1, 2, 3, 4, 5, 7, 9, 11], [1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 3.0, 6.0])
+    """
+    values = np.asarray(values, dtype=float)
+    length = values.shape[-1]
+    weights = np.ones(length) if weights is None else np.asarray(weights, dtype=float)
+    starts = position_groups(length, max_groups)
+    if not length:
+        return starts, values
+    known = ~np.isnan(values)
+    weighted = np.where(known, values * weights, 0.0)
+    totals = np.add.reduceat(weighted, starts, axis=-1)
+    counts = np.add.reduceat(np.where(known, weights, 0.0), starts, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return starts, np.where(counts > 0, totals / counts, np.nan)
+
+
+def histogram_from_counts(
+    values, counts, bins: int = 50
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Строит гистограмму по уже агрегированным парам (значение, число),
+    не разворачивая их в отдельные наблюдения.
+
+    Args:
+        values (Sequence[float]): Значения (например, длины ридов).
+        counts (Sequence[int]): Число наблюдений каждого значения.
+        bins (int, optional): Максимальное число столбцов.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Высоты столбцов и их границы (на одну больше).
+
+    >>> heights, edges = histogram_from_counts([100, 150], [3, 1], bins=2)
+    >>> heights.tolist(), edges.tolist()
+    ([3.0, 1.0], [100.0, 125.0, 150.0])
+    """
+    values = np.asarray(values, dtype=float)
+    bins = max(1, min(bins, len(values), MAX_PLOT_POINTS))
+    return np.histogram(values, bins=bins, weights=np.asarray(counts, dtype=float))
@@ -1,3 +1,11 @@
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import accumulate
+from operator import sub
+from typing import Callable, Iterator
+
+
 class Record:
     """
     Базовый класс для представления биологических записей.
@@ -5,10 +13,16 @@ class Record:
     Содержит общий идентификатор записи, который может использоваться
     в различных форматах (FASTA, FASTQ, SAM, VCF и др.).
 
+    Записи объявляют __slots__: у экземпляров нет словаря атрибутов, поэтому
+    миллионы записей в памяти обходятся заметно дешевле. Подклассы также
+    перечисляют свои атрибуты в __slots__.
+
     Attributes:
         id (str): Уникальный идентификатор записи (например, имя последовательности или координата).
     """
 
+    __slots__ = ("id",)
+
     def __init__(self, id: str):
         """
         Инициализирует базовую запись с заданным идентификатором.
@@ -37,25 +51,299 @@ class SequenceRecord(Record):
     Attributes:
         id (str): Идентификатор последовательности.
         sequence (str): Биологическая последовательность (например, "ATGCGTA").
-        quality (list[int] | None): Список Phred-оценок качества для каждой позиции
-            (только для FASTQ). Для FASTA — None.
+        quality (list[int] | bytes | None): Phred-оценки качества для каждой позиции
+            (только для FASTQ): список int или компактный буфер bytes, где каждый байт —
+            оценка качества (смещение кодировки уже вычтено). Оба представления
+            поддерживают len(), индексацию, итерацию по int и sum(). Для FASTA — None.
     """
 
-    def __init__(self, id: str, sequence: str, quality: list[int] | None = None):
+    __slots__ = ("sequence", "quality")
+
+    def __init__(self, id: str, sequence: str, quality: list[int] | bytes | None = None):
         """
         Инициализирует запись последовательности.
 
         Args:
             id (str): Идентификатор последовательности.
             sequence (str): Строка последовательности (обычно в верхнем регистре).
-            quality (list[int] | None, optional): Список целочисленных оценок качества.
-                По умолчанию None (для FASTA).
+            quality (list[int] | bytes | None, optional): Оценки качества в виде списка int
+                или буфера bytes. По умолчанию None (для FASTA).
         """
         super().__init__(id)
         self.sequence = sequence
         self.quality = quality
 
 
+class SequenceRecordView(SequenceRecord):
+    """
+    Запись последовательности, ссылающаяся на сырые байты файла без копирования.
+
+    Используется при чтении через отображение файла в память (mmap): строки
+    последовательности и качества хранятся как memoryview-срезы отображения
+    и декодируются в str/Phred-оценки только при первом обращении к атрибутам
+    sequence и quality. Пока запись существует, отображение файла остаётся открытым.
+
+    Attributes:
+        id (str): Идентификатор последовательности.
+        sequence_view (memoryview): Сырые байты последовательности (регистр как в файле).
+        quality_view (memoryview | None): Сырые ASCII-байты строки качества.
+        phred_offset (int): Смещение кодировки качества.
+        quality_as_list (bool): Декодировать качество в список int (иначе — в bytes).
+    """
+
+    __slots__ = ("sequence_view", "quality_view", "phred_offset", "quality_as_list", "_sequence", "_quality")
+
+    def __init__(
+        self,
+        id: str,
+        sequence_view: memoryview,
+        quality_view: memoryview | None = None,
+        phred_offset: int = 33,
+        quality_as_list: bool = False,
+    ):
+        """
+        Инициализирует запись-представление.
+
+        Args:
+            id (str): Идентификатор последовательности.
+            sequence_view (memoryview): Срез с байтами последовательности.
+            quality_view (memoryview | None, optional): Срез с байтами качества.
+            phred_offset (int, optional): Смещение кодировки качества (33 или 64).
+            quality_as_list (bool, optional): Возвращать качество списком int.
+        """
+        Record.__init__(self, id)
+        self.sequence_view = sequence_view
+        self.quality_view = quality_view
+        self.phred_offset = phred_offset
+        self.quality_as_list = quality_as_list
+        self._sequence = None
+        self._quality = None
+
+    @property
+    def sequence(self) -> str:
+        """
+        Последовательность в верхнем регистре (декодируется при первом обращении).
+
+        Returns:
+            str: Строка последовательности.
+        """
+        if self._sequence is None:
+            self._sequence = bytes(self.sequence_view).upper().decode("ascii")
+        return self._sequence
+
+    @sequence.setter
+    def sequence(self, value: str):
+        """Заменяет последовательность записи (сырые байты sequence_view не меняются)."""
+        self._sequence = value
+
+    @property
+    def quality(self) -> list[int] | bytes | None:
+        """
+        Phred-оценки качества (декодируются при первом обращении).
+
+        Returns:
+            list[int] | bytes | None: Оценки качества в выбранном представлении.
+
+        Raises:
+            ValueError: Если строка качества содержит символы ниже смещения кодировки
+                или не-ASCII байты.
+        """
+        if self._quality is None and self.quality_view is not None:
+            raw = bytes(self.quality_view)
+            if raw and (min(raw) < self.phred_offset or not raw.isascii()):
+                raise ValueError(f"Invalid quality character for {self.id}")
+            decoded = raw.translate(_phred_table(self.phred_offset))
+            self._quality = list(decoded) if self.quality_as_list else decoded
+        return self._quality
+
+    @quality.setter
+    def quality(self, value: list[int] | bytes | None):
+        """Заменяет оценки качества записи (сырые байты quality_view не меняются)."""
+        self._quality = value
+
+    def release(self):
+        """
+        Материализует sequence и quality и освобождает ссылки на отображение файла.
+        """
+        _ = self.sequence, self.quality
+        self.sequence_view.release()
+        if self.quality_view is not None:
+            self.quality_view.release()
+
+
+class SequenceRecordBatch:
+    """
+    Колоночное представление пакета последовательностей (например, N ридов FASTQ).
+
+    Вместо отдельного объекта SequenceRecord на каждый рид пакет хранит
+    все последовательности и все строки качества в двух сплошных буферах,
+    а границы ридов — в массиве смещений. Это позволяет агрегировать длины,
+    GC-состав и качество по позициям (в том числе через numpy.frombuffer)
+    без создания Python-объектов на каждый рид.
+
+    Attributes:
+        ids (list[str]): Идентификаторы ридов.
+        sequences (bytes): Конкатенация последовательностей (в верхнем регистре).
+        qualities (bytes | None): Конкатенация Phred-оценок качества (смещение уже вычтено,
+            один байт на позицию). Для FASTA — None.
+        offsets (array): Массив array('Q') длины len(ids) + 1; рид i занимает
+            срез [offsets[i], offsets[i + 1]) в обоих буферах.
+        end_offset (int | None): Позиция в исходном файле сразу после последнего рида
+            пакета, если она известна (иначе None).
+    """
+
+    __slots__ = ("ids", "sequences", "qualities", "offsets", "end_offset")
+
+    def __init__(
+        self,
+        ids: list[str],
+        sequences: bytes,
+        qualities: bytes | None,
+        offsets: array,
+        end_offset: int | None = None,
+    ):
+        """
+        Инициализирует пакет последовательностей.
+
+        Args:
+            ids (list[str]): Идентификаторы ридов.
+            sequences (bytes): Конкатенация последовательностей.
+            qualities (bytes | None): Конкатенация Phred-оценок качества или None.
+            offsets (array): Границы ридов в буферах, len(ids) + 1 элементов.
+            end_offset (int | None, optional): Позиция в файле после последнего рида пакета.
+        """
+        self.ids = ids
+        self.sequences = sequences
+        self.qualities = qualities
+        self.offsets = offsets
+        self.end_offset = end_offset
+
+    def __len__(self) -> int:
+        """
+        Возвращает количество ридов в пакете.
+
+        Returns:
+            int: Число ридов.
+        """
+        return len(self.ids)
+
+    def __getitem__(self, index: int | slice) -> "SequenceRecord | SequenceRecordBatch":
+        """
+        Материализует один рид пакета в виде SequenceRecord.
+
+        Срез возвращает новый пакет (см. select()), не создавая записей.
+
+        Args:
+            index (int | slice): Номер рида (поддерживаются отрицательные индексы) или срез.
+
+        Returns:
+            SequenceRecord | SequenceRecordBatch: Запись с качеством в виде bytes
+                или пакет из ридов среза.
+
+        Raises:
+            IndexError: Если индекс вне диапазона.
+        """
+        if isinstance(index, slice):
+            return self.select(range(*index.indices(len(self.ids))))
+        if index < 0:
+            index += len(self.ids)
+        if not 0 <= index < len(self.ids):
+            raise IndexError("batch index out of range")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        quality = self.qualities[start:end] if self.qualities is not None else None
+        return SequenceRecord(self.ids[index], self.sequences[start:end].decode("ascii"), quality)
+
+    def __iter__(self) -> Iterator[SequenceRecord]:
+        """
+        Итерирует по ридам пакета, материализуя их в SequenceRecord.
+
+        Yields:
+            SequenceRecord: Очередная запись с качеством в виде bytes.
+        """
+        return self.records()
+
+    def records(self, quality_as_list: bool = False) -> Iterator[SequenceRecord]:
+        """
+        Итерирует по ридам пакета, материализуя их в SequenceRecord.
+
+        Буфер последовательностей декодируется в строку один раз на пакет.
+
+        Args:
+            quality_as_list (bool, optional): Возвращать качество списком int вместо bytes.
+
+        Yields:
+            SequenceRecord: Очередная запись пакета.
+        """
+        sequences = self.sequences.decode("ascii")
+        qualities = self.qualities
+        offsets = self.offsets
+        for i, seq_id in enumerate(self.ids):
+            start, end = offsets[i], offsets[i + 1]
+            if qualities is None:
+                quality = None
+            elif quality_as_list:
+                quality = list(qualities[start:end])
+            else:
+                quality = qualities[start:end]
+            yield SequenceRecord(seq_id, sequences[start:end], quality)
+
+    def lengths(self) -> list[int]:
+        """
+        Возвращает длины всех ридов пакета.
+
+        Returns:
+            list[int]: Длина каждого рида в порядке следования.
+        """
+        offsets = self.offsets
+        return list(map(sub, offsets[1:], offsets[:-1]))
+
+    def select(self, indices) -> "SequenceRecordBatch":
+        """
+        Возвращает новый пакет из ридов с указанными номерами (в заданном порядке).
+
+        Args:
+            indices (Iterable[int]): Номера ридов пакета.
+
+        Returns:
+            SequenceRecordBatch: Пакет из выбранных ридов (end_offset не сохраняется).
+        """
+        offsets = self.offsets
+        spans = [(offsets[i], offsets[i + 1]) for i in indices]
+        return SequenceRecordBatch(
+            [self.ids[i] for i in indices],
+            b"".join([self.sequences[start:end] for start, end in spans]),
+            None if self.qualities is None
+            else b"".join([self.qualities[start:end] for start, end in spans]),
+            array("Q", accumulate((end - start for start, end in spans), initial=0)),
+        )
+
+    @classmethod
+    def concat(cls, batches: list["SequenceRecordBatch"]) -> "SequenceRecordBatch":
+        """
+        Объединяет несколько пакетов в один.
+
+        Args:
+            batches (list[SequenceRecordBatch]): Пакеты в порядке следования.
+
+        Returns:
+            SequenceRecordBatch: Объединённый пакет (end_offset берётся из последнего пакета).
+        """
+        ids = []
+        offsets = array("Q", [0])
+        for batch in batches:
+            ids.extend(batch.ids)
+            base = offsets[-1]
+            offsets.extend(base + offset for offset in batch.offsets[1:])
+        has_quality = all(batch.qualities is not None for batch in batches)
+        return cls(
+            ids,
+            b"".join(batch.sequences for batch in batches),
+            b"".join(batch.qualities for batch in batches) if has_quality else None,
+            offsets,
+            batches[-1].end_offset if batches else None,
+        )
+
+
 class AlignmentRecord(Record):
     """
     Класс для представления выравнивания рида на референсный геном (формат SAM/BAM).
@@ -68,12 +356,19 @@ class AlignmentRecord(Record):
         start (int): Начальная позиция выравнивания (1-based или 0-based в зависимости от контекста;
             здесь используется 0-based для внутренней логики).
         end (int): Конечная позиция выравнивания (вычисляется на основе CIGAR, по умолчанию = start).
-        cigar (str): Строка CIGAR, описывающая операции выравнивания (например, "100M").
-        mapq (int): Качество отображения (MAPQ), целое число от 0 до 255.
+        cigar (str | None): Строка CIGAR, описывающая операции выравнивания (например, "100M");
+            None, если поле не прочитано (см. SamReader, параметр fields).
+        mapq (int | None): Качество отображения (MAPQ), целое число от 0 до 255;
+            None, если поле не прочитано.
         flag (int): Флаг выравнивания (битовое поле, по умолчанию 0).
+        sequence (str | None): Последовательность рида (SEQ), если она прочитана.
+        quality (bytes | None): Phred-оценки качества (QUAL, смещение уже вычтено), если они прочитаны.
+        tags (dict | None): Необязательные поля SAM (например, {"NM": 0}), если они прочитаны.
     """
 
-    def __init__(self, id: str, chrom: str, start: int, cigar: str, mapq: int):
+    __slots__ = ("chrom", "start", "end", "cigar", "mapq", "flag", "sequence", "quality", "tags")
+
+    def __init__(self, id: str, chrom: str, start: int, cigar: str | None, mapq: int | None):
         """
         Инициализирует запись выравнивания.
 
@@ -81,8 +376,8 @@ class AlignmentRecord(Record):
             id (str): Идентификатор рида.
             chrom (str): Название хромосомы или референса.
             start (int): Начальная позиция выравнивания (обычно 0-based).
-            cigar (str): CIGAR-строка (например, "50M2D30M").
-            mapq (int): Качество отображения (MAPQ score).
+            cigar (str | None): CIGAR-строка (например, "50M2D30M") или None, если не прочитана.
+            mapq (int | None): Качество отображения (MAPQ score) или None, если не прочитано.
         """
         super().__init__(id)
         self.chrom = chrom
@@ -91,6 +386,9 @@ class AlignmentRecord(Record):
         self.mapq = mapq
         self.end: int = start  # Может быть обновлено позже на основе CIGAR
         self.flag: int = 0     # Может быть установлен при парсинге SAM
+        self.sequence: str | None = None
+        self.quality: bytes | None = None
+        self.tags: dict | None = None
 
     def __repr__(self) -> str:
         """
@@ -112,17 +410,24 @@ class VariantRecord(Record):
     Хранит информацию о положении, референсном и альтернативном аллелях,
     а также дополнительных аннотациях.
 
+    Мультиаллельный вариант — одна запись: alt хранит аллели через запятую,
+    как в VCF, а список аллелей возвращает свойство alts.
+
     Attributes:
         id (str): Идентификатор вида "chrom:pos" (например, "chr1:12345").
         chrom (str): Название хромосомы.
         pos (int): Позиция варианта (1-based, как в VCF).
         ref (str): Референсный аллель (например, "A").
-        alt (str): Альтернативный аллель (например, "T").
-        info (dict): Словарь с дополнительной информацией из поля INFO VCF
-            (например, {"DP": 30, "AF": 0.5}).
+        alt (str): Альтернативный аллель (например, "T") или несколько через запятую ("T,G").
+        info (Mapping): Словарь с дополнительной информацией из поля INFO VCF
+            (например, {"DP": 30, "AF": 0.5}) или VariantInfo, декодирующий поля по запросу.
+        qual (float | None): Качество варианта (QUAL), если оно известно.
+        filter (str | None): Значение поля FILTER (например, "PASS"), если оно известно.
     """
 
-    def __init__(self, chrom: str, pos: int, ref: str, alt: str, info: dict):
+    __slots__ = ("chrom", "pos", "ref", "alt", "info", "qual", "filter")
+
+    def __init__(self, chrom: str, pos: int, ref: str, alt: str, info: Mapping):
         """
         Инициализирует запись генетического варианта.
 
@@ -130,8 +435,8 @@ class VariantRecord(Record):
             chrom (str): Название хромосомы (например, "chr1").
             pos (int): Позиция варианта (1-based, как в спецификации VCF).
             ref (str): Референсный аллель.
-            alt (str): Альтернативный аллель.
-            info (dict): Словарь с аннотациями из поля INFO.
+            alt (str): Альтернативный аллель (несколько — через запятую).
+            info (Mapping): Словарь с аннотациями из поля INFO.
         """
         super().__init__(f"{chrom}:{pos}")
         self.chrom = chrom
@@ -139,6 +444,18 @@ class VariantRecord(Record):
         self.ref = ref
         self.alt = alt
         self.info = info
+        self.qual: float | None = None
+        self.filter: str | None = None
+
+    @property
+    def alts(self) -> list[str]:
+        """
+        Альтернативные аллели варианта (пустой список для ALT = ".").
+
+        Returns:
+            list[str]: Аллели в порядке ALT; значения INFO с Number=A идут в том же порядке.
+        """
+        return [] if self.alt == "." else self.alt.split(",")
 
     def __repr__(self) -> str:
         """
@@ -147,4 +464,132 @@ class VariantRecord(Record):
         Returns:
             str: Строка вида "<VariantRecord chrom:pos ref>alt>".
         """
-        return f"<VariantRecord {self.chrom}:{self.pos} {self.ref}>{self.alt}>"
\ No newline at end of file
+        return f"<VariantRecord {self.chrom}:{self.pos} {self.ref}>{self.alt}>"
+
+
+class VariantInfo(Mapping):
+    """
+    Поле INFO варианта, декодируемое по запросу.
+
+    Хранит исходную строку INFO; отдельный ключ ищется прямо в строке, а на все
+    пары ключ=значение она делится только при переборе ключей. Значение
+    преобразуется в нужный тип (по описанию ##INFO в заголовке VCF) при первом
+    чтении ключа. Так варианты, у которых INFO не нужна, не тратят время на её разбор.
+
+    Attributes:
+        raw (str): Исходная строка INFO ("." — пустое поле).
+    """
+
+    __slots__ = ("raw", "_converters", "_fields", "_values")
+
+    def __init__(self, raw: str, converters: dict[str, Callable] | None = None):
+        """
+        Инициализирует поле INFO по исходной строке без её разбора.
+
+        Args:
+            raw (str): Строка INFO из VCF.
+            converters (dict[str, Callable] | None, optional): Преобразователи значений по ключу;
+                функция получает строку значения (None для флага без значения).
+                Значения ключей без преобразователя возвращаются строкой (флаги — True).
+        """
+        self.raw = raw
+        self._converters = converters or {}
+        self._fields = None
+        self._values = {}
+
+    def _split(self) -> dict[str, str | None]:
+        """
+        Делит строку INFO на пары ключ=значение (один раз, результат сохраняется).
+
+        Returns:
+            dict[str, str | None]: Строки значений по ключам (None для флагов без значения).
+        """
+        if self._fields is None:
+            self._fields = {}
+            if self.raw != ".":
+                for item in self.raw.split(";"):
+                    key, separator, value = item.partition("=")
+                    self._fields[key] = value if separator else None
+        return self._fields
+
+    def _find(self, key: str) -> str | None:
+        """
+        Находит значение ключа в исходной строке, не разбирая остальные пары.
+
+        Returns:
+            str | None: Строка значения или None для флага без значения.
+
+        Raises:
+            KeyError: Если ключа нет в поле INFO.
+        """
+        if self._fields is not None:
+            return self._fields[key]
+        raw = self.raw
+        position = raw.find(key)
+        while position >= 0:
+            end = position + len(key)
+            # Ключ должен начинаться с начала пары и не быть префиксом более длинного ключа
+            if (position == 0 or raw[position - 1] == ";") and raw[end:end + 1] in ("=", ";", ""):
+                if raw[end:end + 1] != "=":
+                    return None
+                stop = raw.find(";", end)
+                return raw[end + 1:] if stop < 0 else raw[end + 1:stop]
+            position = raw.find(key, end)
+        raise KeyError(key)
+
+    def __getitem__(self, key: str):
+        """
+        Возвращает значение ключа, преобразуя его при первом обращении.
+
+        Raises:
+            KeyError: Если ключа нет в поле INFO.
+
+        >>> info = VariantInfo("DP=30;DB;AF=0.5;AFR=1", {"DP": int})
+        >>> info["DP"], info["DB"], info["AF"], sorted(info)
+        (30, True, '0.5', ['AF', 'AFR', 'DB', 'DP'])
+        """
+        if key in self._values:
+            return self._values[key]
+        if self.raw == "." or not key:
+            raise KeyError(key)
+        value = self._find(key)
+        converter = self._converters.get(key)
+        if converter is not None:
+            value = converter(value)
+        elif value is None:
+            value = True
+        self._values[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Итерирует по ключам INFO в порядке следования в строке.
+
+        Yields:
+            str: Очередной ключ.
+        """
+        return iter(self._split())
+
+    def __len__(self) -> int:
+        """
+        Возвращает число ключей в поле INFO.
+
+        Returns:
+            int: Число ключей (0 для пустого поля ".").
+        """
+        return len(self._split())
+
+    def __repr__(self) -> str:
+        """
+        Возвращает строковое представление поля для отладки.
+
+        Returns:
+            str: Строка вида "<VariantInfo DP=30;DB>".
+        """
+        return f"<VariantInfo {self.raw}>"
+
+
+@lru_cache(maxsize=None)
+def _phred_table(offset: int) -> bytes:
+    """Таблица bytes.translate, вычитающая смещение кодировки качества из каждого байта."""
+    return bytes((i - offset) % 256 for i in range(256))
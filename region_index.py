@@ -0,0 +1,526 @@
+from array import array
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+import os
+import struct
+import sys
+
+from parallel_gzip import BgzfReader
+
+# Схема бинов как в SAM/BAM и tabix: 5 уровней, самый мелкий бин — 16 кб
+MIN_SHIFT = 14
+DEPTH = 5
+# Окно линейного индекса (16 кб)
+LINEAR_SHIFT = MIN_SHIFT
+_LEVEL_OFFSETS = [((1 << 3 * level) - 1) // 7 for level in range(DEPTH + 1)]
+
+
+def region_bin(start: int, end: int) -> int:
+    """
+    Возвращает наименьший бин, целиком содержащий интервал [start, end).
+
+    Args:
+        start (int): Начало интервала (0-based).
+        end (int): Конец интервала (не включительно, больше start).
+
+    Returns:
+        int: Номер бина.
+
+    >>> region_bin(0, 100), region_bin(16000, 17000), region_bin(0, 1 << 29)
+    (4681, 585, 0)
+    """
+    end -= 1
+    for level in range(DEPTH, 0, -1):
+        shift = MIN_SHIFT + 3 * (DEPTH - level)
+        if start >> shift == end >> shift:
+            return _LEVEL_OFFSETS[level] + (start >> shift)
+    return 0
+
+
+def region_bins(start: int, end: int) -> list[int]:
+    """
+    Возвращает все бины, которые могут содержать интервалы, пересекающие [start, end).
+
+    Args:
+        start (int): Начало интервала (0-based).
+        end (int): Конец интервала (не включительно, больше start).
+
+    Returns:
+        list[int]: Номера бинов от крупных к мелким.
+
+    >>> region_bins(0, 100)
+    [0, 1, 9, 73, 585, 4681]
+    """
+    end -= 1
+    bins = [0]
+    for level in range(1, DEPTH + 1):
+        shift = MIN_SHIFT + 3 * (DEPTH - level)
+        offset = _LEVEL_OFFSETS[level]
+        bins.extend(range(offset + (start >> shift), offset + (end >> shift) + 1))
+    return bins
+
+
+def _merge_chunks(chunks: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Сортирует участки файла [begin, end) и объединяет пересекающиеся и смежные."""
+    merged = []
+    for begin, end in sorted(chunks):
+        if merged and begin <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+class RegionIndex:
+    """
+    Индекс геномных интервалов по смещениям в файле (SAM, VCF), сохраняемый рядом с файлом (.rgi).
+
+    Устроен как индекс BAI/tabix: для каждой хромосомы записи распределяются
+    по иерархическим бинам (region_bin()), у каждого бина хранится список участков
+    файла [begin, end), а линейный индекс хранит для каждого окна 16 кб наименьшее
+    смещение записи, пересекающей окно. Запрос region_chunks() выбирает участки
+    бинов, которые могут пересекать регион, и отбрасывает части участков, лежащие
+    до наименьшего смещения по окнам региона; остальной файл не читается.
+    Файл не обязан быть отсортирован по координатам, но для отсортированного
+    файла участков и лишних строк меньше.
+
+    Для несжатых файлов смещения — позиции в байтах. Файлы .gz должны быть сжаты
+    bgzip (BGZF): для них хранятся виртуальные смещения (начало сжатого блока << 16
+    | позиция в распакованном блоке, см. BgzfReader), и переход к участку распаковывает
+    только его блоки. Индекс привязан к размеру и времени изменения файла и считается
+    устаревшим, если они изменились.
+
+    Формат файла .rgi (little-endian): заголовок HEADER, затем для каждой хромосомы —
+    длина и имя в UTF-8, число бинов, для каждого бина — номер, число участков и пары
+    смещений uint64, затем длина и значения линейного индекса uint64.
+
+    Attributes:
+        filepath (Path): Путь к индексируемому файлу.
+        file_size (int): Размер файла на момент построения индекса.
+        mtime_ns (int): Время изменения файла на момент построения индекса.
+        bins (dict[str, dict[int, list[tuple[int, int]]]]): Хромосома -> бин -> участки файла.
+        linear (dict[str, array]): Хромосома -> наименьшее смещение записи, пересекающей
+            окно, плюс 1 (0 — окно без записей).
+    """
+
+    MAGIC = b"RGI2"
+    HEADER = struct.Struct("<4sQqI")
+    SUFFIX = ".rgi"
+
+    def __init__(
+        self,
+        filepath: str | Path,
+        file_size: int,
+        mtime_ns: int,
+        bins: dict[str, dict[int, list[tuple[int, int]]]],
+        linear: dict[str, array],
+    ):
+        """
+        Инициализирует индекс из готовых значений.
+
+        Args:
+            filepath (str | Path): Путь к индексируемому файлу.
+            file_size (int): Размер файла.
+            mtime_ns (int): Время изменения файла в наносекундах.
+            bins (dict[str, dict[int, list[tuple[int, int]]]]): Участки файла по бинам.
+            linear (dict[str, array]): Линейный индекс по хромосомам.
+        """
+        self.filepath = Path(filepath)
+        self.file_size = file_size
+        self.mtime_ns = mtime_ns
+        self.bins = bins
+        self.linear = linear
+
+    @classmethod
+    def index_path(cls, filepath: str | Path) -> Path:
+        """
+        Возвращает путь к файлу индекса.
+
+        Args:
+            filepath (str | Path): Путь к индексируемому файлу.
+
+        Returns:
+            Path: Путь вида "<файл>.rgi".
+        """
+        return Path(str(filepath) + cls.SUFFIX)
+
+    @classmethod
+    def build(
+        cls, filepath: str | Path, line_interval: Callable[[bytes], tuple[str, int, int] | None]
+    ) -> "RegionIndex":
+        """
+        Строит индекс за один проход по файлу.
+
+        Args:
+            filepath (str | Path): Путь к файлу (.gz — только в формате BGZF).
+            line_interval (Callable[[bytes], tuple[str, int, int] | None]): Функция,
+                возвращающая для строки файла интервал записи (хромосома, начало,
+                конец; 0-based, конец не включительно) или None для строк заголовка
+                и записей без позиции.
+
+        Returns:
+            RegionIndex: Построенный индекс.
+
+        Raises:
+            OSError: Если файл не может быть прочитан.
+            ValueError: Если файл .gz сжат не в формате BGZF.
+        """
+        filepath = Path(filepath)
+        stat = filepath.stat()
+        bins = {}
+        linear = {}
+        for line, position, next_position in _lines_with_offsets(filepath):
+            interval = line_interval(line)
+            if interval is not None:
+                chrom, start, end = interval
+                end = max(end, start + 1)
+                chunks = bins.setdefault(chrom, {}).setdefault(region_bin(start, end), [])
+                # Соседние записи одного бина образуют один участок файла
+                if chunks and chunks[-1][1] == position:
+                    chunks[-1] = (chunks[-1][0], next_position)
+                else:
+                    chunks.append((position, next_position))
+                windows = linear.setdefault(chrom, array("Q"))
+                last_window = (end - 1) >> LINEAR_SHIFT
+                if len(windows) <= last_window:
+                    windows.extend([0] * (last_window + 1 - len(windows)))
+                # 0 означает окно без записей, поэтому хранится смещение + 1
+                for window in range(start >> LINEAR_SHIFT, last_window + 1):
+                    if not windows[window] or windows[window] > position + 1:
+                        windows[window] = position + 1
+        return cls(filepath, stat.st_size, stat.st_mtime_ns, bins, linear)
+
+    @classmethod
+    def load(cls, filepath: str | Path) -> "RegionIndex | None":
+        """
+        Загружает индекс из файла .rgi, если он существует и не устарел.
+
+        Args:
+            filepath (str | Path): Путь к индексируемому файлу (не к индексу).
+
+        Returns:
+            RegionIndex | None: Индекс или None, если индекса нет, он повреждён
+            либо размер или время изменения файла не совпадают.
+        """
+        filepath = Path(filepath)
+        try:
+            stat = filepath.stat()
+            with open(cls.index_path(filepath), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < cls.HEADER.size:
+            return None
+        magic, file_size, mtime_ns, n_chroms = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or file_size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            return None
+        bins = {}
+        linear = {}
+        try:
+            position = cls.HEADER.size
+            for _ in range(n_chroms):
+                name_length, = struct.unpack_from("<I", data, position)
+                position += 4
+                chrom = data[position:position + name_length].decode("utf-8")
+                position += name_length
+                n_bins, = struct.unpack_from("<I", data, position)
+                position += 4
+                chrom_bins = bins[chrom] = {}
+                for _ in range(n_bins):
+                    bin_id, n_chunks = struct.unpack_from("<II", data, position)
+                    position += 8
+                    values = _read_uint64(data, position, 2 * n_chunks)
+                    position += 16 * n_chunks
+                    chrom_bins[bin_id] = list(zip(values[::2], values[1::2]))
+                n_windows, = struct.unpack_from("<I", data, position)
+                position += 4
+                linear[chrom] = _read_uint64(data, position, n_windows)
+                position += 8 * n_windows
+        except (struct.error, UnicodeDecodeError, ValueError):
+            return None
+        if position != len(data):
+            return None
+        return cls(filepath, file_size, mtime_ns, bins, linear)
+
+    @classmethod
+    def load_or_build(
+        cls, filepath: str | Path, line_interval: Callable[[bytes], tuple[str, int, int] | None]
+    ) -> "RegionIndex":
+        """
+        Загружает актуальный индекс или строит и сохраняет новый.
+
+        Если сохранить индекс не удалось (например, каталог только для чтения),
+        построенный индекс всё равно возвращается.
+
+        Args:
+            filepath (str | Path): Путь к индексируемому файлу.
+            line_interval (Callable[[bytes], tuple[str, int, int] | None]): См. build().
+
+        Returns:
+            RegionIndex: Актуальный индекс.
+        """
+        index = cls.load(filepath)
+        if index is None:
+            index = cls.build(filepath, line_interval)
+            try:
+                index.save()
+            except OSError:
+                pass
+        return index
+
+    def save(self):
+        """
+        Сохраняет индекс в файл .rgi рядом с индексируемым файлом.
+
+        Запись идёт во временный файл, который затем атомарно переименовывается.
+
+        Raises:
+            OSError: Если файл индекса не может быть записан.
+        """
+        parts = [self.HEADER.pack(self.MAGIC, self.file_size, self.mtime_ns, len(self.bins))]
+        for chrom, chrom_bins in self.bins.items():
+            name = chrom.encode("utf-8")
+            parts.append(struct.pack("<I", len(name)) + name + struct.pack("<I", len(chrom_bins)))
+            for bin_id, chunks in chrom_bins.items():
+                parts.append(struct.pack("<II", bin_id, len(chunks)))
+                parts.append(_uint64_bytes(value for chunk in chunks for value in chunk))
+            windows = self.linear.get(chrom, array("Q"))
+            parts.append(struct.pack("<I", len(windows)) + _uint64_bytes(windows))
+        path = self.index_path(self.filepath)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, path)
+
+    def region_chunks(self, chrom: str, start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Возвращает участки файла, которые могут содержать записи, пересекающие регион.
+
+        Args:
+            chrom (str): Хромосома.
+            start (int): Начало региона (0-based).
+            end (int): Конец региона (не включительно).
+
+        Returns:
+            list[tuple[int, int]]: Непересекающиеся участки [begin, end) по возрастанию смещения.
+        """
+        chrom_bins = self.bins.get(chrom)
+        if not chrom_bins or end <= start:
+            return []
+        # Любая запись, пересекающая регион, пересекает одно из его окон
+        windows = self.linear.get(chrom, array("Q"))
+        offsets = [value for value in windows[start >> LINEAR_SHIFT:((end - 1) >> LINEAR_SHIFT) + 1] if value]
+        if not offsets:
+            return []
+        min_offset = min(offsets) - 1
+        return _merge_chunks(
+            (max(begin, min_offset), chunk_end)
+            for bin_id in region_bins(start, end)
+            for begin, chunk_end in chrom_bins.get(bin_id, ())
+            if chunk_end > min_offset
+        )
+
+
+def _lines_with_offsets(filepath: Path) -> Iterator[tuple[bytes, int, int]]:
+    """
+    Итерирует по строкам файла вместе с их смещениями [begin, end).
+
+    Args:
+        filepath (Path): Путь к файлу; для .gz смещения виртуальные (см. BgzfReader).
+
+    Yields:
+        tuple[bytes, int, int]: Строка, смещение её начала и смещение следующей строки.
+
+    Raises:
+        ValueError: Если файл .gz сжат не в формате BGZF.
+    """
+    if str(filepath).endswith(".gz"):
+        with BgzfReader(filepath) as f:
+            position = f.tell()
+            for line in f:
+                next_position = f.tell()
+                yield line, position, next_position
+                position = next_position
+        return
+    position = 0
+    with open(filepath, "rb") as f:
+        for line in f:
+            yield line, position, position + len(line)
+            position += len(line)
+
+
+def _uint64_bytes(values: Iterable[int]) -> bytes:
+    """
+    Упаковывает целые числа в последовательность uint64 little-endian.
+
+    Args:
+        values (Iterable[int]): Неотрицательные числа меньше 2 ** 64.
+
+    Returns:
+        bytes: По 8 байт на число.
+
+    >>> _uint64_bytes([1, 256]).hex()
+    '01000000000000000001000000000000'
+    """
+    values = array("Q", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_uint64(data: bytes, position: int, count: int) -> array:
+    """
+    Читает count чисел uint64 little-endian, записанных _uint64_bytes().
+
+    Args:
+        data (bytes): Содержимое файла индекса.
+        position (int): Смещение первого числа.
+        count (int): Число значений.
+
+    Returns:
+        array: Массив array("Q") прочитанных значений.
+
+    Raises:
+        ValueError: Если данные обрываются раньше count значений.
+    """
+    values = array("Q")
+    values.frombytes(data[position:position + 8 * count])
+    if len(values) != count:
+        raise ValueError("truncated index")
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def record_interval(record) -> tuple[str, int, int]:
+    """
+    Возвращает интервал записи: хромосому, начало и конец (0-based, конец не включительно).
+
+    Для AlignmentRecord это chrom, start и end; для VariantRecord — участок референсного
+    аллеля от позиции pos. Пустые интервалы (например, выравнивание без CIGAR)
+    считаются длиной 1.
+
+    Args:
+        record (AlignmentRecord | VariantRecord): Запись.
+
+    Returns:
+        tuple[str, int, int]: Хромосома, начало и конец.
+    """
+    if hasattr(record, "pos"):
+        start = record.pos - 1
+        return record.chrom, start, start + max(len(record.ref), 1)
+    return record.chrom, record.start, max(record.end, record.start + 1)
+
+
+class IntervalTree:
+    """
+    Статическое дерево интервалов для запросов пересечения по загруженным записям.
+
+    Записи каждой хромосомы сортируются по началу; неявное сбалансированное
+    дерево над отсортированным массивом хранит в каждом узле наибольший конец
+    интервалов поддерева, что позволяет отбрасывать поддеревья без пересечений.
+    Запрос выполняется за O(log n + k), где k — число найденных записей.
+
+    Attributes:
+        chroms (list[str]): Хромосомы, по которым есть записи.
+    """
+
+    def __init__(self, records: Iterable = (), interval: Callable = record_interval):
+        """
+        Строит дерево по записям.
+
+        Args:
+            records (Iterable): Записи (например, AlignmentRecord или VariantRecord).
+            interval (Callable, optional): Функция запись -> (хромосома, начало, конец),
+                по умолчанию record_interval().
+        """
+        grouped = {}
+        for record in records:
+            chrom, start, end = interval(record)
+            grouped.setdefault(chrom, []).append((start, end, record))
+        self._trees = {}
+        for chrom, items in grouped.items():
+            items.sort(key=lambda item: (item[0], item[1]))
+            starts = [item[0] for item in items]
+            ends = [item[1] for item in items]
+            max_ends = ends[:]
+            self._fill_max_ends(ends, max_ends, 0, len(items))
+            self._trees[chrom] = (starts, ends, max_ends, [item[2] for item in items])
+        self.chroms = list(self._trees)
+
+    @staticmethod
+    def _fill_max_ends(ends: list[int], max_ends: list[int], lo: int, hi: int):
+        """Записывает в середину каждого отрезка [lo, hi) наибольший конец его интервалов."""
+        stack = [(lo, hi, False)]
+        while stack:
+            lo, hi, children_done = stack.pop()
+            mid = (lo + hi) // 2
+            if not children_done:
+                stack.append((lo, hi, True))
+                if lo < mid:
+                    stack.append((lo, mid, False))
+                if mid + 1 < hi:
+                    stack.append((mid + 1, hi, False))
+                continue
+            value = ends[mid]
+            if lo < mid:
+                value = max(value, max_ends[(lo + mid) // 2])
+            if mid + 1 < hi:
+                value = max(value, max_ends[(mid + 1 + hi) // 2])
+            max_ends[mid] = value
+
+    def __len__(self) -> int:
+        """
+        Возвращает число записей в дереве.
+
+        Returns:
+            int: Число записей.
+        """
+        return sum(len(tree[0]) for tree in self._trees.values())
+
+    def overlap(self, chrom: str, start: int, end: int) -> list:
+        """
+        Находит записи, пересекающие интервал [start, end).
+
+        Args:
+            chrom (str): Хромосома.
+            start (int): Начало интервала (0-based).
+            end (int): Конец интервала (не включительно).
+
+        Returns:
+            list: Записи в порядке начала интервала.
+
+        >>> tree = IntervalTree([("1", 0, 10), ("1", 5, 20), ("1", 30, 40)], interval=lambda item: item)
+        >>> tree.overlap("1", 8, 31)
+        [('1', 0, 10), ('1', 5, 20), ('1', 30, 40)]
+        >>> tree.overlap("1", 20, 30), tree.overlap("2", 0, 100)
+        ([], [])
+        """
+        tree = self._trees.get(chrom)
+        if tree is None or end <= start:
+            return []
+        starts, ends, max_ends, records = tree
+        found = []
+        stack = [(0, len(starts))]
+        while stack:
+            lo, hi = stack.pop()
+            mid = (lo + hi) // 2
+            if max_ends[mid] <= start:
+                continue
+            if mid + 1 < hi and starts[mid] < end:
+                stack.append((mid + 1, hi))
+            if lo < mid:
+                stack.append((lo, mid))
+            if starts[mid] < end and ends[mid] > start:
+                found.append(mid)
+        return [records[i] for i in sorted(found)]
+
+    def __iter__(self) -> Iterator:
+        """
+        Итерирует по всем записям (по хромосомам, в порядке начала).
+
+        Yields:
+            Очередная запись.
+        """
+        for tree in self._trees.values():
+            yield from tree[3]
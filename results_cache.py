@@ -0,0 +1,266 @@
+from pathlib import Path
+import hashlib
+import io
+import os
+import struct
+import zipfile
+
+from fastq_stats import FastqStats
+
+
+class ResultsCache:
+    """
+    Дисковый кэш результатов анализа FASTQ-файлов.
+
+    Ключ записи — хеш от абсолютного пути, размера и времени изменения файла,
+    а также от содержимого его начала и конца (частичный хеш содержимого).
+    Значение — накопитель FastqStats в компактном бинарном виде (.npz).
+    Общий размер кэша ограничен: при превышении удаляются записи, к которым
+    дольше всего не обращались (LRU по времени изменения файла записи).
+
+    Кроме готовых результатов, кэш хранит контрольные точки прерванного анализа
+    (.ckpt): частичную статистику и обработанные диапазоны байтов файла.
+    Контрольные точки не вытесняются и удаляются после завершения анализа.
+
+    Attributes:
+        directory (Path): Каталог кэша.
+        max_bytes (int): Максимальный суммарный размер записей в байтах.
+    """
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    SAMPLE_SIZE = 1024 * 1024
+    SUFFIX = ".npz"
+    CHECKPOINT_SUFFIX = ".ckpt"
+    # Заголовок контрольной точки: число диапазонов, затем пары (start, end) int64
+    CHECKPOINT_COUNT = struct.Struct("<I")
+    CHECKPOINT_RANGE = struct.Struct("<qq")
+
+    def __init__(self, directory: str | Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Инициализирует кэш.
+
+        Args:
+            directory (str | Path | None, optional): Каталог кэша. По умолчанию —
+                переменная окружения BIOSTATS_CACHE_DIR или ~/.cache/biostats.
+            max_bytes (int, optional): Максимальный суммарный размер записей в байтах.
+        """
+        if directory is None:
+            directory = os.environ.get("BIOSTATS_CACHE_DIR") or Path.home() / ".cache" / "biostats"
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def key(self, filepath: str | Path) -> str:
+        """
+        Вычисляет ключ кэша для файла.
+
+        Читаются только первые и последние SAMPLE_SIZE байт файла,
+        поэтому ключ вычисляется быстро даже для очень больших файлов.
+
+        Args:
+            filepath (str | Path): Путь к анализируемому файлу.
+
+        Returns:
+            str: Шестнадцатеричный ключ.
+
+        Raises:
+            OSError: Если файл не может быть прочитан.
+        """
+        filepath = Path(filepath).resolve()
+        stat = filepath.stat()
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{filepath}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+        with open(filepath, "rb") as f:
+            digest.update(f.read(self.SAMPLE_SIZE))
+            if stat.st_size > self.SAMPLE_SIZE:
+                f.seek(max(self.SAMPLE_SIZE, stat.st_size - self.SAMPLE_SIZE))
+                digest.update(f.read(self.SAMPLE_SIZE))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        """
+        Возвращает путь к файлу записи кэша.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            Path: Путь к файлу записи.
+        """
+        return self.directory / (key + self.SUFFIX)
+
+    def get(self, filepath: str | Path) -> FastqStats | None:
+        """
+        Возвращает сохранённые результаты для неизменённого файла.
+
+        При попадании отмечает запись как недавно использованную.
+        Повреждённая запись удаляется.
+
+        Args:
+            filepath (str | Path): Путь к анализируемому файлу.
+
+        Returns:
+            FastqStats | None: Результаты или None, если записи нет.
+        """
+        try:
+            entry = self._entry_path(self.key(filepath))
+        except OSError:
+            return None
+        try:
+            stats = FastqStats.load(entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            self._remove(entry)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return stats
+
+    def put(self, filepath: str | Path, stats: FastqStats):
+        """
+        Сохраняет результаты анализа файла и вытесняет старые записи при превышении лимита.
+
+        Ошибки записи не прерывают работу: кэш лишь ускоряет повторный анализ.
+
+        Args:
+            filepath (str | Path): Путь к анализируемому файлу.
+            stats (FastqStats): Результаты анализа.
+        """
+        try:
+            entry = self._entry_path(self.key(filepath))
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry.with_name(entry.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                stats.save(f)
+            os.replace(tmp_path, entry)
+            self.evict()
+        except OSError:
+            pass
+
+    def get_checkpoint(
+        self, filepath: str | Path
+    ) -> tuple[FastqStats, list[tuple[int, int]]] | None:
+        """
+        Возвращает контрольную точку прерванного анализа неизменённого файла.
+
+        Повреждённая контрольная точка удаляется.
+
+        Args:
+            filepath (str | Path): Путь к анализируемому файлу.
+
+        Returns:
+            tuple[FastqStats, list[tuple[int, int]]] | None: Частичная статистика
+            и обработанные диапазоны байтов или None, если контрольной точки нет.
+        """
+        try:
+            entry = self._checkpoint_path(self.key(filepath))
+        except OSError:
+            return None
+        try:
+            with open(entry, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            (count,) = self.CHECKPOINT_COUNT.unpack_from(data)
+            position = self.CHECKPOINT_COUNT.size
+            done_ranges = []
+            for _ in range(count):
+                done_ranges.append(self.CHECKPOINT_RANGE.unpack_from(data, position))
+                position += self.CHECKPOINT_RANGE.size
+            stats = FastqStats.load(io.BytesIO(data[position:]))
+        except (struct.error, OSError, ValueError, KeyError, zipfile.BadZipFile):
+            self._remove(entry)
+            return None
+        return stats, done_ranges
+
+    def put_checkpoint(
+        self, filepath: str | Path, stats: FastqStats, done_ranges: list[tuple[int, int]]
+    ):
+        """
+        Сохраняет контрольную точку анализа файла, заменяя предыдущую.
+
+        Ошибки записи игнорируются.
+
+        Args:
+            filepath (str | Path): Путь к анализируемому файлу.
+            stats (FastqStats): Статистика по обработанным диапазонам.
+            done_ranges (list[tuple[int, int]]): Обработанные диапазоны байтов [start, end).
+        """
+        try:
+            entry = self._checkpoint_path(self.key(filepath))
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry.with_name(entry.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(self.CHECKPOINT_COUNT.pack(len(done_ranges)))
+                for start, end in done_ranges:
+                    f.write(self.CHECKPOINT_RANGE.pack(start, end))
+                stats.save(f)
+            os.replace(tmp_path, entry)
+        except OSError:
+            pass
+
+    def discard_checkpoint(self, filepath: str | Path):
+        """
+        Удаляет контрольную точку анализа файла, если она есть.
+
+        Args:
+            filepath (str | Path): Путь к анализируемому файлу.
+        """
+        try:
+            self._remove(self._checkpoint_path(self.key(filepath)))
+        except OSError:
+            pass
+
+    def _checkpoint_path(self, key: str) -> Path:
+        """
+        Возвращает путь к файлу контрольной точки.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            Path: Путь к файлу контрольной точки.
+        """
+        return self.directory / (key + self.CHECKPOINT_SUFFIX)
+
+    def evict(self):
+        """
+        Удаляет давно не использовавшиеся записи, пока общий размер превышает max_bytes.
+        """
+        entries = []
+        for path in self.directory.glob("*" + self.SUFFIX):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """
+        Удаляет все записи кэша и контрольные точки.
+        """
+        for suffix in (self.SUFFIX, self.CHECKPOINT_SUFFIX):
+            for path in self.directory.glob("*" + suffix):
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path: Path):
+        """
+        Удаляет файл записи, игнорируя ошибки.
+
+        Args:
+            path (Path): Путь к файлу записи.
+        """
+        try:
+            path.unlink()
+        except OSError:
+            pass
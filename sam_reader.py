@@ -0,0 +1,252 @@
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+from typing import Iterator
+import gzip
+import re
+from abstract import GenomicDataReader
+from record import AlignmentRecord, _phred_table
+
+# Операции CIGAR, занимающие позиции референса
+_REFERENCE_OPS = frozenset("MDN=X")
+_CIGAR_RE = re.compile(r"(\d+)([MIDNSHP=X])")
+
+
+@lru_cache(maxsize=65536)
+def cigar_reference_length(cigar: str) -> int:
+    """
+    Вычисляет длину участка референса, покрытого выравниванием, по строке CIGAR.
+
+    Учитываются операции M, D, N, = и X. Результат кэшируется: в файле SAM
+    обычно немного различных строк CIGAR (например, "150M"), поэтому разбор
+    выполняется один раз на строку, а не на каждое выравнивание.
+
+    Args:
+        cigar (str): Строка CIGAR или "*" (нет выравнивания).
+
+    Returns:
+        int: Длина на референсе (0 для "*").
+
+    Raises:
+        ValueError: Если строка не является корректной строкой CIGAR.
+
+    >>> cigar_reference_length("50M2D30M"), cigar_reference_length("5S20M1I10M3H")
+    (82, 30)
+    """
+    if cigar == "*":
+        return 0
+    operations = _CIGAR_RE.findall(cigar)
+    if sum(len(count) + 1 for count, _ in operations) != len(cigar):
+        raise ValueError(f"Invalid CIGAR string: {cigar!r}")
+    return sum(int(count) for count, op in operations if op in _REFERENCE_OPS)
+
+
+def _parse_tag(value: str):
+    """Преобразует значение необязательного поля SAM по его типу (i — целое, f — вещественное)."""
+    if value[0] == "i":
+        return int(value[2:])
+    if value[0] == "f":
+        return float(value[2:])
+    return value[2:]
+
+
+class SamReader(GenomicDataReader):
+    """
+    Потоковый ридер выравниваний в текстовом формате SAM (в том числе сжатом .gz).
+
+    Заголовок (строки "@") разбирается один раз при открытии файла, затем
+    read() построчно возвращает AlignmentRecord. Файл читается в бинарном
+    режиме, и строка делится по табуляциям только до последнего нужного
+    столбца: невыбранные поля (по умолчанию SEQ, QUAL и необязательные теги)
+    остаются в нераспознанном хвосте строки и не декодируются.
+
+    Всегда читаются QNAME, RNAME и POS (id, chrom и start записи; start — 0-based,
+    для выравниваний без позиции — -1). Остальные поля выбираются параметром fields;
+    невыбранные атрибуты записи сохраняют значения по умолчанию (None, для flag — 0,
+    для end — start).
+
+    Attributes:
+        filepath (Path): Путь к файлу SAM.
+        file (file object or None): Открытый бинарный файловый дескриптор.
+        fields (frozenset[str]): Разбираемые поля записи.
+        header (dict[str, list[dict[str, str]]]): Строки заголовка по типу ("HD", "SQ",
+            "RG", "PG"), каждая — словарь тегов; для "CO" — словари {"text": комментарий}.
+        references (dict[str, int]): Длины референсных последовательностей из строк @SQ.
+    """
+
+    FIELDS = ("flag", "mapq", "cigar", "end", "sequence", "quality", "tags")
+    DEFAULT_FIELDS = ("flag", "mapq", "cigar", "end")
+    # Номер последнего столбца SAM, который нужен для каждого поля
+    _FIELD_COLUMNS = {
+        "flag": 1, "mapq": 4, "cigar": 5, "end": 5, "sequence": 9, "quality": 10, "tags": 11,
+    }
+
+    def __init__(self, filepath: str | Path, fields=DEFAULT_FIELDS):
+        """
+        Инициализирует SamReader с указанным путём к файлу.
+
+        Args:
+            filepath (str | Path): Путь к файлу SAM.
+            fields (Iterable[str], optional): Разбираемые поля из FIELDS. По умолчанию
+                flag, mapq, cigar и end (без последовательности, качества и тегов).
+
+        Raises:
+            ValueError: Если указано неизвестное поле.
+        """
+        super().__init__(filepath)
+        fields = frozenset(fields)
+        unknown = fields - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown SAM fields: {sorted(unknown)!r}")
+        self.fields = fields
+        self.header = {}
+        self.references = {}
+        self._first_line = None
+        # Делим строку по табуляциям только до последнего нужного столбца (RNAME и POS нужны всегда)
+        self._last_column = max([3] + [self._FIELD_COLUMNS[field] for field in fields])
+        self._maxsplit = -1 if "tags" in fields else self._last_column + 1
+
+    def _open_file(self):
+        """
+        Открывает файл SAM в бинарном режиме (.gz распаковывается).
+
+        Returns:
+            file object: Открытый бинарный файловый дескриптор.
+        """
+        if str(self.filepath).endswith(".gz"):
+            return gzip.open(self.filepath, "rb")
+        return open(self.filepath, "rb")
+
+    def _parse_header(self):
+        """
+        Читает строки заголовка "@" до первой строки выравнивания.
+
+        Первая строка выравнивания сохраняется и возвращается первой при вызове read().
+
+        Raises:
+            ValueError: Если строка заголовка имеет неизвестный формат.
+        """
+        self.header = {}
+        self.references = {}
+        self._first_line = None
+        for line in self.file:
+            if not line.startswith(b"@"):
+                self._first_line = line
+                break
+            record_type, *values = line.rstrip(b"\r\n").decode("utf-8").split("\t")
+            record_type = record_type[1:]
+            if record_type == "CO":
+                entry = {"text": "\t".join(values)}
+            else:
+                entry = {}
+                for value in values:
+                    tag, separator, content = value.partition(":")
+                    if not separator:
+                        raise ValueError(f"Invalid SAM header field {value!r} in @{record_type}")
+                    entry[tag] = content
+            self.header.setdefault(record_type, []).append(entry)
+            if record_type == "SQ":
+                self.references[entry["SN"]] = int(entry["LN"])
+        self._header_parsed = True
+
+    def read(self) -> Iterator[AlignmentRecord]:
+        """
+        Итеративно читает выравнивания после заголовка.
+
+        Yields:
+            AlignmentRecord: Запись выравнивания с выбранными полями.
+
+        Raises:
+            ValueError: При нарушении формата SAM (мало столбцов, неверные числа или CIGAR).
+        """
+        if not self.file:
+            self.file = self._open_file()
+        if not self._header_parsed:
+            self._parse_header()
+
+        lines = self.file
+        if self._first_line is not None:
+            lines = chain((self._first_line,), lines)
+            self._first_line = None
+        yield from self._parse_lines(lines)
+
+    def _parse_lines(self, lines) -> Iterator[AlignmentRecord]:
+        """
+        Разбирает строки выравниваний в AlignmentRecord с выбранными полями.
+
+        Args:
+            lines (Iterable[bytes]): Строки выравниваний.
+
+        Yields:
+            AlignmentRecord: Запись выравнивания.
+
+        Raises:
+            ValueError: При нарушении формата SAM.
+        """
+        fields = self.fields
+        maxsplit = self._maxsplit
+        # Обязательных столбцов 11; те, что не разделены, проверяются подсчётом табуляций в хвосте строки
+        min_columns = 11 if maxsplit < 0 else min(maxsplit + 1, 11)
+        tail_tabs = 10 - maxsplit if 0 <= maxsplit < 10 else 0
+        parse_flag = "flag" in fields
+        parse_mapq = "mapq" in fields
+        parse_cigar = "cigar" in fields or "end" in fields
+        keep_cigar = "cigar" in fields
+        parse_end = "end" in fields
+        parse_sequence = "sequence" in fields
+        parse_quality = "quality" in fields
+        parse_tags = "tags" in fields
+        phred = _phred_table(33)
+        reference_length = cigar_reference_length
+
+        for line in lines:
+            columns = line.rstrip(b"\r\n").split(b"\t", maxsplit)
+            if len(columns) < min_columns or (tail_tabs and columns[-1].count(b"\t") < tail_tabs):
+                if not line.strip():
+                    continue
+                raise ValueError(f"Invalid SAM: expected 11 columns, got {line[:80]!r}")
+            start = int(columns[3]) - 1
+            cigar = columns[5].decode("ascii") if parse_cigar else None
+            record = AlignmentRecord(
+                columns[0].decode("ascii"),
+                columns[2].decode("ascii"),
+                start,
+                cigar if keep_cigar else None,
+                int(columns[4]) if parse_mapq else None,
+            )
+            if parse_flag:
+                record.flag = int(columns[1])
+            if parse_end:
+                record.end = start + reference_length(cigar)
+            if parse_sequence and columns[9] != b"*":
+                record.sequence = columns[9].decode("ascii")
+            if parse_quality and columns[10] != b"*":
+                quality = columns[10]
+                if min(quality) < 33:
+                    raise ValueError(f"Invalid quality character for {record.id}")
+                record.quality = quality.translate(phred)
+            if parse_tags:
+                record.tags = {
+                    tag[:2].decode("ascii"): _parse_tag(tag[3:].decode("utf-8"))
+                    for tag in columns[11:]
+                }
+            yield record
+
+    def _line_interval(self, line: bytes) -> tuple[str, int, int] | None:
+        """
+        Возвращает интервал выравнивания по RNAME, POS и CIGAR для индекса регионов.
+
+        Args:
+            line (bytes): Строка файла SAM.
+
+        Returns:
+            tuple[str, int, int] | None: Хромосома, начало и конец (0-based) или None
+                для строк заголовка и выравниваний без позиции.
+        """
+        if line.startswith(b"@"):
+            return None
+        columns = line.split(b"\t", 6)
+        if len(columns) < 7 or columns[2] == b"*" or columns[3] == b"0":
+            return None
+        start = int(columns[3]) - 1
+        return columns[2].decode("ascii"), start, start + cigar_reference_length(columns[5].decode("ascii"))
@@ -0,0 +1,156 @@
+from array import array
+from itertools import accumulate
+import math
+import random
+
+from record import SequenceRecordBatch
+
+
+class BernoulliSampler:
+    """
+    Равномерная случайная выборка ридов с вероятностью rate для каждого рида.
+
+    Вместо броска монеты на каждый рид разыгрывается длина промежутка до следующего
+    выбранного рида (геометрическое распределение), поэтому число вызовов генератора
+    пропорционально размеру выборки, а не числу ридов. Состояние переносится
+    между пакетами, так что результат не зависит от разбиения на пакеты.
+
+    Attributes:
+        rate (float): Доля выбираемых ридов, 0 < rate <= 1.
+        seen (int): Число просмотренных ридов.
+    """
+
+    def __init__(self, rate: float, seed: int | None = None):
+        """
+        Args:
+            rate (float): Вероятность выбора каждого рида.
+            seed (int | None, optional): Зерно генератора для воспроизводимой выборки.
+
+        Raises:
+            ValueError: Если rate вне диапазона (0, 1].
+        """
+        if not 0 < rate <= 1:
+            raise ValueError(f"rate must be in (0, 1], got {rate}")
+        self.rate = rate
+        self.seen = 0
+        self._random = random.Random(seed)
+        self._skip = self._gap()
+
+    def _gap(self) -> int:
+        """
+        Разыгрывает число пропускаемых ридов перед следующим выбранным.
+
+        Returns:
+            int: Длина промежутка (0 — выбрать следующий рид).
+        """
+        if self.rate == 1:
+            return 0
+        return int(math.log(1.0 - self._random.random()) / math.log1p(-self.rate))
+
+    def sample(self, batch: SequenceRecordBatch) -> SequenceRecordBatch:
+        """
+        Отбирает риды пакета.
+
+        Args:
+            batch (SequenceRecordBatch): Очередной пакет ридов.
+
+        Returns:
+            SequenceRecordBatch: Пакет из выбранных ридов (может быть пустым).
+        """
+        picked = []
+        i = self._skip
+        while i < len(batch):
+            picked.append(i)
+            i += self._gap() + 1
+        self._skip = i - len(batch)
+        self.seen += len(batch)
+        return batch.select(picked)
+
+
+class ReservoirSampler:
+    """
+    Выборка ровно n ридов за один проход (резервуарная выборка, алгоритм L).
+
+    Каждый рид попадает в выборку с одинаковой вероятностью n / N, где N —
+    общее число ридов, заранее неизвестное. Номер следующего заменяемого рида
+    разыгрывается сразу, поэтому число вызовов генератора растёт как
+    n * log(N / n), а не как N.
+
+    Attributes:
+        n (int): Размер выборки.
+        seen (int): Число просмотренных ридов.
+    """
+
+    def __init__(self, n: int, seed: int | None = None):
+        """
+        Args:
+            n (int): Размер выборки.
+            seed (int | None, optional): Зерно генератора для воспроизводимой выборки.
+
+        Raises:
+            ValueError: Если n неположительно.
+        """
+        if n <= 0:
+            raise ValueError(f"n must be positive, got {n}")
+        self.n = n
+        self.seen = 0
+        self._random = random.Random(seed)
+        # Элементы резервуара: (номер рида, идентификатор, последовательность, качество)
+        self._reservoir: list[tuple[int, str, bytes, bytes | None]] = []
+        self._weight = self._draw_weight()
+        self._next = n - 1 + self._gap()
+
+    def _draw_weight(self) -> float:
+        """Множитель веса алгоритма L: U ** (1 / n)."""
+        return math.exp(math.log(1.0 - self._random.random()) / self.n)
+
+    def _gap(self) -> int:
+        """
+        Разыгрывает расстояние до следующего рида, заменяющего элемент резервуара.
+
+        Returns:
+            int: Расстояние в ридах (не меньше 1).
+        """
+        return int(math.log(1.0 - self._random.random()) / math.log1p(-self._weight)) + 1
+
+    def add(self, batch: SequenceRecordBatch):
+        """
+        Учитывает очередной пакет ридов.
+
+        Args:
+            batch (SequenceRecordBatch): Пакет ридов.
+        """
+        reservoir = self._reservoir
+        offsets = batch.offsets
+        qualities = batch.qualities
+
+        def item(i: int) -> tuple[int, str, bytes, bytes | None]:
+            start, end = offsets[i], offsets[i + 1]
+            quality = qualities[start:end] if qualities is not None else None
+            return self.seen + i, batch.ids[i], batch.sequences[start:end], quality
+
+        i = 0
+        while len(reservoir) < self.n and i < len(batch):
+            reservoir.append(item(i))
+            i += 1
+        while self._next - self.seen < len(batch):
+            reservoir[self._random.randrange(self.n)] = item(self._next - self.seen)
+            self._weight *= self._draw_weight()
+            self._next += self._gap()
+        self.seen += len(batch)
+
+    def result(self) -> SequenceRecordBatch:
+        """
+        Возвращает текущую выборку в порядке следования ридов в файле.
+
+        Returns:
+            SequenceRecordBatch: min(n, seen) ридов.
+        """
+        items = sorted(self._reservoir)
+        has_quality = all(quality is not None for _, _, _, quality in items)
+        return SequenceRecordBatch(
+            [seq_id for _, seq_id, _, _ in items],
+            b"".join(sequence for _, _, sequence, _ in items),
+            b"".join(quality for _, _, _, quality in items) if has_quality else None,
+            array("Q", accumulate((len(sequence) for _, _, sequence, _ in items), initial=0)),
+        )
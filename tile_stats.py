@@ -0,0 +1,188 @@
+import numpy as np
+
+from record import SequenceRecordBatch
+
+
+def parse_tile(seq_id: str) -> int:
+    """
+    Извлекает номер тайла из идентификатора рида Illumina.
+
+    Поддерживаются формат Casava 1.8+ (instrument:run:flowcell:lane:tile:x:y)
+    и старый формат (instrument:lane:tile:x:y#index/read), как в FastQC.
+
+    Args:
+        seq_id (str): Идентификатор рида (без "@").
+
+    Returns:
+        int: Номер тайла или -1, если идентификатор не в формате Illumina.
+
+    >>> parse_tile("M00123:45:000000000-A1B2C:1:1101:15589:1333")
+    1101
+    >>> parse_tile("HWUSI-EAS100R:6:73:941:1973#0/1"), parse_tile("SRR001.1")
+    (73, -1)
+    """
+    fields = seq_id.split(":")
+    if len(fields) >= 7:
+        tile = fields[4]
+    elif len(fields) >= 5:
+        tile = fields[2]
+    else:
+        return -1
+    return int(tile) if tile.isdigit() else -1
+
+
+class TileStats:
+    """
+    Качество по тайлам проточной ячейки Illumina (модуль в духе FastQC).
+
+    Идентификаторы разбираются только при включённом модуле (FastqStats(tiles=True)),
+    так что обычный анализ не тратит на это времени. Для каждого тайла ведутся
+    суммы качества и число оснований по позициям в массивах тайл × позиция;
+    строка массива выбирается по номеру тайла (tile_ids), новые тайлы
+    добавляют строки. Риды без номера тайла не учитываются.
+
+    Attributes:
+        tile_ids (list[int]): Номера тайлов в порядке строк массивов.
+        quality_sums (np.ndarray): Сумма Phred-оценок: тайл × позиция.
+        base_counts (np.ndarray): Число оснований: тайл × позиция.
+        unparsed (int): Число ридов без номера тайла.
+    """
+
+    def __init__(self):
+        """Создаёт пустую статистику: ни одного тайла и нулевые массивы."""
+        self.tile_ids: list[int] = []
+        self._rows: dict[int, int] = {}
+        self.quality_sums = np.zeros((0, 0))
+        self.base_counts = np.zeros((0, 0), dtype=np.int64)
+        self.unparsed = 0
+
+    def _grow(self, tiles: int, max_len: int):
+        """
+        Расширяет массивы до tiles строк и max_len позиций.
+
+        Args:
+            tiles (int): Число тайлов.
+            max_len (int): Число позиций.
+        """
+        rows, columns = self.base_counts.shape
+        if tiles > rows or max_len > columns:
+            padding = ((0, max(tiles - rows, 0)), (0, max(max_len - columns, 0)))
+            self.quality_sums = np.pad(self.quality_sums, padding)
+            self.base_counts = np.pad(self.base_counts, padding)
+
+    def _row(self, tile: int) -> int:
+        """
+        Возвращает строку массивов для тайла, при необходимости добавляя её.
+
+        Args:
+            tile (int): Номер тайла.
+
+        Returns:
+            int: Номер строки.
+        """
+        row = self._rows.get(tile)
+        if row is None:
+            row = self._rows[tile] = len(self.tile_ids)
+            self.tile_ids.append(tile)
+        return row
+
+    def update(self, batch: SequenceRecordBatch):
+        """
+        Добавляет пакет ридов с качеством.
+
+        Args:
+            batch (SequenceRecordBatch): Пакет ридов.
+        """
+        if not len(batch):
+            return
+        tiles, inverse = np.unique(list(map(parse_tile, batch.ids)), return_inverse=True)
+        rows = np.array([self._row(tile) if tile >= 0 else -1 for tile in tiles.tolist()])[inverse]
+        offsets = np.frombuffer(batch.offsets, dtype=np.uint64).astype(np.intp)
+        lengths = np.diff(offsets)
+        self.unparsed += int((rows < 0).sum())
+        max_len = int(lengths.max())
+        self._grow(len(self.tile_ids), max_len)
+
+        base_rows = np.repeat(rows, lengths)
+        keep = base_rows >= 0
+        positions = (np.arange(len(base_rows)) - np.repeat(offsets[:-1], lengths))[keep]
+        cells = base_rows[keep] * max_len + positions
+        size = len(self.tile_ids) * max_len
+        quality = np.frombuffer(batch.qualities, dtype=np.uint8)[keep]
+        shape = (len(self.tile_ids), max_len)
+        self.quality_sums[:, :max_len] += np.bincount(cells, weights=quality, minlength=size).reshape(shape)
+        self.base_counts[:, :max_len] += np.bincount(cells, minlength=size).reshape(shape)
+
+    def merge(self, other: "TileStats") -> "TileStats":
+        """
+        Добавляет статистику другой части файла.
+
+        Args:
+            other (TileStats): Статистика другой части.
+
+        Returns:
+            TileStats: Текущий объект.
+        """
+        rows = [self._row(tile) for tile in other.tile_ids]
+        self._grow(len(self.tile_ids), other.base_counts.shape[1])
+        columns = other.base_counts.shape[1]
+        self.quality_sums[rows, :columns] += other.quality_sums
+        self.base_counts[rows, :columns] += other.base_counts
+        self.unparsed += other.unparsed
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        Формирует словарь результатов; тайлы упорядочены по номеру.
+
+        Отклонение — средняя оценка тайла в позиции минус средняя оценка всех тайлов
+        в этой позиции (как на тепловой карте FastQC).
+
+        Returns:
+            dict: "tiles" (номера), "mean_quality" (среднее по тайлу), "deviation"
+                (матрица тайл × позиция, NaN для непокрытых ячеек) и "unparsed".
+        """
+        order = np.argsort(self.tile_ids, kind="stable")
+        sums, counts = self.quality_sums[order], self.base_counts[order]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+            overall = sums.sum(axis=0) / counts.sum(axis=0)
+            tile_means = sums.sum(axis=1) / counts.sum(axis=1)
+        return {
+            "tiles": [self.tile_ids[i] for i in order],
+            "mean_quality": tile_means.tolist(),
+            "deviation": (means - overall).tolist(),
+            "unparsed": self.unparsed,
+        }
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Возвращает состояние в виде массивов для сохранения в .npz (см. FastqStats.save()).
+
+        Returns:
+            dict[str, np.ndarray]: Именованные массивы.
+        """
+        return {
+            "tile_ids": np.array(self.tile_ids + [self.unparsed], dtype=np.int64),
+            "tile_quality_sums": self.quality_sums,
+            "tile_base_counts": self.base_counts,
+        }
+
+    @classmethod
+    def from_arrays(cls, data) -> "TileStats":
+        """
+        Восстанавливает состояние, сохранённое через to_arrays().
+
+        Args:
+            data (Mapping[str, np.ndarray]): Массивы (например, открытый архив .npz).
+
+        Returns:
+            TileStats: Восстановленная статистика.
+        """
+        stats = cls()
+        *tiles, stats.unparsed = (int(v) for v in data["tile_ids"])
+        for tile in tiles:
+            stats._row(tile)
+        stats.quality_sums = data["tile_quality_sums"]
+        stats.base_counts = data["tile_base_counts"]
+        return stats
@@ -0,0 +1,216 @@
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Iterator
+import gzip
+import io
+import re
+from abstract import GenomicDataReader
+from parallel_gzip import ParallelGzipReader
+from record import VariantInfo, VariantRecord
+
+# Описание ключа INFO в заголовке: ##INFO=<ID=DP,Number=1,Type=Integer,Description="...">
+_INFO_RE = re.compile(r'^##INFO=<ID=([^,>]+),Number=([^,>]+),Type=([^,>]+)(?:,Description="((?:[^"\\]|\\.)*)")?')
+
+_INFO_TYPES = {"Integer": int, "Float": float, "String": str, "Character": str}
+
+
+def _flag(value: str | None) -> bool:
+    """Преобразователь ключа INFO с Type=Flag: наличие ключа означает True."""
+    return True
+
+
+def info_converter(number: str, value_type: str) -> Callable:
+    """
+    Строит функцию преобразования значения INFO по полям Number и Type описания ##INFO.
+
+    Ключи с Number=1 преобразуются в одно значение, с Number=A, R, G, "." или больше 1 —
+    в список значений (для Number=A — по одному на альтернативный аллель).
+    Отсутствующие значения (".") становятся None.
+
+    Args:
+        number (str): Поле Number ("0", "1", "A", "R", "G", "." или число).
+        value_type (str): Поле Type ("Integer", "Float", "Flag", "Character" или "String").
+
+    Returns:
+        Callable: Функция строка значения -> значение нужного типа.
+
+    Raises:
+        ValueError: Если тип неизвестен.
+
+    >>> info_converter("A", "Float")("0.25,."), info_converter("1", "Integer")("30")
+    ([0.25, None], 30)
+    """
+    if value_type == "Flag":
+        return _flag
+    cast = _INFO_TYPES.get(value_type)
+    if cast is None:
+        raise ValueError(f"Unknown INFO type: {value_type!r}")
+    if number == "1":
+        return lambda value: None if value is None or value == "." else cast(value)
+    return lambda value: [] if value is None else [None if item == "." else cast(item) for item in value.split(",")]
+
+
+class VcfReader(GenomicDataReader):
+    """
+    Потоковый ридер вариантов в формате VCF (в том числе сжатом .gz/BGZF).
+
+    Заголовок разбирается один раз при открытии файла: из описаний ##INFO
+    строятся преобразователи значений по типам (см. info_converter()), из строки
+    #CHROM — список образцов. read() возвращает по VariantRecord на строку файла:
+    поле INFO не разбирается, а хранится строкой в VariantInfo и декодируется
+    по ключам при обращении; мультиаллельный вариант остаётся одной записью
+    (см. VariantRecord.alts). Столбцы FORMAT и генотипов образцов не разбираются.
+
+    Attributes:
+        filepath (Path): Путь к файлу VCF.
+        file (file object or None): Открытый текстовый файловый дескриптор.
+        gzip_threads (int): Число потоков фоновой распаковки .gz (0 — модуль gzip).
+        meta (list[str]): Строки метаданных "##" без префикса.
+        info_definitions (dict[str, dict[str, str]]): Описания ключей INFO:
+            "Number", "Type" и "Description".
+        samples (list[str]): Имена образцов из строки #CHROM.
+    """
+
+    def __init__(self, filepath: str | Path, gzip_threads: int = 0):
+        """
+        Инициализирует VcfReader с указанным путём к файлу.
+
+        Args:
+            filepath (str | Path): Путь к файлу VCF (.vcf или .vcf.gz).
+            gzip_threads (int, optional): Число потоков фоновой распаковки .gz-файлов
+                (см. ParallelGzipReader). По умолчанию 0 — распаковка в вызывающем потоке.
+
+        Raises:
+            ValueError: Если число потоков отрицательно.
+        """
+        super().__init__(filepath)
+        if gzip_threads < 0:
+            raise ValueError(f"gzip_threads must be non-negative, got {gzip_threads}")
+        self.gzip_threads = gzip_threads
+        self.meta = []
+        self.info_definitions = {}
+        self.samples = []
+        self._converters = {}
+        self._first_line = None
+
+    def _open_file(self):
+        """
+        Открывает файл VCF в текстовом режиме, распаковывая .gz при необходимости.
+
+        Returns:
+            file object: Открытый текстовый файловый дескриптор.
+        """
+        if str(self.filepath).endswith(".gz"):
+            if self.gzip_threads:
+                raw = ParallelGzipReader(self.filepath, threads=self.gzip_threads)
+                return io.TextIOWrapper(io.BufferedReader(raw), encoding="utf-8")
+            return gzip.open(self.filepath, "rt", encoding="utf-8")
+        return open(self.filepath, "r", encoding="utf-8")
+
+    def _parse_header(self):
+        """
+        Читает строки "##" и строку #CHROM, строит преобразователи значений INFO.
+
+        Raises:
+            ValueError: Если описание ##INFO содержит неизвестный тип.
+        """
+        self.meta = []
+        self.info_definitions = {}
+        self.samples = []
+        self._converters = {}
+        self._first_line = None
+        for line in self.file:
+            if line.startswith("##"):
+                line = line.rstrip("\r\n")
+                self.meta.append(line[2:])
+                match = _INFO_RE.match(line)
+                if match:
+                    key, number, value_type, description = match.groups()
+                    self.info_definitions[key] = {
+                        "Number": number, "Type": value_type, "Description": description or "",
+                    }
+                    self._converters[key] = info_converter(number, value_type)
+            elif line.startswith("#"):
+                self.samples = line.rstrip("\r\n").split("\t")[9:]
+                break
+            else:
+                # Файл без строки #CHROM: первая строка уже относится к вариантам
+                self._first_line = line
+                break
+        self._header_parsed = True
+
+    def read(self) -> Iterator[VariantRecord]:
+        """
+        Итеративно читает варианты после заголовка.
+
+        Yields:
+            VariantRecord: Вариант с полями qual и filter и ленивым полем INFO (VariantInfo).
+
+        Raises:
+            ValueError: При нарушении формата VCF (меньше 8 столбцов, неверная позиция).
+        """
+        if not self.file:
+            self.file = self._open_file()
+        if not self._header_parsed:
+            self._parse_header()
+
+        lines = self.file
+        if self._first_line is not None:
+            lines = chain((self._first_line,), lines)
+            self._first_line = None
+        yield from self._parse_lines(lines)
+
+    def _parse_lines(self, lines) -> Iterator[VariantRecord]:
+        """
+        Разбирает строки вариантов в VariantRecord.
+
+        Args:
+            lines (Iterable[str]): Строки вариантов.
+
+        Yields:
+            VariantRecord: Вариант с ленивым полем INFO.
+
+        Raises:
+            ValueError: При нарушении формата VCF.
+        """
+        converters = self._converters
+        for line in lines:
+            # Столбцы FORMAT и образцов остаются неразделённым хвостом строки
+            columns = line.rstrip("\r\n").split("\t", 8)
+            if len(columns) < 8:
+                if not line.strip():
+                    continue
+                raise ValueError(f"Invalid VCF: expected 8 columns, got {line[:80]!r}")
+            chrom, pos, _, ref, alt, qual, filter_value, info = columns[:8]
+            record = VariantRecord(chrom, int(pos), ref, alt, VariantInfo(info, converters))
+            if qual != ".":
+                record.qual = float(qual)
+            if filter_value != ".":
+                record.filter = filter_value
+            yield record
+
+    def _fetch_lines(self, chrom: str, start: int, end: int) -> Iterator[str]:
+        """
+        Строки вариантов региона (см. GenomicDataReader._fetch_lines()), декодированные в str.
+        """
+        for line in super()._fetch_lines(chrom, start, end):
+            yield line.decode("utf-8")
+
+    def _line_interval(self, line: bytes) -> tuple[str, int, int] | None:
+        """
+        Возвращает интервал варианта (участок референсного аллеля) для индекса регионов.
+
+        Args:
+            line (bytes): Строка файла VCF.
+
+        Returns:
+            tuple[str, int, int] | None: Хромосома, начало и конец (0-based) или None
+                для строк заголовка.
+        """
+        if line.startswith(b"#"):
+            return None
+        columns = line.split(b"\t", 5)
+        if len(columns) < 5:
+            return None
+        start = int(columns[1]) - 1
+        return columns[0].decode("utf-8"), start, start + len(columns[3])